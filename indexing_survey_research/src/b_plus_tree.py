@@ -1,34 +1,317 @@
-import math
+import bisect
+from array import array
+from buffer_pool import BufferPool
+
+# Size model for page_size budgets: a small header per node, a slot per key
+# and an 8-byte child pointer or row reference per pointer
+NODE_HEADER_BYTES = 16
+KEY_SLOT_BYTES = 2
+POINTER_BYTES = 8
+
+def _key_bytes(key):
+    if isinstance(key, (str, bytes)):
+        return len(key)
+    return 8
+
+def _common_prefix(a, b):
+    n = 0
+    limit = min(len(a), len(b))
+    while n < limit and a[n] == b[n]:
+        n += 1
+    return a[:n]
+
+def _shortest_separator(left_max, right_min):
+    """Shortest key s with left_max < s <= right_min (suffix truncation)"""
+    if not isinstance(right_min, (str, bytes)) or not left_max < right_min:
+        return right_min
+    return right_min[:len(_common_prefix(left_max, right_min)) + 1]
+
+class PrefixCompressedKeys:
+    """Sorted str/bytes keys held as one shared prefix plus per-key suffixes.
+    
+    Supports the list operations the tree uses on leaf keys (len, indexing,
+    slicing, iteration, insert, bisect), rebuilding full keys on access.
+    """
+    __slots__ = ("prefix", "suffixes")
+    
+    def __init__(self, keys=()):
+        keys = list(keys)
+        # In sorted keys the first and last share the prefix common to all
+        self.prefix = _common_prefix(keys[0], keys[-1]) if keys else None
+        cut = len(self.prefix) if keys else 0
+        self.suffixes = [key[cut:] for key in keys]
+        
+    def __len__(self):
+        return len(self.suffixes)
+        
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PrefixCompressedKeys(self.prefix + suffix for suffix in self.suffixes[index])
+        return self.prefix + self.suffixes[index]
+        
+    def __iter__(self):
+        prefix = self.prefix
+        for suffix in self.suffixes:
+            yield prefix + suffix
+            
+    def insert(self, index, key):
+        if not self.suffixes:
+            self.prefix = key
+        elif not key.startswith(self.prefix):
+            shorter = _common_prefix(self.prefix, key)
+            moved = self.prefix[len(shorter):]
+            self.suffixes = [moved + suffix for suffix in self.suffixes]
+            self.prefix = shorter
+        self.suffixes.insert(index, key[len(self.prefix):])
+        
+    def __delitem__(self, index):
+        # The remaining keys still share the prefix, it just may not be the longest one
+        del self.suffixes[index]
+        
+    def encoded_size(self):
+        if not self.suffixes:
+            return 0
+        return len(self.prefix) + sum(len(suffix) for suffix in self.suffixes)
 
 class BPlusTreeNode:
-    def __init__(self, is_leaf=False):
-        self.is_leaf = is_leaf
-        self.keys = []
+    """Common node fields. Slots keep nodes free of a per-instance __dict__."""
+    __slots__ = ("keys", "pointers", "parent")
+    is_leaf = False
+    
+    def __init__(self, keys):
+        self.keys = keys
         self.pointers = []
-        self.next = None
         self.parent = None
 
+class BPlusTreeInternalNode(BPlusTreeNode):
+    # counts[i] is the number of entries under pointers[i]; only maintained
+    # by trees built with order_statistics=True
+    __slots__ = ("counts",)
+    
+    def __init__(self, keys):
+        super().__init__(keys)
+        self.counts = []
+
+class BPlusTreeLeafNode(BPlusTreeNode):
+    __slots__ = ("next", "prev")
+    is_leaf = True
+    
+    def __init__(self, keys):
+        super().__init__(keys)
+        self.next = None
+        self.prev = None
+
+class BPlusTreeCursor:
+    """Lazy iterator over the (key, value) pairs of a BPlusTree key range.
+    
+    Seeks into the first leaf with binary search, then follows the leaf
+    chain one entry at a time. position is the last key returned; passing
+    it back to BPlusTree.scan as resume_from continues right after it.
+    """
+    def __init__(self, tree, low=None, high=None, reverse=False, limit=None, resume_from=None):
+        self.tree = tree
+        self.low = low
+        self.high = high
+        self.reverse = reverse
+        self.limit = limit
+        self.position = resume_from
+        self.returned = 0
+        self.num_read_ios = 0
+        self.leaf = None
+        self.index = 0
+        self._started = False
+        
+    def __iter__(self):
+        return self
+        
+    def __next__(self):
+        if not self._started:
+            self._seek()
+        if self.limit is not None and self.returned >= self.limit:
+            self.leaf = None
+        
+        while self.leaf is not None:
+            if not self.reverse and self.index < len(self.leaf.keys):
+                key = self.leaf.keys[self.index]
+                if self.high is not None and key > self.high:
+                    break
+                value = self.leaf.pointers[self.index]
+                self.index += 1
+                self.position = key
+                self.returned += 1
+                return key, value
+            if self.reverse and self.index >= 0:
+                key = self.leaf.keys[self.index]
+                if self.low is not None and key < self.low:
+                    break
+                value = self.leaf.pointers[self.index]
+                self.index -= 1
+                self.position = key
+                self.returned += 1
+                return key, value
+            self._move(self.leaf.prev if self.reverse else self.leaf.next)
+            
+        self.leaf = None
+        raise StopIteration
+        
+    def _seek(self):
+        self._started = True
+        tree = self.tree
+        tree._reset_counters()
+        if not self.reverse:
+            bound = self.position if self.position is not None else self.low
+            if bound is None:
+                leaf = self._edge_leaf(0)
+                self.index = 0
+            else:
+                leaf = tree._find_leaf(bound)
+                # Resuming skips the key already returned
+                if self.position is not None:
+                    self.index = bisect.bisect_right(leaf.keys, bound)
+                else:
+                    self.index = bisect.bisect_left(leaf.keys, bound)
+        else:
+            bound = self.position if self.position is not None else self.high
+            if bound is None:
+                leaf = self._edge_leaf(-1)
+                self.index = len(leaf.keys) - 1
+            else:
+                leaf = tree._find_leaf(bound)
+                if self.position is not None:
+                    self.index = bisect.bisect_left(leaf.keys, bound) - 1
+                else:
+                    self.index = bisect.bisect_right(leaf.keys, bound) - 1
+        tree._read_node(leaf)
+        self.num_read_ios = tree.num_read_ios
+        self.leaf = leaf
+        
+    def _edge_leaf(self, side):
+        node = self.tree.root
+        while not node.is_leaf:
+            self.tree._read_node(node)
+            node = node.pointers[side]
+        return node
+        
+    def _move(self, leaf):
+        self.leaf = leaf
+        if leaf is None:
+            return
+        reads = self.tree.num_read_ios
+        self.tree._read_node(leaf)
+        self.num_read_ios += self.tree.num_read_ios - reads
+        self.index = len(leaf.keys) - 1 if self.reverse else 0
+
 class BPlusTree:
-    def __init__(self, order=4):
-        self.root = BPlusTreeNode(is_leaf=True)
+    def __init__(self, order=4, buffer_pool_pages=None, eviction_policy="lru", key_type=None,
+                 order_statistics=False, page_size=None, suffix_truncation=True,
+                 prefix_compression=False):
+        # key_type is an array typecode such as 'q'; keys are then stored
+        # unboxed in typed arrays instead of lists of Python objects
+        self.key_type = key_type
+        if key_type is not None and prefix_compression:
+            raise ValueError("prefix_compression applies to str/bytes keys, not typed arrays")
+        # With page_size set a node also splits once its estimated encoded
+        # size exceeds the page, so shorter keys mean more keys per node
+        self.page_size = page_size
+        # Push the shortest separating key into the parent on leaf splits
+        # instead of the full first key of the right leaf
+        self.suffix_truncation = suffix_truncation
+        # Store each leaf's common key prefix once
+        self.prefix_compression = prefix_compression
+        # Subtree entry counts make count_range/rank/select logarithmic, but
+        # every insert then rewrites each ancestor on its path
+        self.order_statistics = order_statistics
+        self.root = self._new_leaf()
         self.order = order
         self.num_read_ios = 0
         self.num_write_ios = 0
+        self.num_cache_hits = 0
+        
+        # While a batch runs, nodes already read are not read again and
+        # written nodes are collected and written once when it ends
+        self._batch_read = None
+        self._batch_written = None
+        
+        # Without a buffer pool every node visit counts as a disk read. With
+        # one, num_read_ios counts misses and num_write_ios write-backs.
+        self.buffer_pool = None
+        if buffer_pool_pages is not None:
+            self.buffer_pool = BufferPool(buffer_pool_pages, eviction_policy,
+                                          load_page=self._load_page,
+                                          write_page=self._write_back_page)
         
     def _reset_counters(self):
         self.num_read_ios = 0
         self.num_write_ios = 0
+        self.num_cache_hits = 0
+        
+    def _make_keys(self, keys=()):
+        if self.key_type is None:
+            return list(keys)
+        return array(self.key_type, keys)
+        
+    def _leaf_keys(self, keys=()):
+        if self.prefix_compression:
+            return PrefixCompressedKeys(keys)
+        return self._make_keys(keys)
+        
+    def _new_leaf(self, keys=()):
+        return BPlusTreeLeafNode(self._leaf_keys(keys))
+        
+    def _new_internal(self, keys=()):
+        return BPlusTreeInternalNode(self._make_keys(keys))
+        
+    def _load_page(self, node):
+        self.num_read_ios += 1
+        return node
+        
+    def _write_back_page(self, node, page):
+        self.num_write_ios += 1
         
     def _read_node(self, node):
         """Simulate reading a node from disk"""
-        self.num_read_ios += 1
+        if self._batch_read is not None:
+            if node in self._batch_read:
+                return node
+            self._batch_read.add(node)
+        if self.buffer_pool is None:
+            self.num_read_ios += 1
+            return node
+        hits = self.buffer_pool.hits
+        self.buffer_pool.fetch_page(node)
+        self.buffer_pool.unpin_page(node)
+        self.num_cache_hits += self.buffer_pool.hits - hits
         return node
         
     def _write_node(self, node):
         """Simulate writing a node to disk"""
-        self.num_write_ios += 1
+        if self._batch_written is not None:
+            self._batch_written.add(node)
+            return node
+        if self.buffer_pool is None:
+            self.num_write_ios += 1
+        else:
+            self.buffer_pool.put_page(node, node)
         return node
         
+    def _begin_batch(self):
+        self._batch_read = set()
+        self._batch_written = set()
+        
+    def _end_batch(self):
+        written = self._batch_written
+        self._batch_read = None
+        self._batch_written = None
+        for node in written:
+            self._write_node(node)
+        
+    def flush(self):
+        """Write every dirty buffered node back to disk"""
+        self._reset_counters()
+        if self.buffer_pool is not None:
+            self.buffer_pool.flush_all()
+        return self.num_write_ios
+        
     def search(self, key):
         self._reset_counters()
         node = self.root
@@ -36,72 +319,316 @@ class BPlusTree:
         while not node.is_leaf:
             self._read_node(node)
             # Find the appropriate child
-            idx = 0
-            while idx < len(node.keys) and key >= node.keys[idx]:
-                idx += 1
+            idx = bisect.bisect_right(node.keys, key)
             node = node.pointers[idx]
             
         # Search in leaf node
         self._read_node(node)
-        for i, k in enumerate(node.keys):
-            if k == key:
-                return node.pointers[i], self.num_read_ios
+        i = bisect.bisect_left(node.keys, key)
+        if i < len(node.keys) and node.keys[i] == key:
+            return node.pointers[i], self.num_read_ios
         return None, self.num_read_ios
         
+    def search_many(self, keys):
+        """Look up a batch of keys, reading each node at most once.
+        
+        The batch is sorted and split among children at every internal
+        node, so keys that share a path share its reads and keys in the
+        same leaf cost one leaf visit. Returns the values in input order
+        (None for missing keys) and the read count for the whole batch.
+        """
+        self._reset_counters()
+        keys = list(keys)
+        values = [None] * len(keys)
+        if not keys:
+            return values, self.num_read_ios
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        sorted_keys = [keys[i] for i in order]
+        
+        stack = [(self.root, 0, len(sorted_keys))]
+        while stack:
+            node, lo, hi = stack.pop()
+            self._read_node(node)
+            if node.is_leaf:
+                pos = 0
+                for j in range(lo, hi):
+                    pos = bisect.bisect_left(node.keys, sorted_keys[j], pos)
+                    if pos < len(node.keys) and node.keys[pos] == sorted_keys[j]:
+                        values[order[j]] = node.pointers[pos]
+                continue
+            
+            # Hand each child the run of keys that routes to it
+            children = []
+            j = lo
+            while j < hi:
+                idx = bisect.bisect_right(node.keys, sorted_keys[j])
+                if idx < len(node.keys):
+                    end = bisect.bisect_left(sorted_keys, node.keys[idx], j, hi)
+                else:
+                    end = hi
+                children.append((node.pointers[idx], j, end))
+                j = end
+            stack.extend(reversed(children))
+            
+        return values, self.num_read_ios
+        
     def insert(self, key, value):
         self._reset_counters()
-        leaf = self._find_leaf(key)
+        leaf = self._find_leaf(key, 1 if self.order_statistics else 0)
         self._insert_into_leaf(leaf, key, value)
         return self.num_write_ios
         
-    def _find_leaf(self, key):
+    def upsert(self, key, value):
+        """Set key's value: replace the entry search(key) finds, or insert one if there is none.
+        
+        insert() keeps every entry it is given, so repeated keys pile up;
+        upsert() is the overwrite that LSM and fractal trees give insert().
+        """
+        self._reset_counters()
+        leaf = self._find_leaf(key)
+        if not self._replace_in_leaf(leaf, key, value):
+            if self.order_statistics:
+                # The new entry is counted along its path, as in insert
+                self._find_leaf(key, 1)
+            self._insert_into_leaf(leaf, key, value)
+        return self.num_write_ios
+        
+    def bulk_load(self, items, fill_factor=1.0):
+        """Build the tree bottom-up from (key, value) pairs.
+        
+        Replaces the current contents of the tree. Input that is not
+        already sorted by key is sorted first. Leaves are packed left to
+        right to fill_factor of their capacity and every node is written
+        exactly once.
+        """
+        if not 0 < fill_factor <= 1:
+            raise ValueError("fill_factor must be in (0, 1]")
+            
+        self._reset_counters()
+        items = list(items)
+        if any(items[i][0] > items[i + 1][0] for i in range(len(items) - 1)):
+            items.sort(key=lambda item: item[0])
+            
+        if not items:
+            self.root = self._new_leaf()
+            self._write_node(self.root)
+            return self.num_write_ios
+            
+        # Pack the leaf level and link it with next pointers
+        leaf_fill = max(1, min(self.order - 1, int((self.order - 1) * fill_factor)))
+        if self.page_size is not None:
+            key_bytes = sum(_key_bytes(key) for key, _ in items) / len(items)
+            leaf_fill = self._fill_for_page(leaf_fill, key_bytes, fill_factor)
+        level = []
+        prev = None
+        for start, end in self._chunk_bounds(len(items), leaf_fill):
+            leaf = self._new_leaf(key for key, _ in items[start:end])
+            leaf.pointers = [value for _, value in items[start:end]]
+            if prev is not None:
+                prev.next = leaf
+                leaf.prev = prev
+            prev = leaf
+            level.append(leaf)
+        for leaf in level:
+            self._write_node(leaf)
+            
+        # Build internal levels bottom-up, carrying each node's smallest key
+        # (or the separator that suffix truncation allows) and entry count
+        min_keys = [level[0].keys[0]]
+        for left, right in zip(level, level[1:]):
+            min_keys.append(self._separator(left.keys[-1], right.keys[0]))
+        counts = [len(leaf.keys) for leaf in level]
+        internal_fill = max(3, min(self.order, int(self.order * fill_factor)))
+        if self.page_size is not None:
+            key_bytes = sum(_key_bytes(key) for key in min_keys) / len(min_keys)
+            internal_fill = max(3, self._fill_for_page(internal_fill, key_bytes, fill_factor))
+        while len(level) > 1:
+            parents = []
+            parent_min_keys = []
+            parent_counts = []
+            for start, end in self._chunk_bounds(len(level), internal_fill):
+                node = self._new_internal(min_keys[start + 1:end])
+                node.pointers = level[start:end]
+                if self.order_statistics:
+                    node.counts = counts[start:end]
+                for child in node.pointers:
+                    child.parent = node
+                self._write_node(node)
+                parents.append(node)
+                parent_min_keys.append(min_keys[start])
+                parent_counts.append(sum(counts[start:end]))
+            level = parents
+            min_keys = parent_min_keys
+            counts = parent_counts
+            
+        self.root = level[0]
+        self.root.parent = None
+        return self.num_write_ios
+        
+    def _fill_for_page(self, fill, key_bytes, fill_factor):
+        """Cap a per-node entry count so nodes of average keys fit the page"""
+        entry_bytes = key_bytes + KEY_SLOT_BYTES + POINTER_BYTES
+        per_page = int((self.page_size - NODE_HEADER_BYTES) * fill_factor / entry_bytes)
+        return max(1, min(fill, per_page))
+        
+    def _chunk_bounds(self, count, fill):
+        """Split count entries into the fewest chunks of at most fill, evenly sized"""
+        num_chunks = -(-count // fill)
+        base, extra = divmod(count, num_chunks)
+        start = 0
+        for i in range(num_chunks):
+            end = start + base + (1 if i < extra else 0)
+            yield start, end
+            start = end
+            
+    def insert_many(self, pairs):
+        """Insert a batch of (key, value) pairs, touching each node at most once.
+        
+        The batch is sorted, the descent path is kept between keys, and all
+        keys that land in the same leaf are merged into it in one visit.
+        Node writes are deferred to the end of the batch so a node updated
+        several times is written once. Returns the batch write count.
+        """
+        self._reset_counters()
+        pairs = sorted(pairs, key=lambda pair: pair[0])
+        self._begin_batch()
+        
+        # Stack of (node, exclusive upper key bound of its subtree, index of
+        # the node in its parent's pointers)
+        stack = [(self.root, None, None)]
+        i = 0
+        while i < len(pairs):
+            key = pairs[i][0]
+            while stack[-1][1] is not None and key >= stack[-1][1]:
+                stack.pop()
+            node, upper, _ = stack[-1]
+            self._read_node(node)
+            while not node.is_leaf:
+                idx = bisect.bisect_right(node.keys, key)
+                if idx < len(node.keys):
+                    upper = node.keys[idx]
+                node = node.pointers[idx]
+                self._read_node(node)
+                stack.append((node, upper, idx))
+                
+            end = i
+            while end < len(pairs) and (upper is None or pairs[end][0] < upper):
+                end += 1
+            pos = 0
+            for key, value in pairs[i:end]:
+                pos = bisect.bisect_left(node.keys, key, pos)
+                node.keys.insert(pos, key)
+                node.pointers.insert(pos, value)
+                pos += 1
+            self._write_node(node)
+            if self.order_statistics:
+                for (parent, _, _), (_, _, idx) in zip(stack, stack[1:]):
+                    parent.counts[idx] += end - i
+                    self._write_node(parent)
+            i = end
+            
+            if self._is_overfull(node):
+                self._split_overfull_leaf(node)
+                # Splits may have moved key ranges between nodes on the path
+                stack = [(self.root, None, None)]
+                
+        self._end_batch()
+        return self.num_write_ios
+        
+    def _split_overfull_leaf(self, leaf):
+        pending = [leaf]
+        while pending:
+            node = pending.pop()
+            if self._is_overfull(node):
+                self._split_leaf(node)
+                pending.extend([node, node.next])
+        
+    def _find_leaf(self, key, count_delta=0):
         node = self.root
         while not node.is_leaf:
             self._read_node(node)
-            idx = 0
-            while idx < len(node.keys) and key >= node.keys[idx]:
-                idx += 1
+            idx = bisect.bisect_right(node.keys, key)
+            if count_delta:
+                node.counts[idx] += count_delta
+                self._write_node(node)
             node = node.pointers[idx]
         return node
         
+    def _node_bytes(self, node):
+        """Estimated encoded size of a node under the page size model"""
+        if isinstance(node.keys, PrefixCompressedKeys):
+            key_bytes = node.keys.encoded_size()
+        else:
+            key_bytes = sum(_key_bytes(key) for key in node.keys)
+        return (NODE_HEADER_BYTES + key_bytes + len(node.keys) * KEY_SLOT_BYTES
+                + len(node.pointers) * POINTER_BYTES)
+        
+    def _is_overfull(self, node):
+        if len(node.keys) > self.order - 1:
+            return True
+        # A node needs three keys before a byte-driven split leaves two non-empty halves
+        return (self.page_size is not None and len(node.keys) > 2
+                and self._node_bytes(node) > self.page_size)
+        
+    def _separator(self, left_max, right_min):
+        if self.suffix_truncation:
+            return _shortest_separator(left_max, right_min)
+        return right_min
+        
+    def _subtree_count(self, node):
+        if node.is_leaf:
+            return len(node.keys)
+        return sum(node.counts)
+        
+    def _replace_in_leaf(self, leaf, key, value):
+        """Overwrite the value of key's first entry in leaf; False if leaf has none"""
+        i = bisect.bisect_left(leaf.keys, key)
+        if i == len(leaf.keys) or leaf.keys[i] != key:
+            return False
+        leaf.pointers[i] = value
+        self._write_node(leaf)
+        return True
+        
     def _insert_into_leaf(self, leaf, key, value):
         # Find position to insert
-        pos = 0
-        while pos < len(leaf.keys) and leaf.keys[pos] < key:
-            pos += 1
+        pos = bisect.bisect_left(leaf.keys, key)
             
         leaf.keys.insert(pos, key)
         leaf.pointers.insert(pos, value)
         self._write_node(leaf)
         
-        if len(leaf.keys) > self.order - 1:
-            self._split_leaf(leaf)
+        if self._is_overfull(leaf):
+            self._split_overfull_leaf(leaf)
             
     def _split_leaf(self, leaf):
         mid = len(leaf.keys) // 2
-        new_leaf = BPlusTreeNode(is_leaf=True)
+        new_leaf = self._new_leaf(leaf.keys[mid:])
         
-        new_leaf.keys = leaf.keys[mid:]
         new_leaf.pointers = leaf.pointers[mid:]
         leaf.keys = leaf.keys[:mid]
         leaf.pointers = leaf.pointers[:mid]
         
         new_leaf.next = leaf.next
+        new_leaf.prev = leaf
+        if leaf.next is not None:
+            leaf.next.prev = new_leaf
         leaf.next = new_leaf
         new_leaf.parent = leaf.parent
         
         self._write_node(new_leaf)
         self._write_node(leaf)
         
-        # Insert the middle key into parent
-        self._insert_into_parent(leaf, new_leaf.keys[0], new_leaf)
+        # Insert the separator into parent
+        separator = self._separator(leaf.keys[-1], new_leaf.keys[0])
+        self._insert_into_parent(leaf, separator, new_leaf)
         
     def _insert_into_parent(self, left, key, right):
         if left.parent is None:
             # Create new root
-            new_root = BPlusTreeNode()
-            new_root.keys = [key]
+            new_root = self._new_internal([key])
             new_root.pointers = [left, right]
+            if self.order_statistics:
+                new_root.counts = [self._subtree_count(left), self._subtree_count(right)]
             left.parent = new_root
             right.parent = new_root
             self.root = new_root
@@ -111,27 +638,30 @@ class BPlusTree:
         parent = left.parent
         self._read_node(parent)
         
-        # Find position to insert
-        pos = 0
-        while pos < len(parent.keys) and parent.keys[pos] < key:
-            pos += 1
-            
+        # Right goes just after left; with repeated separators the key alone can name the wrong child
+        pos = self._child_index(parent, left)
+        
         parent.keys.insert(pos, key)
         parent.pointers.insert(pos + 1, right)
+        if self.order_statistics:
+            parent.counts[pos] = self._subtree_count(left)
+            parent.counts.insert(pos + 1, self._subtree_count(right))
         self._write_node(parent)
         
-        if len(parent.keys) > self.order - 1:
+        if self._is_overfull(parent):
             self._split_internal(parent)
             
     def _split_internal(self, node):
         mid = len(node.keys) // 2
         split_key = node.keys[mid]
         
-        new_node = BPlusTreeNode()
-        new_node.keys = node.keys[mid+1:]
+        new_node = self._new_internal(node.keys[mid+1:])
         new_node.pointers = node.pointers[mid+1:]
         node.keys = node.keys[:mid]
         node.pointers = node.pointers[:mid+1]
+        if self.order_statistics:
+            new_node.counts = node.counts[mid+1:]
+            node.counts = node.counts[:mid+1]
         
         # Update parent pointers for children
         for pointer in new_node.pointers:
@@ -141,22 +671,226 @@ class BPlusTree:
         self._write_node(new_node)
         self._write_node(node)
         
-        if node.parent is not None:
-            self._insert_into_parent(node, split_key, new_node)
+        self._insert_into_parent(node, split_key, new_node)
+            
+    def delete(self, key):
+        """Remove one entry with key and return the write count.
+        
+        A node left less than half full takes entries from a sibling, or
+        is merged with it when both fit in one node; merges can cascade up
+        to the root, which is dropped once it has a single child. Deleting
+        a missing key changes nothing.
+        """
+        self._reset_counters()
+        leaf = self._find_leaf(key)
+        self._read_node(leaf)
+        pos = bisect.bisect_left(leaf.keys, key)
+        if pos == len(leaf.keys) or leaf.keys[pos] != key:
+            return self.num_write_ios
             
+        del leaf.keys[pos]
+        del leaf.pointers[pos]
+        self._write_node(leaf)
+        if self.order_statistics:
+            child = leaf
+            while child.parent is not None:
+                parent = child.parent
+                parent.counts[self._child_index(parent, child)] -= 1
+                self._write_node(parent)
+                child = parent
+                
+        self._rebalance(leaf)
+        return self.num_write_ios
+        
+    def _child_index(self, parent, child):
+        for i, pointer in enumerate(parent.pointers):
+            if pointer is child:
+                return i
+        raise ValueError("node is not a child of its parent")
+        
+    def _is_underfull(self, node):
+        """A non-root node below half of its capacity"""
+        min_keys = self.order // 2 if node.is_leaf else (self.order - 1) // 2
+        if len(node.keys) >= min_keys:
+            return False
+        # Nodes split by page_size may hold few large keys yet fill half the page
+        return self.page_size is None or self._node_bytes(node) < self.page_size // 2
+        
+    def _rebalance(self, node):
+        while node is not self.root and self._is_underfull(node):
+            parent = node.parent
+            self._read_node(parent)
+            idx = self._child_index(parent, node)
+            # Pair the node with its left sibling, or its right one if it has none
+            sep = idx - 1 if idx > 0 else 0
+            self._read_node(parent.pointers[idx - 1] if idx > 0 else parent.pointers[idx + 1])
+            if not self._merge_children(parent, sep):
+                self._redistribute_children(parent, sep)
+                return
+            node = parent
+            
+        if not self.root.is_leaf and len(self.root.pointers) == 1:
+            # The root lost its last separator; its only child takes over
+            self.root = self.root.pointers[0]
+            self.root.parent = None
+            
+    def _merge_children(self, parent, sep):
+        """Merge parent's child sep + 1 into child sep if the result fits in one node"""
+        left, right = parent.pointers[sep], parent.pointers[sep + 1]
+        if left.is_leaf:
+            merged = self._new_leaf(list(left.keys) + list(right.keys))
+        else:
+            # The separator moves down between the two halves
+            merged = self._new_internal(list(left.keys) + [parent.keys[sep]] + list(right.keys))
+        merged.pointers = left.pointers + right.pointers
+        if self._is_overfull(merged):
+            return False
+            
+        left.keys = merged.keys
+        left.pointers = merged.pointers
+        if left.is_leaf:
+            left.next = right.next
+            if right.next is not None:
+                right.next.prev = left
+        else:
+            for child in right.pointers:
+                child.parent = left
+            if self.order_statistics:
+                left.counts = left.counts + right.counts
+                
+        del parent.keys[sep]
+        del parent.pointers[sep + 1]
+        if self.order_statistics:
+            parent.counts[sep] += parent.counts[sep + 1]
+            del parent.counts[sep + 1]
+        self._write_node(left)
+        self._write_node(parent)
+        return True
+        
+    def _redistribute_children(self, parent, sep):
+        """Split the entries of parent's children sep and sep + 1 evenly between them"""
+        left, right = parent.pointers[sep], parent.pointers[sep + 1]
+        pointers = left.pointers + right.pointers
+        if left.is_leaf:
+            keys = list(left.keys) + list(right.keys)
+            mid = len(keys) // 2
+            left.keys = self._leaf_keys(keys[:mid])
+            right.keys = self._leaf_keys(keys[mid:])
+            left.pointers = pointers[:mid]
+            right.pointers = pointers[mid:]
+            parent.keys[sep] = self._separator(left.keys[-1], right.keys[0])
+            if self.order_statistics:
+                parent.counts[sep] = len(left.keys)
+                parent.counts[sep + 1] = len(right.keys)
+        else:
+            keys = list(left.keys) + [parent.keys[sep]] + list(right.keys)
+            mid = len(keys) // 2
+            left.keys = self._make_keys(keys[:mid])
+            right.keys = self._make_keys(keys[mid + 1:])
+            left.pointers = pointers[:mid + 1]
+            right.pointers = pointers[mid + 1:]
+            parent.keys[sep] = keys[mid]
+            for node in (left, right):
+                for child in node.pointers:
+                    child.parent = node
+            if self.order_statistics:
+                counts = left.counts + right.counts
+                left.counts = counts[:mid + 1]
+                right.counts = counts[mid + 1:]
+                parent.counts[sep] = sum(left.counts)
+                parent.counts[sep + 1] = sum(right.counts)
+                
+        self._write_node(left)
+        self._write_node(right)
+        self._write_node(parent)
+        
     def range_query(self, low, high):
         self._reset_counters()
-        start_node = self._find_leaf(low)
+        current = self._find_leaf(low)
         results = []
-        current = start_node
+        start = None
         
         while current:
             self._read_node(current)
-            for i, key in enumerate(current.keys):
-                if low <= key <= high:
-                    results.append((key, current.pointers[i]))
-                elif key > high:
-                    return results, self.num_read_ios
+            # Only the first leaf can hold keys below low
+            if start is None:
+                start = bisect.bisect_left(current.keys, low)
+            else:
+                start = 0
+            end = bisect.bisect_right(current.keys, high)
+            results.extend(zip(current.keys[start:end], current.pointers[start:end]))
+            if end < len(current.keys):
+                return results, self.num_read_ios
             current = current.next
             
         return results, self.num_read_ios
+        
+    def count_range(self, low, high):
+        """Number of entries with low <= key <= high, without visiting them"""
+        self._require_order_statistics()
+        self._reset_counters()
+        count = self._count_below(high, inclusive=True) - self._count_below(low, inclusive=False)
+        return max(count, 0), self.num_read_ios
+        
+    def rank(self, key):
+        """Number of entries with a key smaller than key"""
+        self._require_order_statistics()
+        self._reset_counters()
+        return self._count_below(key, inclusive=False), self.num_read_ios
+        
+    def select(self, k):
+        """Return the (key, value) entry at 0-based position k in key order"""
+        self._require_order_statistics()
+        self._reset_counters()
+        if not 0 <= k < self._subtree_count(self.root):
+            raise IndexError("select index out of range")
+        node = self.root
+        while not node.is_leaf:
+            self._read_node(node)
+            idx = 0
+            while k >= node.counts[idx]:
+                k -= node.counts[idx]
+                idx += 1
+            node = node.pointers[idx]
+        self._read_node(node)
+        return (node.keys[k], node.pointers[k]), self.num_read_ios
+        
+    def _count_below(self, key, inclusive):
+        """Count entries < key (or <= key), adding whole subtrees left of the path"""
+        total = 0
+        node = self.root
+        while not node.is_leaf:
+            self._read_node(node)
+            # Copies of key can sit left of a separator equal to it, so < key stops before those
+            idx = bisect.bisect_right(node.keys, key) if inclusive else bisect.bisect_left(node.keys, key)
+            total += sum(node.counts[:idx])
+            node = node.pointers[idx]
+        self._read_node(node)
+        if inclusive:
+            return total + bisect.bisect_right(node.keys, key)
+        return total + bisect.bisect_left(node.keys, key)
+        
+    def space_amplification(self):
+        """Leaf entry slots allocated per live entry, the inverse of the average leaf fill"""
+        node = self.root
+        while not node.is_leaf:
+            node = node.pointers[0]
+        num_leaves = 0
+        num_entries = 0
+        while node is not None:
+            num_leaves += 1
+            num_entries += len(node.keys)
+            node = node.next
+        return num_leaves * (self.order - 1) / num_entries if num_entries else 0.0
+        
+    def _require_order_statistics(self):
+        if not self.order_statistics:
+            raise RuntimeError("this operation needs a tree built with order_statistics=True")
+        
+    def scan(self, low=None, high=None, reverse=False, limit=None, resume_from=None):
+        """Lazily yield (key, value) pairs with low <= key <= high.
+        
+        Either bound may be None for an open range. Memory use is constant
+        regardless of the range width.
+        """
+        return BPlusTreeCursor(self, low, high, reverse, limit, resume_from)
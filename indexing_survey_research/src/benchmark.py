@@ -1,19 +1,67 @@
+import contextlib
+import os
+import sys
 import time
 import random
+import tempfile
+import threading
+import tracemalloc
 import matplotlib.pyplot as plt
 import numpy as np
 from b_plus_tree import BPlusTree
 from lsm_tree import LSMTree
+from paged_b_plus_tree import PagedBPlusTree
+from concurrent_b_plus_tree import ConcurrentBPlusTree
+from fractal_tree_sim import FractalTree
+from workloads import generate_workload_sequential, generate_workload_random, generate_workload_strings
+from harness import RESULTS_DIR, results_path
+from latency import PERCENTILES, LatencyRecorder, format_summary
+from memory_profile import CATEGORIES, profile_memory
 
-def generate_workload_sequential(size):
-    """Generate sequential keys"""
-    return [(i, f"value_{i}") for i in range(size)]
+def b_tree_height(b_tree):
+    height = 1
+    node = b_tree.root
+    while not node.is_leaf:
+        node = node.pointers[0]
+        height += 1
+    return height
 
-def generate_workload_random(size):
-    """Generate random keys"""
-    keys = list(range(size))
-    random.shuffle(keys)
-    return [(key, f"value_{key}") for key in keys]
+def b_tree_node_counts(b_tree):
+    """Return the number of leaf and internal nodes"""
+    leaves = internal = 0
+    stack = [b_tree.root]
+    while stack:
+        node = stack.pop()
+        if node.is_leaf:
+            leaves += 1
+        else:
+            internal += 1
+            stack.extend(node.pointers)
+    return leaves, internal
+
+def b_tree_index_bytes(b_tree):
+    """Bytes held by B+Tree nodes, key containers and boxed keys (values excluded)"""
+    total = 0
+    stack = [b_tree.root]
+    while stack:
+        node = stack.pop()
+        total += sys.getsizeof(node) + sys.getsizeof(node.keys) + sys.getsizeof(node.pointers)
+        if isinstance(node.keys, list):
+            total += sum(sys.getsizeof(key) for key in node.keys)
+        if not node.is_leaf:
+            stack.extend(node.pointers)
+    return total
+
+def sstable_index_bytes(lsm_tree):
+    """Bytes held by the keys and entry containers of an in-memory LSM-Tree's SSTables"""
+    total = 0
+    for run in lsm_tree.sstables:
+        if run.keys is not None:
+            total += run.keys.nbytes + sys.getsizeof(run.values)
+        else:
+            total += sys.getsizeof(run.entries)
+            total += sum(sys.getsizeof(entry) + sys.getsizeof(entry[0]) for entry in run.entries)
+    return total
 
 def benchmark_write_amplification():
     """Measure write amplification for different dataset sizes"""
@@ -51,7 +99,7 @@ def benchmark_write_amplification():
     plt.title('Write Amplification: B+Tree vs LSM-Tree')
     plt.legend()
     plt.grid(True, alpha=0.3)
-    plt.savefig('../results/write_amplification.png', dpi=300, bbox_inches='tight')
+    plt.savefig(results_path('write_amplification.png'), dpi=300, bbox_inches='tight')
     plt.close()
     
     return b_tree_waf, lsm_tree_waf
@@ -68,11 +116,11 @@ def benchmark_insert_throughput():
     b_tree_times = []
     b_tree_counts = []
     
-    start_time = time.time()
+    start_time = time.perf_counter()
     for i, (key, value) in enumerate(workload):
         b_tree.insert(key, value)
         if i % 1000 == 0:  # Measure every 1000 inserts
-            b_tree_times.append(time.time() - start_time)
+            b_tree_times.append(time.perf_counter() - start_time)
             b_tree_counts.append(i)
     
     # Test LSM-Tree
@@ -80,11 +128,11 @@ def benchmark_insert_throughput():
     lsm_tree_times = []
     lsm_tree_counts = []
     
-    start_time = time.time()
+    start_time = time.perf_counter()
     for i, (key, value) in enumerate(workload):
         lsm_tree.insert(key, value)
         if i % 1000 == 0:
-            lsm_tree_times.append(time.time() - start_time)
+            lsm_tree_times.append(time.perf_counter() - start_time)
             lsm_tree_counts.append(i)
     
     # Plot results
@@ -96,7 +144,7 @@ def benchmark_insert_throughput():
     plt.title('Insert Throughput: B+Tree vs LSM-Tree')
     plt.legend()
     plt.grid(True, alpha=0.3)
-    plt.savefig('../results/insert_throughput.png', dpi=300, bbox_inches='tight')
+    plt.savefig(results_path('insert_throughput.png'), dpi=300, bbox_inches='tight')
     plt.close()
 
 def benchmark_read_latency():
@@ -118,14 +166,22 @@ def benchmark_read_latency():
     # Test point queries
     test_keys = random.sample(range(data_size), 100)
     
+    # Negative lookups: keys that were never inserted
+    missing_keys = random.sample(range(data_size, 2 * data_size), 100)
+    
     b_tree_reads = []
     lsm_tree_reads = []
+    lsm_tree_missing_reads = []
     
     for key in test_keys:
         _, b_io = b_tree.search(key)
         _, lsm_io = lsm_tree.search(key)
         b_tree_reads.append(b_io)
         lsm_tree_reads.append(lsm_io)
+    for key in missing_keys:
+        lsm_tree_missing_reads.append(lsm_tree.search(key)[1])
+    print(f"   LSM-Tree: {np.mean(lsm_tree_reads):.2f} reads/hit, "
+          f"{np.mean(lsm_tree_missing_reads):.2f} reads/miss")
     
     # Plot results
     plt.figure(figsize=(10, 6))
@@ -133,16 +189,62 @@ def benchmark_read_latency():
     
     plt.plot(x_pos, b_tree_reads, label='B+Tree I/O Count', alpha=0.7)
     plt.plot(x_pos, lsm_tree_reads, label='LSM-Tree I/O Count', alpha=0.7)
+    plt.plot(x_pos, lsm_tree_missing_reads, label='LSM-Tree I/O Count (missing keys)', alpha=0.7)
     plt.xlabel('Query Number')
     plt.ylabel('I/O Operations')
     plt.title('Read Latency (I/O Count): B+Tree vs LSM-Tree')
     plt.legend()
     plt.grid(True, alpha=0.3)
-    plt.savefig('../results/read_latency.png', dpi=300, bbox_inches='tight')
+    plt.savefig(results_path('read_latency.png'), dpi=300, bbox_inches='tight')
     plt.close()
     
     return np.mean(b_tree_reads), np.mean(lsm_tree_reads)
 
+def benchmark_read_latency_buffer_pool():
+    """Measure how buffer pool size and eviction policy affect physical read I/O"""
+    print("Running Read Latency vs Buffer Pool Size Benchmark...")
+    
+    data_size = 5000
+    workload = generate_workload_random(data_size)
+    test_keys = random.choices(range(data_size), k=1000)
+    
+    lsm_tree = LSMTree(memtable_size_threshold=500)
+    for key, value in workload:
+        lsm_tree.insert(key, value)
+    lsm_tree.force_flush()
+    lsm_reads = np.mean([lsm_tree.search(key)[1] for key in test_keys])
+    
+    cache_sizes = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+    policies = ['lru', 'clock', '2q']
+    physical_reads = {policy: [] for policy in policies}
+    
+    for policy in policies:
+        for cache_pages in cache_sizes:
+            b_tree = BPlusTree(order=50, buffer_pool_pages=cache_pages, eviction_policy=policy)
+            for key, value in workload:
+                b_tree.insert(key, value)
+            reads = [b_tree.search(key)[1] for key in test_keys]
+            physical_reads[policy].append(np.mean(reads))
+        print(f"   {policy}: " + ", ".join(
+            f"{pages}p={reads:.2f}" for pages, reads in zip(cache_sizes, physical_reads[policy])))
+    
+    # Plot results
+    plt.figure(figsize=(10, 6))
+    for policy, marker in zip(policies, ['o', 's', '^']):
+        plt.plot(cache_sizes, physical_reads[policy], label=f'B+Tree ({policy.upper()})',
+                 marker=marker, linewidth=2)
+    plt.axhline(lsm_reads, color='gray', linestyle='--', label='LSM-Tree')
+    plt.xscale('log', base=2)
+    plt.xlabel('Buffer Pool Size (pages)')
+    plt.ylabel('Physical Reads per Lookup')
+    plt.title('Read Latency (Physical I/O) vs Buffer Pool Size')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.savefig(results_path('read_latency_buffer_pool.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return physical_reads
+
 def benchmark_range_queries():
     """Measure range query performance"""
     print("Running Range Query Benchmark...")
@@ -182,13 +284,1054 @@ def benchmark_range_queries():
     plt.title('Range Query Performance: B+Tree vs LSM-Tree')
     plt.legend()
     plt.grid(True, alpha=0.3)
-    plt.savefig('../results/range_queries.png', dpi=300, bbox_inches='tight')
+    plt.savefig(results_path('range_queries.png'), dpi=300, bbox_inches='tight')
     plt.close()
 
+def benchmark_lookup_cpu_time():
+    """Measure CPU time per point lookup as the B+Tree order grows"""
+    print("Running Lookup CPU Time Benchmark...")
+    
+    data_size = 20000
+    workload = generate_workload_random(data_size)
+    test_keys = random.sample(range(data_size), 2000)
+    
+    orders = [4, 16, 50, 128, 256, 512]
+    cpu_us_per_lookup = []
+    
+    for order in orders:
+        b_tree = BPlusTree(order=order)
+        for key, value in workload:
+            b_tree.insert(key, value)
+        
+        start_time = time.process_time()
+        for key in test_keys:
+            b_tree.search(key)
+        elapsed = time.process_time() - start_time
+        cpu_us_per_lookup.append(elapsed / len(test_keys) * 1e6)
+        print(f"   order={order}: {cpu_us_per_lookup[-1]:.2f} us/lookup")
+    
+    # Plot results
+    plt.figure(figsize=(10, 6))
+    plt.plot(orders, cpu_us_per_lookup, label='B+Tree', marker='o', linewidth=2)
+    plt.xscale('log', base=2)
+    plt.xlabel('Tree Order')
+    plt.ylabel('CPU Time per Lookup (microseconds)')
+    plt.title('Lookup CPU Time vs B+Tree Order')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.savefig(results_path('lookup_cpu_time.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return orders, cpu_us_per_lookup
+
+def benchmark_bulk_load():
+    """Compare bottom-up bulk loading with one insert() per key"""
+    print("Running Bulk Load Benchmark...")
+    
+    data_sizes = [1000, 5000, 10000, 50000]
+    insert_times = []
+    bulk_times = []
+    insert_writes = []
+    bulk_writes = []
+    
+    for size in data_sizes:
+        workload = generate_workload_random(size)
+        
+        b_tree = BPlusTree(order=50)
+        total_writes = 0
+        start_time = time.perf_counter()
+        for key, value in workload:
+            total_writes += b_tree.insert(key, value)
+        insert_times.append(time.perf_counter() - start_time)
+        insert_writes.append(total_writes)
+        
+        b_tree = BPlusTree(order=50)
+        start_time = time.perf_counter()
+        bulk_writes.append(b_tree.bulk_load(workload, fill_factor=0.9))
+        bulk_times.append(time.perf_counter() - start_time)
+        
+        print(f"   size={size}: insert {insert_times[-1]:.3f}s / {insert_writes[-1]} writes, "
+              f"bulk_load {bulk_times[-1]:.3f}s / {bulk_writes[-1]} writes")
+    
+    # Plot results
+    fig, (ax_time, ax_writes) = plt.subplots(1, 2, figsize=(14, 6))
+    ax_time.plot(data_sizes, insert_times, label='insert()', marker='o', linewidth=2)
+    ax_time.plot(data_sizes, bulk_times, label='bulk_load()', marker='s', linewidth=2)
+    ax_time.set_xlabel('Dataset Size')
+    ax_time.set_ylabel('Build Time (seconds)')
+    ax_time.legend()
+    ax_time.grid(True, alpha=0.3)
+    ax_writes.plot(data_sizes, insert_writes, label='insert()', marker='o', linewidth=2)
+    ax_writes.plot(data_sizes, bulk_writes, label='bulk_load()', marker='s', linewidth=2)
+    ax_writes.set_xlabel('Dataset Size')
+    ax_writes.set_ylabel('Node Writes')
+    ax_writes.legend()
+    ax_writes.grid(True, alpha=0.3)
+    fig.suptitle('B+Tree Build: Bulk Load vs Repeated Insert')
+    plt.savefig(results_path('bulk_load.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return insert_times, bulk_times
+
+def benchmark_paged_storage():
+    """Measure real page I/O of the mmap-backed B+Tree and how fast it reopens"""
+    print("Running Paged Storage Benchmark...")
+    
+    data_sizes = [1000, 5000, 10000, 50000]
+    reads_per_lookup = []
+    reopen_times = []
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in data_sizes:
+            path = os.path.join(tmp_dir, f"bptree_{size}.db")
+            workload = generate_workload_random(size)
+            
+            with PagedBPlusTree(path) as paged_tree:
+                for key, value in workload:
+                    paged_tree.insert(key, value)
+            
+            start_time = time.perf_counter()
+            paged_tree = PagedBPlusTree(path)
+            reopen_times.append(time.perf_counter() - start_time)
+            
+            test_keys = random.sample(range(size), 100)
+            page_reads = [paged_tree.search(key)[1] for key in test_keys]
+            reads_per_lookup.append(np.mean(page_reads))
+            print(f"   size={size}: {reads_per_lookup[-1]:.2f} page reads/lookup, "
+                  f"{paged_tree.num_pages} pages, reopen {reopen_times[-1] * 1000:.2f} ms")
+            paged_tree.close()
+    
+    # Plot results
+    plt.figure(figsize=(10, 6))
+    plt.plot(data_sizes, reads_per_lookup, label='Paged B+Tree', marker='o', linewidth=2)
+    plt.xlabel('Dataset Size')
+    plt.ylabel('Page Reads per Lookup')
+    plt.title('Paged B+Tree: Physical Page Reads per Point Lookup')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.savefig(results_path('paged_storage.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return reads_per_lookup, reopen_times
+
+def benchmark_memory_per_key():
+    """Measure B+Tree index bytes per key for list keys vs typed array('q') keys"""
+    print("Running Memory per Key Benchmark...")
+    
+    data_sizes = [10000, 50000, 100000]
+    configs = [('list keys', None), ("array('q') keys", 'q')]
+    bytes_per_key = {label: [] for label, _ in configs}
+    
+    for size in data_sizes:
+        workload = generate_workload_random(size)
+        for label, key_type in configs:
+            b_tree = BPlusTree(order=50, key_type=key_type)
+            b_tree.bulk_load(workload, fill_factor=0.9)
+            bytes_per_key[label].append(b_tree_index_bytes(b_tree) / size)
+        print(f"   size={size}: " + ", ".join(
+            f"{label} {values[-1]:.1f} B/key" for label, values in bytes_per_key.items()))
+    
+    # Plot results
+    plt.figure(figsize=(10, 6))
+    for (label, _), marker in zip(configs, ['o', 's']):
+        plt.plot(data_sizes, bytes_per_key[label], label=label, marker=marker, linewidth=2)
+    plt.xlabel('Dataset Size')
+    plt.ylabel('Index Bytes per Key')
+    plt.title('B+Tree Memory Overhead per Key')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.savefig(results_path('memory_per_key.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return bytes_per_key
+
+def benchmark_range_scan_cursor():
+    """Compare materialized range_query with the streaming scan cursor"""
+    print("Running Range Scan Cursor Benchmark...")
+    
+    data_size = 200000
+    b_tree = BPlusTree(order=50)
+    b_tree.bulk_load(generate_workload_sequential(data_size))
+    
+    range_sizes = [1000, 10000, 50000, 100000, 200000]
+    first_row_ms = {'range_query': [], 'scan': []}
+    peak_kib = {'range_query': [], 'scan': []}
+    
+    for range_size in range_sizes:
+        low = random.randint(0, data_size - range_size)
+        high = low + range_size - 1
+        
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        results, _ = b_tree.range_query(low, high)
+        first_row_ms['range_query'].append((time.perf_counter() - start_time) * 1000)
+        del results
+        peak_kib['range_query'].append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+        
+        tracemalloc.start()
+        start_time = time.perf_counter()
+        cursor = b_tree.scan(low, high)
+        next(cursor)
+        first_row_ms['scan'].append((time.perf_counter() - start_time) * 1000)
+        for _ in cursor:
+            pass
+        peak_kib['scan'].append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+        
+        print(f"   range={range_size}: first row {first_row_ms['range_query'][-1]:.3f} ms vs "
+              f"{first_row_ms['scan'][-1]:.3f} ms, peak {peak_kib['range_query'][-1]:.0f} KiB vs "
+              f"{peak_kib['scan'][-1]:.0f} KiB")
+    
+    # Plot results
+    fig, (ax_time, ax_mem) = plt.subplots(1, 2, figsize=(14, 6))
+    for label, marker in [('range_query', 'o'), ('scan', 's')]:
+        ax_time.plot(range_sizes, first_row_ms[label], label=label, marker=marker, linewidth=2)
+        ax_mem.plot(range_sizes, peak_kib[label], label=label, marker=marker, linewidth=2)
+    ax_time.set_xlabel('Range Size')
+    ax_time.set_ylabel('Time to First Row (ms)')
+    ax_time.legend()
+    ax_time.grid(True, alpha=0.3)
+    ax_mem.set_xlabel('Range Size')
+    ax_mem.set_ylabel('Peak Allocation (KiB)')
+    ax_mem.legend()
+    ax_mem.grid(True, alpha=0.3)
+    fig.suptitle('B+Tree Range Scan: Materialized vs Streaming Cursor')
+    plt.savefig(results_path('range_scan_cursor.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return first_row_ms, peak_kib
+
+def benchmark_batched_operations():
+    """Compare per-key search/insert with search_many/insert_many"""
+    print("Running Batched Operations Benchmark...")
+    
+    data_size = 50000
+    workload = generate_workload_random(data_size)
+    b_tree = BPlusTree(order=50)
+    b_tree.bulk_load(workload)
+    
+    batch_sizes = [10, 100, 1000, 10000]
+    single_reads = []
+    batch_reads = []
+    single_writes = []
+    batch_writes = []
+    
+    for batch_size in batch_sizes:
+        test_keys = random.sample(range(data_size), batch_size)
+        single_reads.append(sum(b_tree.search(key)[1] for key in test_keys))
+        batch_reads.append(b_tree.search_many(test_keys)[1])
+        
+        new_pairs = [(data_size + key, f"value_{key}") for key in test_keys]
+        single_tree = BPlusTree(order=50)
+        single_tree.bulk_load(workload)
+        single_writes.append(sum(single_tree.insert(key, value) for key, value in new_pairs))
+        batch_tree = BPlusTree(order=50)
+        batch_tree.bulk_load(workload)
+        batch_writes.append(batch_tree.insert_many(new_pairs))
+        
+        print(f"   batch={batch_size}: reads {single_reads[-1]} vs {batch_reads[-1]}, "
+              f"writes {single_writes[-1]} vs {batch_writes[-1]}")
+    
+    # Plot results
+    fig, (ax_reads, ax_writes) = plt.subplots(1, 2, figsize=(14, 6))
+    ax_reads.plot(batch_sizes, single_reads, label='search() per key', marker='o', linewidth=2)
+    ax_reads.plot(batch_sizes, batch_reads, label='search_many()', marker='s', linewidth=2)
+    ax_reads.set_xscale('log')
+    ax_reads.set_yscale('log')
+    ax_reads.set_xlabel('Batch Size')
+    ax_reads.set_ylabel('Node Reads per Batch')
+    ax_reads.legend()
+    ax_reads.grid(True, alpha=0.3)
+    ax_writes.plot(batch_sizes, single_writes, label='insert() per key', marker='o', linewidth=2)
+    ax_writes.plot(batch_sizes, batch_writes, label='insert_many()', marker='s', linewidth=2)
+    ax_writes.set_xscale('log')
+    ax_writes.set_yscale('log')
+    ax_writes.set_xlabel('Batch Size')
+    ax_writes.set_ylabel('Node Writes per Batch')
+    ax_writes.legend()
+    ax_writes.grid(True, alpha=0.3)
+    fig.suptitle('B+Tree Batched Operations: I/O per Batch')
+    plt.savefig(results_path('batched_operations.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return batch_reads, batch_writes
+
+def benchmark_concurrent_throughput():
+    """Measure mixed read/write throughput against thread count"""
+    print("Running Concurrent Throughput Benchmark...")
+    gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f"   GIL enabled: {gil_enabled}")
+    
+    data_size = 50000
+    ops_per_thread = 5000
+    write_ratio = 0.1
+    thread_counts = [1, 2, 4, 8]
+    throughput = {'Global lock': [], 'Latch crabbing': []}
+    
+    def run(tree, num_threads, guard):
+        def worker(seed):
+            rng = random.Random(seed)
+            for i in range(ops_per_thread):
+                if rng.random() < write_ratio:
+                    key = data_size + seed * ops_per_thread + i
+                    with guard:
+                        tree.insert(key, f"value_{key}")
+                else:
+                    with guard:
+                        tree.search(rng.randrange(data_size))
+        
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(num_threads)]
+        start_time = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return num_threads * ops_per_thread / (time.perf_counter() - start_time)
+    
+    workload = generate_workload_random(data_size)
+    for num_threads in thread_counts:
+        b_tree = BPlusTree(order=50)
+        b_tree.bulk_load(workload)
+        throughput['Global lock'].append(run(b_tree, num_threads, threading.Lock()))
+        
+        concurrent_tree = ConcurrentBPlusTree(order=50)
+        concurrent_tree.bulk_load(workload)
+        # Latching happens inside the tree, so the guard is a no-op
+        throughput['Latch crabbing'].append(run(concurrent_tree, num_threads, contextlib.nullcontext()))
+        
+        print(f"   threads={num_threads}: " + ", ".join(
+            f"{label} {values[-1]:.0f} ops/s" for label, values in throughput.items()))
+    
+    # Plot results
+    plt.figure(figsize=(10, 6))
+    for (label, values), marker in zip(throughput.items(), ['o', 's']):
+        plt.plot(thread_counts, values, label=label, marker=marker, linewidth=2)
+    plt.xlabel('Threads')
+    plt.ylabel('Throughput (ops/second)')
+    plt.title(f'B+Tree Concurrent Throughput, {int(write_ratio * 100)}% writes '
+              f'(GIL {"enabled" if gil_enabled else "disabled"})')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.savefig(results_path('concurrent_throughput.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return throughput
+
+def benchmark_order_statistics():
+    """Compare count_range/select with counting by scanning"""
+    print("Running Order Statistics Benchmark...")
+    
+    data_size = 200000
+    b_tree = BPlusTree(order=50, order_statistics=True)
+    b_tree.bulk_load(generate_workload_sequential(data_size))
+    
+    range_sizes = [100, 1000, 10000, 100000]
+    scan_reads = []
+    count_reads = []
+    scan_ms = []
+    count_ms = []
+    
+    for range_size in range_sizes:
+        low = random.randint(0, data_size - range_size)
+        high = low + range_size - 1
+        
+        start_time = time.perf_counter()
+        results, reads = b_tree.range_query(low, high)
+        scan_ms.append((time.perf_counter() - start_time) * 1000)
+        scan_reads.append(reads)
+        
+        start_time = time.perf_counter()
+        count, reads = b_tree.count_range(low, high)
+        count_ms.append((time.perf_counter() - start_time) * 1000)
+        count_reads.append(reads)
+        assert count == len(results)
+        
+        print(f"   range={range_size}: len(range_query) {scan_reads[-1]} reads / {scan_ms[-1]:.3f} ms, "
+              f"count_range {count_reads[-1]} reads / {count_ms[-1]:.3f} ms")
+    
+    # Pagination: fetch the k-th key directly instead of skipping k rows
+    k = data_size // 2
+    start_time = time.perf_counter()
+    (kth_key, _), select_reads = b_tree.select(k)
+    select_ms = (time.perf_counter() - start_time) * 1000
+    print(f"   select({k}) = {kth_key}: {select_reads} reads / {select_ms:.3f} ms")
+    
+    # Plot results
+    plt.figure(figsize=(10, 6))
+    plt.plot(range_sizes, scan_reads, label='len(range_query())', marker='o', linewidth=2)
+    plt.plot(range_sizes, count_reads, label='count_range()', marker='s', linewidth=2)
+    plt.xscale('log')
+    plt.yscale('log')
+    plt.xlabel('Range Size')
+    plt.ylabel('I/O Operations')
+    plt.title('Range Count: Subtree Counts vs Scanning')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.savefig(results_path('order_statistics.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return scan_reads, count_reads
+
+def benchmark_string_key_compression():
+    """Measure how suffix truncation and prefix compression raise fan-out for string keys"""
+    print("Running String Key Compression Benchmark...")
+    
+    data_sizes = [10000, 50000, 100000]
+    page_size = 1024
+    configs = [
+        ('Full keys', dict(suffix_truncation=False)),
+        ('Suffix truncation', dict(suffix_truncation=True)),
+        ('Truncation + prefix compression', dict(suffix_truncation=True, prefix_compression=True)),
+    ]
+    reads_per_lookup = {label: [] for label, _ in configs}
+    
+    for size in data_sizes:
+        workload = generate_workload_strings(size)
+        test_keys = [key for key, _ in random.sample(workload, 500)]
+        for label, options in configs:
+            # A large order leaves the page size as the real capacity limit
+            b_tree = BPlusTree(order=100000, page_size=page_size, **options)
+            for key, value in workload:
+                b_tree.insert(key, value)
+            reads_per_lookup[label].append(np.mean([b_tree.search(key)[1] for key in test_keys]))
+            leaves, internal = b_tree_node_counts(b_tree)
+            print(f"   size={size} {label}: height {b_tree_height(b_tree)}, {leaves} leaves, "
+                  f"{internal} internal nodes, {reads_per_lookup[label][-1]:.2f} reads/lookup")
+    
+    # Plot results
+    plt.figure(figsize=(10, 6))
+    for (label, _), marker in zip(configs, ['o', 's', '^']):
+        plt.plot(data_sizes, reads_per_lookup[label], label=label, marker=marker, linewidth=2)
+    plt.xlabel('Dataset Size')
+    plt.ylabel('I/O Operations per Lookup')
+    plt.title(f'String Keys: Read I/O with {page_size}-byte Pages')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.savefig(results_path('string_key_compression.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return reads_per_lookup
+
+def benchmark_bloom_filters():
+    """Measure how Bloom filter bits per key affect LSM-Tree lookup I/O"""
+    print("Running LSM-Tree Bloom Filter Benchmark...")
+    
+    data_size = 20000
+    workload = generate_workload_random(data_size)
+    present_keys = random.sample(range(data_size), 1000)
+    missing_keys = random.sample(range(data_size, 2 * data_size), 1000)
+    
+    bits_per_key = [0, 2, 4, 6, 8, 10, 12, 16]
+    hit_reads = []
+    miss_reads = []
+    false_positive_rates = []
+    
+    for bits in bits_per_key:
+        lsm_tree = LSMTree(memtable_size_threshold=500, bloom_bits_per_key=bits)
+        for key, value in workload:
+            lsm_tree.insert(key, value)
+        lsm_tree.force_flush()
+        
+        hit_reads.append(np.mean([lsm_tree.search(key)[1] for key in present_keys]))
+        lsm_tree.bloom_negatives = lsm_tree.bloom_false_positives = 0
+        miss_reads.append(np.mean([lsm_tree.search(key)[1] for key in missing_keys]))
+        false_positive_rates.append(lsm_tree.bloom_false_positive_rate() if bits else 1.0)
+        print(f"   {bits:2d} bits/key: {hit_reads[-1]:.2f} reads/hit, {miss_reads[-1]:.2f} reads/miss, "
+              f"false positive rate {false_positive_rates[-1]:.4f} ({len(lsm_tree.sstables)} SSTables)")
+    
+    # Plot results
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+    
+    ax1.plot(bits_per_key, hit_reads, label='Present keys', marker='o', linewidth=2)
+    ax1.plot(bits_per_key, miss_reads, label='Missing keys', marker='s', linewidth=2)
+    ax1.set_xlabel('Bloom Filter Bits per Key (0 = no filter)')
+    ax1.set_ylabel('SSTable Reads per Lookup')
+    ax1.set_title('LSM-Tree Lookup I/O vs Bloom Filter Size')
+    ax1.legend()
+    ax1.grid(True, alpha=0.3)
+    
+    ax2.plot(bits_per_key[1:], false_positive_rates[1:], marker='o', linewidth=2)
+    ax2.set_yscale('log')
+    ax2.set_xlabel('Bloom Filter Bits per Key')
+    ax2.set_ylabel('False Positive Rate')
+    ax2.set_title('Measured Bloom Filter False Positive Rate')
+    ax2.grid(True, alpha=0.3)
+    
+    plt.tight_layout()
+    plt.savefig(results_path('bloom_filters.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return bits_per_key, hit_reads, miss_reads
+
+def benchmark_sstable_files():
+    """Measure block reads per lookup and file size of file-backed LSM-Tree SSTables"""
+    print("Running SSTable File Format Benchmark...")
+    
+    data_size = 50000
+    workload = generate_workload_random(data_size)
+    test_keys = random.choices(range(data_size), k=2000)
+    
+    cache_sizes = [0, 16, 64, 256, 1024]
+    compressions = [None, 'zlib']
+    block_reads = {compression: [] for compression in compressions}
+    file_bytes = {}
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for compression in compressions:
+            for cache_blocks in cache_sizes:
+                directory = os.path.join(tmp_dir, f"lsm_{compression}_{cache_blocks}")
+                lsm_tree = LSMTree(memtable_size_threshold=5000, directory=directory,
+                                   block_cache_blocks=cache_blocks or None, compression=compression)
+                for key, value in workload:
+                    lsm_tree.insert(key, value)
+                lsm_tree.force_flush()
+                
+                block_reads[compression].append(np.mean([lsm_tree.search(key)[1] for key in test_keys]))
+                file_bytes[compression] = sum(sstable.size_bytes() for sstable in lsm_tree.sstables)
+                lsm_tree.close()
+            print(f"   compression={compression}: {file_bytes[compression] / 1024:.0f} KiB on disk, "
+                  + ", ".join(f"{blocks} cached={reads:.2f}"
+                              for blocks, reads in zip(cache_sizes, block_reads[compression]))
+                  + " block reads/lookup")
+    
+    # Plot results
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+    
+    for compression, marker in zip(compressions, ['o', 's']):
+        ax1.plot([max(blocks, 1) for blocks in cache_sizes], block_reads[compression],
+                 label=f'compression={compression}', marker=marker, linewidth=2)
+    ax1.set_xscale('log', base=2)
+    ax1.set_xlabel('Block Cache Size (blocks, 1 = no cache)')
+    ax1.set_ylabel('Data Block Reads per Lookup')
+    ax1.set_title('LSM-Tree Block Reads vs Block Cache Size')
+    ax1.legend()
+    ax1.grid(True, alpha=0.3)
+    
+    labels = [str(compression) for compression in compressions]
+    ax2.bar(labels, [file_bytes[compression] / 1024 for compression in compressions], alpha=0.8)
+    ax2.set_xlabel('Block Compression')
+    ax2.set_ylabel('SSTable Bytes on Disk (KiB)')
+    ax2.set_title(f'SSTable File Size ({data_size} keys)')
+    ax2.grid(True, alpha=0.3)
+    
+    plt.tight_layout()
+    plt.savefig(results_path('sstable_files.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return block_reads, file_bytes
+
+def benchmark_compaction_strategies():
+    """Compare write, read and space amplification of LSM-Tree compaction strategies"""
+    print("Running LSM-Tree Compaction Strategy Benchmark...")
+    
+    data_size = 20000
+    # Ingest with overwrites: every key is written three times on average
+    workload = [(random.randrange(data_size), f"value_{i}") for i in range(3 * data_size)]
+    strategies = ['simple', 'tiered', 'leveled', 'lazy_leveling']
+    amplification = {'Write': [], 'Read': [], 'Space': []}
+    
+    for strategy in strategies:
+        lsm_tree = LSMTree(memtable_size_threshold=500, compaction=strategy)
+        for key, value in workload:
+            lsm_tree.insert(key, value)
+        
+        amplification['Write'].append(lsm_tree.write_amplification())
+        amplification['Read'].append(lsm_tree.read_amplification())
+        amplification['Space'].append(lsm_tree.space_amplification())
+        print(f"   {strategy}: write amp {amplification['Write'][-1]:.2f}, "
+              f"read amp {amplification['Read'][-1]} runs, space amp {amplification['Space'][-1]:.2f}, "
+              f"level sizes {lsm_tree.level_sizes()}")
+    
+    # Plot results
+    fig, axes = plt.subplots(1, 3, figsize=(18, 6))
+    for ax, (name, values) in zip(axes, amplification.items()):
+        ax.bar(strategies, values, alpha=0.8)
+        ax.set_xlabel('Compaction Strategy')
+        ax.set_ylabel(f'{name} Amplification')
+        ax.set_title(f'{name} Amplification')
+        ax.grid(True, alpha=0.3)
+    
+    fig.suptitle(f'LSM-Tree Compaction Strategies ({len(workload)} writes over {data_size} keys)')
+    plt.tight_layout()
+    plt.savefig(results_path('compaction_strategies.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return amplification
+
+def benchmark_lsm_range_scan():
+    """Measure LSM-Tree merged scan latency against result size"""
+    print("Running LSM-Tree Merged Range Scan Benchmark...")
+    
+    data_size = 50000
+    workload = generate_workload_random(data_size)
+    result_sizes = [10, 100, 1000, 10000]
+    num_queries = 20
+    strategies = ['simple', 'tiered', 'leveled']
+    scan_times = {strategy: [] for strategy in strategies}
+    
+    for strategy in strategies:
+        lsm_tree = LSMTree(memtable_size_threshold=2000, compaction=strategy)
+        for key, value in workload:
+            lsm_tree.insert(key, value)
+        
+        for result_size in result_sizes:
+            lows = [random.randrange(data_size - result_size) for _ in range(num_queries)]
+            start_time = time.perf_counter()
+            for low in lows:
+                results = list(lsm_tree.scan(low, limit=result_size))
+            scan_times[strategy].append((time.perf_counter() - start_time) / num_queries * 1000)
+            assert len(results) == result_size
+        print(f"   {strategy} ({len(lsm_tree.sstables)} SSTables): " + ", ".join(
+            f"{size} rows={ms:.3f} ms" for size, ms in zip(result_sizes, scan_times[strategy])))
+    
+    # Plot results
+    plt.figure(figsize=(10, 6))
+    for strategy, marker in zip(strategies, ['o', 's', '^']):
+        plt.plot(result_sizes, scan_times[strategy], label=f'LSM-Tree ({strategy})', marker=marker, linewidth=2)
+    plt.xscale('log')
+    plt.yscale('log')
+    plt.xlabel('Rows Returned (scan limit)')
+    plt.ylabel('Time per Scan (ms)')
+    plt.title('LSM-Tree K-Way Merge Scan Latency vs Result Size')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.savefig(results_path('lsm_range_scan.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return scan_times
+
+def benchmark_memtable_flush():
+    """Compare entry-count and byte-size memtable flush triggers with variable-size values"""
+    print("Running LSM-Tree Memtable Flush Benchmark...")
+    
+    data_size = 50000
+    # Phases of 10-byte and 2 KB values, so a fixed entry count holds very different amounts of memory
+    workload = [(key, "x" * (10 if (i // 5000) % 2 == 0 else 2000))
+                for i, key in enumerate(random.sample(range(data_size), data_size))]
+    configs = [('1000 entries', dict(memtable_size_threshold=1000, compaction='tiered')),
+               ('512 KiB', dict(memtable_size_threshold=None, memtable_bytes_threshold=512 * 1024,
+                                compaction='tiered'))]
+    flush_bytes = {}
+    flush_times = {}
+    
+    for label, options in configs:
+        lsm_tree = LSMTree(**options)
+        flush_bytes[label] = []
+        flush_times[label] = []
+        for key, value in workload:
+            memtable_bytes = lsm_tree.memtable.size_bytes
+            flushes = lsm_tree.num_flushes
+            start_time = time.perf_counter()
+            lsm_tree.insert(key, value)
+            if lsm_tree.num_flushes > flushes:
+                flush_times[label].append((time.perf_counter() - start_time) * 1000)
+                flush_bytes[label].append(memtable_bytes / 1024)
+        print(f"   {label}: {len(flush_bytes[label])} flushes, memtable at flush "
+              f"{np.mean(flush_bytes[label]):.0f} +/- {np.std(flush_bytes[label]):.0f} KiB, "
+              f"{np.mean(flush_times[label]):.2f} ms per flush")
+    
+    # Plot results
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+    for label, _ in configs:
+        ax1.hist(flush_bytes[label], bins=30, alpha=0.6, label=f'Flush at {label}')
+        ax2.plot(flush_times[label], label=f'Flush at {label}', alpha=0.7)
+    ax1.set_xlabel('Memtable Size at Flush (KiB)')
+    ax1.set_ylabel('Flushes')
+    ax1.set_title('Memtable Memory at Flush Time')
+    ax1.legend()
+    ax1.grid(True, alpha=0.3)
+    ax2.set_xlabel('Flush Number')
+    ax2.set_ylabel('Insert Latency Including Flush (ms)')
+    ax2.set_title('Flush Cost (linear dump of the sorted memtable)')
+    ax2.legend()
+    ax2.grid(True, alpha=0.3)
+    
+    plt.tight_layout()
+    plt.savefig(results_path('memtable_flush.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return flush_bytes, flush_times
+
+def benchmark_background_compaction():
+    """Compare per-insert latency of inline and background LSM-Tree flush/compaction"""
+    print("Running LSM-Tree Background Compaction Benchmark...")
+    
+    data_size = 100000
+    workload = generate_workload_random(data_size)
+    configs = [('Inline flush/compaction', False), ('Background threads', True)]
+    latencies = {}
+    
+    for label, background in configs:
+        lsm_tree = LSMTree(memtable_size_threshold=2000, compaction='leveled', background=background)
+        samples = []
+        start_time = time.perf_counter()
+        for key, value in workload:
+            op_start = time.perf_counter_ns()
+            lsm_tree.insert(key, value)
+            samples.append(time.perf_counter_ns() - op_start)
+        lsm_tree.force_flush()
+        elapsed = time.perf_counter() - start_time
+        lsm_tree.close()
+        
+        latencies[label] = np.array(samples) / 1000.0  # microseconds
+        p50, p99, p999 = np.percentile(latencies[label], [50, 99, 99.9])
+        print(f"   {label}: {data_size / elapsed:.0f} inserts/s, p50 {p50:.1f} us, p99 {p99:.1f} us, "
+              f"p99.9 {p999:.1f} us, max {latencies[label].max() / 1000:.1f} ms, "
+              f"{lsm_tree.num_write_stalls} stalls")
+    
+    # Plot results
+    plt.figure(figsize=(10, 6))
+    percentiles = [50, 90, 99, 99.9, 99.99]
+    for (label, _), marker in zip(configs, ['o', 's']):
+        plt.plot([str(p) for p in percentiles], np.percentile(latencies[label], percentiles),
+                 label=label, marker=marker, linewidth=2)
+    plt.yscale('log')
+    plt.xlabel('Percentile')
+    plt.ylabel('Insert Latency (us)')
+    plt.title('LSM-Tree Insert Latency: Inline vs Background Flush/Compaction')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.savefig(results_path('background_compaction.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return latencies
+
+def benchmark_wal_sync_modes():
+    """Measure LSM-Tree insert throughput for each write-ahead log sync mode"""
+    print("Running LSM-Tree Write-Ahead Log Benchmark...")
+    
+    data_size = 5000
+    batch_size = 100
+    workload = generate_workload_random(data_size)
+    configs = [('No WAL', dict(), False),
+               ('WAL, sync=none', dict(wal_sync='none'), False),
+               ('WAL, sync=batch (per insert)', dict(wal_sync='batch'), False),
+               (f'WAL, sync=batch ({batch_size}/batch)', dict(wal_sync='batch'), True),
+               ('WAL, sync=group (5 ms)', dict(wal_sync='group', wal_group_commit_interval=0.005), False)]
+    throughput = []
+    
+    b_tree = BPlusTree(order=50)
+    start_time = time.perf_counter()
+    for key, value in workload:
+        b_tree.insert(key, value)
+    b_tree_throughput = data_size / (time.perf_counter() - start_time)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for i, (label, options, batched) in enumerate(configs):
+            lsm_tree = LSMTree(memtable_size_threshold=1000, directory=os.path.join(tmp_dir, str(i)), **options)
+            start_time = time.perf_counter()
+            if batched:
+                for j in range(0, data_size, batch_size):
+                    lsm_tree.insert_many(workload[j:j + batch_size])
+            else:
+                for key, value in workload:
+                    lsm_tree.insert(key, value)
+            throughput.append(data_size / (time.perf_counter() - start_time))
+            syncs = lsm_tree.wal.num_syncs if lsm_tree.wal is not None else 0
+            lsm_tree.close()
+            print(f"   {label}: {throughput[-1]:.0f} inserts/s, {syncs} fsyncs")
+    print(f"   B+Tree (in memory): {b_tree_throughput:.0f} inserts/s")
+    
+    # Plot results
+    plt.figure(figsize=(12, 6))
+    plt.barh([label for label, _, _ in configs], throughput, alpha=0.8)
+    plt.axvline(b_tree_throughput, color='gray', linestyle='--', label='B+Tree (in memory)')
+    plt.xscale('log')
+    plt.xlabel('Inserts per Second')
+    plt.title('LSM-Tree Insert Throughput by WAL Sync Mode')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.savefig(results_path('wal_sync_modes.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return throughput
+
+def benchmark_deletes():
+    """Track space amplification of each engine through a workload with deletes"""
+    print("Running Delete and Space Amplification Benchmark...")
+    
+    data_size = 20000
+    workload = generate_workload_random(data_size)
+    point_deletes = random.sample(range(data_size), data_size // 2)
+    range_high = data_size // 4 - 1
+    churn = [(data_size + i, f"value_{i}") for i in range(data_size)]
+    phases = ['Loaded', '50% point deletes', f'Range delete [0, {range_high}]', 'New inserts']
+    engines = {
+        'B+Tree': BPlusTree(order=50),
+        'LSM-Tree (leveled)': LSMTree(memtable_size_threshold=500, compaction='leveled'),
+        'LSM-Tree (tiered)': LSMTree(memtable_size_threshold=500, compaction='tiered'),
+    }
+    space_amplification = {name: [] for name in engines}
+    
+    for name, engine in engines.items():
+        for key, value in workload:
+            engine.insert(key, value)
+        space_amplification[name].append(engine.space_amplification())
+        
+        for key in point_deletes:
+            engine.delete(key)
+        space_amplification[name].append(engine.space_amplification())
+        
+        if isinstance(engine, LSMTree):
+            # One range tombstone, whatever the number of keys covered
+            engine.delete_range(0, range_high)
+            range_writes = 1
+        else:
+            range_keys = [key for key, _ in engine.scan(0, range_high)]
+            range_writes = sum(engine.delete(key) for key in range_keys)
+        space_amplification[name].append(engine.space_amplification())
+        
+        # Later compactions carry the tombstones down and drop them at the bottom
+        for key, value in churn:
+            engine.insert(key, value)
+        space_amplification[name].append(engine.space_amplification())
+        print(f"   {name}: space amp " + ", ".join(f"{phase} {amp:.2f}" for phase, amp
+                                                 in zip(phases, space_amplification[name]))
+              + f"; range delete cost {range_writes} writes")
+    
+    # Plot results
+    plt.figure(figsize=(12, 6))
+    x = np.arange(len(phases))
+    width = 0.8 / len(engines)
+    for i, name in enumerate(engines):
+        plt.bar(x + i * width, space_amplification[name], width, label=name, alpha=0.8)
+    plt.xticks(x + width * (len(engines) - 1) / 2, phases)
+    plt.ylabel('Space Amplification')
+    plt.title(f'Space Amplification with Deletes ({data_size} keys)')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.savefig(results_path('deletes.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return space_amplification
+
+def benchmark_fractal_tree():
+    """Compare B+Tree, LSM-Tree and fractal tree on writes, point reads and range reads"""
+    print("Running B+Tree vs LSM-Tree vs Fractal Tree Benchmark...")
+    
+    data_size = 20000
+    # Entries per page, used to express LSM-Tree entry writes as page writes
+    page_entries = 50
+    range_size = 100
+    workload = generate_workload_random(data_size)
+    test_keys = random.sample(range(data_size), 500)
+    range_lows = [random.randrange(data_size - range_size) for _ in range(100)]
+    engines = {
+        'B+Tree': BPlusTree(order=page_entries),
+        'LSM-Tree': LSMTree(memtable_size_threshold=500, compaction='leveled'),
+        'Fractal Tree': FractalTree(order=16, buffer_size=128, leaf_size=page_entries),
+    }
+    metrics = {'Inserts per Second': [], 'Page Writes per Insert': [],
+               'Reads per Lookup': [], f'Reads per {range_size}-Key Range': []}
+    
+    for name, engine in engines.items():
+        writes = 0
+        start_time = time.perf_counter()
+        for key, value in workload:
+            writes += engine.insert(key, value) or 0
+        elapsed = time.perf_counter() - start_time
+        if isinstance(engine, LSMTree):
+            writes = sum(engine.level_writes) / page_entries
+        
+        metrics['Inserts per Second'].append(data_size / elapsed)
+        metrics['Page Writes per Insert'].append(writes / data_size)
+        metrics['Reads per Lookup'].append(np.mean([engine.search(key)[1] for key in test_keys]))
+        metrics[f'Reads per {range_size}-Key Range'].append(
+            np.mean([engine.range_query(low, low + range_size - 1)[1] for low in range_lows]))
+        print(f"   {name}: " + ", ".join(f"{metric.lower()} {values[-1]:.2f}"
+                                         for metric, values in metrics.items()))
+    
+    # Plot results
+    fig, axes = plt.subplots(1, len(metrics), figsize=(20, 5))
+    for ax, (metric, values) in zip(axes, metrics.items()):
+        ax.bar(list(engines), values, alpha=0.8)
+        ax.set_ylabel(metric)
+        ax.set_title(metric)
+        ax.grid(True, alpha=0.3)
+    
+    fig.suptitle(f'B+Tree vs LSM-Tree vs Fractal Tree ({data_size} random inserts)')
+    plt.tight_layout()
+    plt.savefig(results_path('fractal_tree.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return metrics
+
+def benchmark_columnar_sstables():
+    """Compare tuple-list and NumPy columnar SSTables on memory, compaction and batch lookups"""
+    print("Running Columnar SSTable Benchmark...")
+    
+    data_size = 100000
+    batch_size = 1000
+    workload = generate_workload_random(data_size)
+    test_keys = random.choices(range(2 * data_size), k=20000)
+    layouts = [('Tuple list', False), ('NumPy columns', True)]
+    metrics = {'Index Bytes per Entry': [], 'Inserts per Second': [],
+               'Lookups per Second (search)': [], f'Lookups per Second (search_many, {batch_size}/batch)': []}
+    
+    for label, columnar in layouts:
+        lsm_tree = LSMTree(memtable_size_threshold=5000, compaction='leveled', columnar=columnar)
+        start_time = time.perf_counter()
+        for key, value in workload:
+            lsm_tree.insert(key, value)
+        lsm_tree.force_flush()
+        metrics['Inserts per Second'].append(data_size / (time.perf_counter() - start_time))
+        metrics['Index Bytes per Entry'].append(
+            sstable_index_bytes(lsm_tree) / sum(len(run) for run in lsm_tree.sstables))
+        
+        start_time = time.perf_counter()
+        expected = [lsm_tree.search(key)[0] for key in test_keys]
+        metrics['Lookups per Second (search)'].append(len(test_keys) / (time.perf_counter() - start_time))
+        
+        start_time = time.perf_counter()
+        found = []
+        for i in range(0, len(test_keys), batch_size):
+            found.extend(lsm_tree.search_many(test_keys[i:i + batch_size])[0])
+        metrics[f'Lookups per Second (search_many, {batch_size}/batch)'].append(
+            len(test_keys) / (time.perf_counter() - start_time))
+        assert found == expected
+        print(f"   {label}: " + ", ".join(f"{metric.lower()} {values[-1]:.1f}"
+                                          for metric, values in metrics.items()))
+    
+    # Plot results
+    fig, axes = plt.subplots(1, len(metrics), figsize=(20, 5))
+    for ax, (metric, values) in zip(axes, metrics.items()):
+        ax.bar([label for label, _ in layouts], values, alpha=0.8)
+        ax.set_ylabel(metric)
+        ax.set_title(metric)
+        ax.grid(True, alpha=0.3)
+    
+    fig.suptitle(f'LSM-Tree SSTable Layout ({data_size} integer keys)')
+    plt.tight_layout()
+    plt.savefig(results_path('columnar_sstables.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return metrics
+
+def benchmark_operation_latency():
+    """Measure wall-clock latency percentiles of inserts, lookups and range queries"""
+    print("Running Operation Latency Benchmark...")
+    
+    data_size = 20000
+    workload = generate_workload_random(data_size)
+    test_keys = random.sample(range(data_size), 2000)
+    engines = [
+        ('B+Tree', BPlusTree(order=50)),
+        ('LSM-Tree', LSMTree(memtable_size_threshold=1000)),
+        ('Fractal Tree', FractalTree(order=16, buffer_size=128, leaf_size=50)),
+    ]
+    percentiles = [f'p{percentile:g}' for percentile in PERCENTILES] + ['max']
+    latencies = {}
+    
+    for label, tree in engines:
+        recorder = LatencyRecorder()
+        for key, value in workload:
+            recorder.time('insert', tree.insert, key, value)
+        for key in test_keys:
+            recorder.time('lookup', tree.search, key)
+        for key in test_keys[:200]:
+            recorder.time('range', tree.range_query, key, key + 100)
+        latencies[label] = recorder.summary()
+        for operation, summary in latencies[label].items():
+            print(f"   {label} {operation}: {format_summary(summary)}")
+    
+    # Plot results
+    operations = ['insert', 'lookup', 'range']
+    fig, axes = plt.subplots(1, len(operations), figsize=(18, 5))
+    for ax, operation in zip(axes, operations):
+        for label, _ in engines:
+            ax.plot(percentiles, [latencies[label][operation][name] / 1000 for name in percentiles],
+                    label=label, marker='o', linewidth=2)
+        ax.set_yscale('log')
+        ax.set_xlabel('Percentile')
+        ax.set_ylabel('Latency (us)')
+        ax.set_title(f'{operation.title()} Latency')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+    
+    fig.suptitle(f'Operation Latency Percentiles ({data_size} random inserts)')
+    plt.tight_layout()
+    plt.savefig(results_path('operation_latency.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return latencies
+
+def benchmark_memory_footprint():
+    """Measure resident bytes per key by component and peak allocations of splits, flushes and compactions"""
+    print("Running Memory Footprint Benchmark...")
+    
+    data_size = 50000
+    workload = generate_workload_random(data_size)
+    engines = [
+        ('B+Tree', lambda: BPlusTree(order=50)),
+        ('LSM-Tree', lambda: LSMTree(memtable_size_threshold=1000)),
+        ('Fractal Tree', lambda: FractalTree(order=16, buffer_size=128, leaf_size=50)),
+    ]
+    profiles = {}
+    
+    for label, create in engines:
+        profiles[label] = profile_memory(create, workload, num_samples=5)
+        last = profiles[label]['samples'][-1]
+        print(f"   {label}: {last['bytes_per_key']:.1f} B/key (" + ", ".join(
+            f"{category} {last[f'{category}_bytes_per_key']:.1f}" for category in CATEGORIES) + ")")
+        for method, peak in profiles[label]['peaks'].items():
+            print(f"      {method}: peak {peak['max_bytes'] / 1024:.1f} KiB over {peak['calls']} calls")
+    
+    # Plot results
+    fig, axes = plt.subplots(1, len(engines) + 1, figsize=(24, 5))
+    for ax, (label, _) in zip(axes, engines):
+        samples = profiles[label]['samples']
+        sizes = [sample['keys'] for sample in samples]
+        ax.stackplot(sizes, [[sample[f'{category}_bytes_per_key'] for sample in samples] for category in CATEGORIES],
+                     labels=CATEGORIES, alpha=0.8)
+        ax.set_xlabel('Keys Inserted')
+        ax.set_ylabel('Bytes per Key')
+        ax.set_title(f'{label} Memory per Key')
+        ax.set_ylim(0, max(sample['bytes_per_key'] for sample in samples) * 1.25)
+        ax.legend(loc='upper center', ncol=len(CATEGORIES), fontsize=8)
+        ax.grid(True, alpha=0.3)
+    
+    ax = axes[-1]
+    methods = [(label, method, peak['max_bytes'] / 1024) for label, _ in engines
+               for method, peak in profiles[label]['peaks'].items()]
+    ax.barh([f'{label} {method}' for label, method, _ in methods], [kib for _, _, kib in methods], alpha=0.8)
+    ax.set_xscale('log')
+    ax.set_xlabel('Peak Allocation (KiB)')
+    ax.set_title('Peak Allocation per Call')
+    ax.grid(True, alpha=0.3)
+    
+    plt.tight_layout()
+    plt.savefig(results_path('memory_footprint.png'), dpi=300, bbox_inches='tight')
+    plt.close()
+    
+    return profiles
+
 if __name__ == "__main__":
     # Run all benchmarks
     benchmark_write_amplification()
     benchmark_insert_throughput()
     benchmark_read_latency()
+    benchmark_read_latency_buffer_pool()
     benchmark_range_queries()
-    print("All benchmarks completed! Check the /results folder for graphs.")
+    benchmark_lookup_cpu_time()
+    benchmark_bulk_load()
+    benchmark_paged_storage()
+    benchmark_memory_per_key()
+    benchmark_range_scan_cursor()
+    benchmark_batched_operations()
+    benchmark_concurrent_throughput()
+    benchmark_order_statistics()
+    benchmark_string_key_compression()
+    benchmark_bloom_filters()
+    benchmark_sstable_files()
+    benchmark_compaction_strategies()
+    benchmark_lsm_range_scan()
+    benchmark_memtable_flush()
+    benchmark_background_compaction()
+    benchmark_wal_sync_modes()
+    benchmark_deletes()
+    benchmark_fractal_tree()
+    benchmark_columnar_sstables()
+    benchmark_operation_latency()
+    benchmark_memory_footprint()
+    print(f"All benchmarks completed! Check {os.path.abspath(RESULTS_DIR)} for graphs.")
@@ -0,0 +1,83 @@
+import hashlib
+import math
+import operator
+import struct
+
+# Serialised form: number of bits, number of probes, then the bit array
+FILTER_HEADER_FORMAT = "<QI"
+FILTER_HEADER_SIZE = struct.calcsize(FILTER_HEADER_FORMAT)
+
+
+def bloom_key_bytes(key):
+    """Bytes a key is hashed as; keys that compare equal give the same bytes
+
+    Integral keys (bool, NumPy integers, floats without a fractional part)
+    are taken as the int they equal. Ints and strings use the tagged
+    encoding of sstable_file.encode_item, which cannot be imported here as
+    sstable_file imports this module; ints beyond int64 fall back to their
+    decimal digits. Other floats hash their IEEE 754 bytes, and any other
+    key its repr, which only matches keys of the same type.
+    """
+    if isinstance(key, float):
+        if not key.is_integer():
+            return b"f" + struct.pack("<d", key)
+        key = int(key)
+    if not isinstance(key, str):
+        try:
+            key = operator.index(key)
+        except TypeError:
+            return repr(key).encode("utf-8")
+        if -(1 << 63) <= key < (1 << 63):
+            return b"i" + struct.pack("<q", key)
+        return b"I" + str(key).encode("ascii")
+    data = key.encode("utf-8")
+    return b"s" + struct.pack("<I", len(data)) + data
+
+
+def bloom_hash(key):
+    """Two independent 64-bit hashes of a key, stable across processes"""
+    digest = hashlib.blake2b(bloom_key_bytes(key), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return h1, h2
+
+
+class BloomFilter:
+    """Bit array answering "definitely absent" or "maybe present" for a key set.
+
+    Probe positions use double hashing (h1 + i * h2), so a key is hashed
+    once no matter how many probes are made. The number of probes is the
+    optimum for the given bits per key, bits_per_key * ln 2.
+    """
+    def __init__(self, num_keys, bits_per_key=10):
+        self.num_bits = max(8, num_keys * bits_per_key)
+        self.num_hashes = max(1, round(bits_per_key * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def add(self, key):
+        h1, h2 = bloom_hash(key)
+        for i in range(self.num_hashes):
+            bit = (h1 + i * h2) % self.num_bits
+            self.bits[bit >> 3] |= 1 << (bit & 7)
+
+    def might_contain(self, key, key_hash=None):
+        """False means the key was never added; pass key_hash to reuse bloom_hash(key)"""
+        h1, h2 = key_hash if key_hash is not None else bloom_hash(key)
+        for i in range(self.num_hashes):
+            bit = (h1 + i * h2) % self.num_bits
+            if not self.bits[bit >> 3] & (1 << (bit & 7)):
+                return False
+        return True
+
+    def size_bytes(self):
+        return len(self.bits)
+
+    def to_bytes(self):
+        return struct.pack(FILTER_HEADER_FORMAT, self.num_bits, self.num_hashes) + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data):
+        bloom = cls.__new__(cls)
+        bloom.num_bits, bloom.num_hashes = struct.unpack_from(FILTER_HEADER_FORMAT, data, 0)
+        bloom.bits = bytearray(data[FILTER_HEADER_SIZE:])
+        return bloom
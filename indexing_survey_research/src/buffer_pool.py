@@ -0,0 +1,191 @@
+from collections import OrderedDict
+
+
+class LRUPolicy:
+    """Evict the least recently used unpinned page"""
+    def __init__(self, capacity):
+        self.pages = OrderedDict()
+
+    def admit(self, page_id):
+        self.pages[page_id] = None
+
+    def touch(self, page_id):
+        self.pages.move_to_end(page_id)
+
+    def victim(self, evictable):
+        for page_id in self.pages:
+            if evictable(page_id):
+                del self.pages[page_id]
+                return page_id
+        return None
+
+
+class ClockPolicy:
+    """Second-chance CLOCK: a hand sweeps the frames, clearing reference bits"""
+    def __init__(self, capacity):
+        self.slots = []
+        self.slot_of = {}
+        self.referenced = {}
+        self.free_slots = []
+        self.hand = 0
+
+    def admit(self, page_id):
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.slots[slot] = page_id
+        else:
+            slot = len(self.slots)
+            self.slots.append(page_id)
+        self.slot_of[page_id] = slot
+        self.referenced[page_id] = True
+
+    def touch(self, page_id):
+        self.referenced[page_id] = True
+
+    def victim(self, evictable):
+        # Two full sweeps clear every reference bit, so a third finds nothing new
+        for _ in range(2 * len(self.slots) + 1):
+            slot = self.hand
+            self.hand = (self.hand + 1) % len(self.slots)
+            page_id = self.slots[slot]
+            if page_id is None or not evictable(page_id):
+                continue
+            if self.referenced[page_id]:
+                self.referenced[page_id] = False
+                continue
+            self.slots[slot] = None
+            self.free_slots.append(slot)
+            del self.slot_of[page_id]
+            del self.referenced[page_id]
+            return page_id
+        return None
+
+
+class TwoQPolicy:
+    """2Q: first-time pages enter a FIFO (A1in); pages seen again after
+    leaving it, tracked by the ghost queue A1out, are promoted to an LRU (Am).
+    One-off scans therefore cannot flush the hot set.
+    """
+    def __init__(self, capacity, kin_ratio=0.25, kout_ratio=0.5):
+        self.kin = max(1, int(capacity * kin_ratio))
+        self.kout = max(1, int(capacity * kout_ratio))
+        self.a1in = OrderedDict()
+        self.a1out = OrderedDict()
+        self.am = OrderedDict()
+
+    def admit(self, page_id):
+        if page_id in self.a1out:
+            del self.a1out[page_id]
+            self.am[page_id] = None
+        else:
+            self.a1in[page_id] = None
+
+    def touch(self, page_id):
+        # Hits in A1in are deliberately ignored (correlated references)
+        if page_id in self.am:
+            self.am.move_to_end(page_id)
+
+    def victim(self, evictable):
+        queues = [self.a1in, self.am] if len(self.a1in) > self.kin else [self.am, self.a1in]
+        for queue in queues:
+            for page_id in queue:
+                if evictable(page_id):
+                    del queue[page_id]
+                    if queue is self.a1in:
+                        self.a1out[page_id] = None
+                        if len(self.a1out) > self.kout:
+                            self.a1out.popitem(last=False)
+                    return page_id
+        return None
+
+
+EVICTION_POLICIES = {
+    "lru": LRUPolicy,
+    "clock": ClockPolicy,
+    "2q": TwoQPolicy,
+}
+
+
+class BufferPool:
+    """Fixed number of in-memory page frames in front of a slower store.
+
+    load_page(page_id) is called on a miss and write_page(page_id, page)
+    when a dirty page is evicted or flushed. Pinned pages are never evicted.
+    """
+    def __init__(self, capacity, policy="lru", load_page=None, write_page=None):
+        if capacity < 1:
+            raise ValueError("buffer pool capacity must be at least one page")
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"unknown eviction policy {policy!r}, expected one of {sorted(EVICTION_POLICIES)}")
+        self.capacity = capacity
+        self.policy_name = policy
+        self.policy = EVICTION_POLICIES[policy](capacity)
+        self.load_page = load_page
+        self.write_page = write_page
+        self.frames = {}
+        self.pin_counts = {}
+        self.dirty = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.write_backs = 0
+
+    def fetch_page(self, page_id):
+        """Return the page, loading it on a miss, and pin it"""
+        if page_id in self.frames:
+            self.hits += 1
+            self.policy.touch(page_id)
+        else:
+            self.misses += 1
+            self._install(page_id, self.load_page(page_id))
+        self.pin_counts[page_id] += 1
+        return self.frames[page_id]
+
+    def unpin_page(self, page_id, is_dirty=False):
+        if self.pin_counts.get(page_id, 0) == 0:
+            raise ValueError(f"page {page_id!r} is not pinned")
+        self.pin_counts[page_id] -= 1
+        if is_dirty:
+            self.dirty.add(page_id)
+
+    def put_page(self, page_id, page):
+        """Install or replace a page in the pool and mark it dirty"""
+        if page_id in self.frames:
+            self.frames[page_id] = page
+            self.policy.touch(page_id)
+        else:
+            self._install(page_id, page)
+        self.dirty.add(page_id)
+
+    def _install(self, page_id, page):
+        if len(self.frames) >= self.capacity:
+            self._evict()
+        self.frames[page_id] = page
+        self.pin_counts[page_id] = 0
+        self.policy.admit(page_id)
+
+    def _evict(self):
+        page_id = self.policy.victim(lambda candidate: self.pin_counts[candidate] == 0)
+        if page_id is None:
+            raise RuntimeError("buffer pool is full and every frame is pinned")
+        page = self.frames.pop(page_id)
+        del self.pin_counts[page_id]
+        self.evictions += 1
+        if page_id in self.dirty:
+            self.dirty.discard(page_id)
+            self.write_page(page_id, page)
+            self.write_backs += 1
+
+    def flush_page(self, page_id):
+        if page_id in self.dirty:
+            self.dirty.discard(page_id)
+            self.write_page(page_id, self.frames[page_id])
+            self.write_backs += 1
+
+    def flush_all(self):
+        for page_id in list(self.dirty):
+            self.flush_page(page_id)
+
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -0,0 +1,102 @@
+"""Compaction strategies for LSMTree.
+
+A strategy looks at the tree's levels (lists of sorted runs, oldest first;
+level 0 receives memtable flushes) and returns the next merge to run as
+(source_level, source_runs, target_level, target_runs), or None when the
+tree is in shape. Everything in level i is newer than everything in level
+i + 1, so a merge output replaces the target runs, or becomes the newest
+run of the target level when no target runs are rewritten. Sizes are in
+entries; base_entries is the number of entries in one memtable flush.
+"""
+
+
+class SimpleCompaction:
+    """Original policy: merge the two oldest runs once level 0 has more than max_runs"""
+    def __init__(self, base_entries, max_runs=3):
+        self.base_entries = base_entries
+        self.max_runs = max_runs
+
+    def pick(self, levels):
+        if len(levels[0]) > self.max_runs:
+            return 0, levels[0][:2], 0, []
+        return None
+
+
+class SizeTieredCompaction:
+    """Each level collects up to size_ratio runs, which are then merged into one
+    new run on the next level. Cheap writes, but a lookup may probe every run.
+    """
+    def __init__(self, base_entries, size_ratio=4):
+        self.base_entries = base_entries
+        self.size_ratio = size_ratio
+
+    def pick(self, levels):
+        for i, level in enumerate(levels):
+            if len(level) >= self.size_ratio:
+                return i, list(level), i + 1, []
+        return None
+
+
+class LeveledCompaction:
+    """Every level below 0 is one sorted run, each size_ratio times larger than
+    the one above. Level 0 is merged into level 1 once it holds l0_trigger
+    runs, and a level that outgrows its capacity is merged into the next.
+    At most one run per level is probed, at the price of rewriting the
+    target level on every merge.
+    """
+    def __init__(self, base_entries, size_ratio=10, l0_trigger=4):
+        self.base_entries = base_entries
+        self.size_ratio = size_ratio
+        self.l0_trigger = l0_trigger
+
+    def capacity(self, level):
+        return self.l0_trigger * self.base_entries * self.size_ratio ** (level - 1)
+
+    def pick(self, levels):
+        if len(levels[0]) >= self.l0_trigger:
+            return 0, list(levels[0]), 1, list(levels[1]) if len(levels) > 1 else []
+        for i in range(1, len(levels)):
+            if level_entries(levels[i]) > self.capacity(i):
+                return i, list(levels[i]), i + 1, list(levels[i + 1]) if len(levels) > i + 1 else []
+        return None
+
+
+class LazyLevelingCompaction:
+    """Tiering on every level except the last, which is kept as a single run.
+
+    Most data lives in the last level, so this keeps leveling's space and
+    lookup cost for the bulk of the keys while upper levels pay only
+    tiering's write cost. When the last level outgrows its capacity an empty
+    level is opened below it, and it becomes a tiered level itself.
+    """
+    def __init__(self, base_entries, size_ratio=4):
+        self.base_entries = base_entries
+        self.size_ratio = size_ratio
+
+    def capacity(self, level):
+        return self.base_entries * self.size_ratio ** (level + 1)
+
+    def pick(self, levels):
+        last = len(levels) - 1
+        if last > 0 and level_entries(levels[last]) > self.capacity(last):
+            # Grow the tree; no data moves
+            return last, [], last + 1, []
+        for i, level in enumerate(levels):
+            if len(level) >= self.size_ratio:
+                if i + 1 >= last:
+                    # Merge into the single last-level run
+                    return i, list(level), i + 1, list(levels[i + 1]) if i + 1 <= last else []
+                return i, list(level), i + 1, []
+        return None
+
+
+def level_entries(level):
+    return sum(len(run) for run in level)
+
+
+COMPACTION_STRATEGIES = {
+    "simple": SimpleCompaction,
+    "tiered": SizeTieredCompaction,
+    "leveled": LeveledCompaction,
+    "lazy_leveling": LazyLevelingCompaction,
+}
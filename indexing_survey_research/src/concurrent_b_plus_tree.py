@@ -0,0 +1,433 @@
+import bisect
+import threading
+from b_plus_tree import BPlusTree, BPlusTreeInternalNode, BPlusTreeLeafNode
+
+
+class RWLatch:
+    """Reader-writer latch. Waiting writers block new readers so they cannot starve."""
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+
+class ConcurrentInternalNode(BPlusTreeInternalNode):
+    __slots__ = ("latch",)
+
+    def __init__(self, keys):
+        super().__init__(keys)
+        self.latch = RWLatch()
+
+
+class ConcurrentLeafNode(BPlusTreeLeafNode):
+    __slots__ = ("latch",)
+
+    def __init__(self, keys):
+        super().__init__(keys)
+        self.latch = RWLatch()
+
+
+class ConcurrentBPlusTree(BPlusTree):
+    """BPlusTree that many threads can search, scan and insert into at once.
+
+    Every node carries a reader-writer latch. Readers crab down the tree,
+    latching a child before releasing its parent. Writers latch their path
+    exclusively and drop all ancestors as soon as a node has room for one
+    more key, so only the nodes a split can reach stay latched. Latches are
+    only ever acquired top-down and, along the leaf chain, left to right,
+    which rules out deadlock.
+
+    I/O counters are kept per thread. Operations that restructure large
+    parts of the tree (bulk_load, search_many, insert_many, delete) take
+    the tree latch exclusively and run alone, as do the order-statistic
+    queries and, on trees with order statistics, upsert.
+    Buffer pools are not supported.
+    """
+    def __init__(self, order=4, key_type=None, order_statistics=False):
+        self._local = threading.local()
+        super().__init__(order, key_type=key_type, order_statistics=order_statistics)
+        # Shared by ordinary operations, exclusive for whole-tree operations
+        self._tree_latch = RWLatch()
+        # Guards the root pointer; writers keep it while the root may split
+        self._root_latch = RWLatch()
+
+    # Per-thread I/O counters, so concurrent operations report their own I/O
+    @property
+    def num_read_ios(self):
+        return getattr(self._local, "num_read_ios", 0)
+
+    @num_read_ios.setter
+    def num_read_ios(self, value):
+        self._local.num_read_ios = value
+
+    @property
+    def num_write_ios(self):
+        return getattr(self._local, "num_write_ios", 0)
+
+    @num_write_ios.setter
+    def num_write_ios(self, value):
+        self._local.num_write_ios = value
+
+    @property
+    def num_cache_hits(self):
+        return getattr(self._local, "num_cache_hits", 0)
+
+    @num_cache_hits.setter
+    def num_cache_hits(self, value):
+        self._local.num_cache_hits = value
+
+    def _new_leaf(self, keys=()):
+        return ConcurrentLeafNode(self._make_keys(keys))
+
+    def _new_internal(self, keys=()):
+        return ConcurrentInternalNode(self._make_keys(keys))
+
+    def _is_safe(self, node):
+        """A node with room for one more key cannot split during this insert"""
+        return len(node.keys) < self.order - 1
+
+    def _latch_leaf_shared(self, key, exclusive_bound=False):
+        """Crab down to the leaf for key and return it read-latched.
+
+        key=None goes to the rightmost leaf. With exclusive_bound the descent
+        heads for the keys just below key instead of key itself. Also returns
+        the leaf's lower fence, the separator every key in it is >= to
+        (None for the leftmost leaf).
+        """
+        self._root_latch.acquire_read()
+        node = self.root
+        node.latch.acquire_read()
+        self._root_latch.release_read()
+        lower_fence = None
+        while not node.is_leaf:
+            self._read_node(node)
+            if key is None:
+                idx = len(node.pointers) - 1
+            elif exclusive_bound:
+                idx = bisect.bisect_left(node.keys, key)
+            else:
+                idx = bisect.bisect_right(node.keys, key)
+            if idx > 0:
+                lower_fence = node.keys[idx - 1]
+            child = node.pointers[idx]
+            child.latch.acquire_read()
+            node.latch.release_read()
+            node = child
+        self._read_node(node)
+        return node, lower_fence
+
+    def search(self, key):
+        self._tree_latch.acquire_read()
+        try:
+            self._reset_counters()
+            leaf, _ = self._latch_leaf_shared(key)
+            try:
+                i = bisect.bisect_left(leaf.keys, key)
+                if i < len(leaf.keys) and leaf.keys[i] == key:
+                    return leaf.pointers[i], self.num_read_ios
+                return None, self.num_read_ios
+            finally:
+                leaf.latch.release_read()
+        finally:
+            self._tree_latch.release_read()
+
+    def insert(self, key, value):
+        self._tree_latch.acquire_read()
+        try:
+            self._reset_counters()
+            leaf, held = self._latch_path_exclusive(key)
+            try:
+                self._insert_into_leaf(leaf, key, value)
+            finally:
+                for latch in reversed(held):
+                    latch.release_write()
+            return self.num_write_ios
+        finally:
+            self._tree_latch.release_read()
+
+    def upsert(self, key, value):
+        if self.order_statistics:
+            # Path counts are raised on the way down, before the leaf shows whether key exists
+            return self._exclusive(super().upsert, key, value)
+        self._tree_latch.acquire_read()
+        try:
+            self._reset_counters()
+            leaf, held = self._latch_path_exclusive(key)
+            try:
+                if not self._replace_in_leaf(leaf, key, value):
+                    self._insert_into_leaf(leaf, key, value)
+            finally:
+                for latch in reversed(held):
+                    latch.release_write()
+            return self.num_write_ios
+        finally:
+            self._tree_latch.release_read()
+
+    def _latch_path_exclusive(self, key):
+        """Write-latch the path to key's leaf, keeping only ancestors a split could reach"""
+        self._root_latch.acquire_write()
+        held = [self._root_latch]
+        node = self.root
+        node.latch.acquire_write()
+        held.append(node.latch)
+        while True:
+            if self._is_safe(node):
+                for latch in held[:-1]:
+                    latch.release_write()
+                held = held[-1:]
+            if node.is_leaf:
+                return node, held
+            self._read_node(node)
+            idx = bisect.bisect_right(node.keys, key)
+            if self.order_statistics:
+                # Counted top-down while the node is still latched
+                node.counts[idx] += 1
+                self._write_node(node)
+            child = node.pointers[idx]
+            child.latch.acquire_write()
+            held.append(child.latch)
+            node = child
+
+    def _split_leaf(self, leaf):
+        # The right sibling's prev pointer changes too, so latch it (left to right)
+        right = leaf.next
+        if right is not None:
+            right.latch.acquire_write()
+        try:
+            super()._split_leaf(leaf)
+        finally:
+            if right is not None:
+                right.latch.release_write()
+
+    def range_query(self, low, high):
+        cursor = self.scan(low, high)
+        results = list(cursor)
+        return results, cursor.num_read_ios
+
+    def scan(self, low=None, high=None, reverse=False, limit=None, resume_from=None):
+        return ConcurrentBPlusTreeCursor(self, low, high, reverse, limit, resume_from)
+
+    def bulk_load(self, items, fill_factor=1.0):
+        return self._exclusive(super().bulk_load, items, fill_factor)
+
+    def search_many(self, keys):
+        return self._exclusive(super().search_many, keys)
+
+    def insert_many(self, pairs):
+        return self._exclusive(super().insert_many, pairs)
+
+    def delete(self, key):
+        # Merges and redistribution reach siblings, which crabbing does not latch
+        return self._exclusive(super().delete, key)
+
+    def count_range(self, low, high):
+        return self._exclusive(super().count_range, low, high)
+
+    def rank(self, key):
+        return self._exclusive(super().rank, key)
+
+    def select(self, k):
+        return self._exclusive(super().select, k)
+
+    def _exclusive(self, operation, *args):
+        self._tree_latch.acquire_write()
+        try:
+            return operation(*args)
+        finally:
+            self._tree_latch.release_write()
+
+
+class ConcurrentBPlusTreeCursor:
+    """Range cursor for ConcurrentBPlusTree that holds no latch between rows.
+
+    Each refill latches one leaf, copies the qualifying entries and
+    releases it. Forward scans step to the next leaf with latch coupling;
+    keys only ever move right on a split, so anything after position is
+    still in the current leaf or further along the chain. Reverse scans
+    re-descend from the root for every leaf instead of latching right to
+    left, which could deadlock against splits.
+
+    A key can repeat across leaves, so besides position the cursor keeps
+    how many copies of its boundary key the last batch returned and skips
+    exactly those when it refills.
+    """
+    def __init__(self, tree, low=None, high=None, reverse=False, limit=None, resume_from=None):
+        self.tree = tree
+        self.low = low
+        self.high = high
+        self.reverse = reverse
+        self.limit = limit
+        self.position = resume_from
+        self.returned = 0
+        self.num_read_ios = 0
+        self.leaf = None
+        self.buffer = []
+        self.exhausted = False
+        self._reverse_bound = resume_from
+        # Copies of the boundary key returned by the last batch; None skips them all (resume_from)
+        self._skip = None if resume_from is not None else 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.limit is not None and self.returned >= self.limit:
+            raise StopIteration
+        while not self.buffer:
+            if self.exhausted:
+                raise StopIteration
+            self._fill()
+        key, value = self.buffer.pop()
+        self.position = key
+        self.returned += 1
+        return key, value
+
+    def _fill(self):
+        tree = self.tree
+        tree._tree_latch.acquire_read()
+        reads = tree.num_read_ios
+        try:
+            if self.reverse:
+                self._fill_reverse()
+            else:
+                self._fill_forward()
+        finally:
+            self.num_read_ios += tree.num_read_ios - reads
+            tree._tree_latch.release_read()
+
+    def _start_index(self, leaf):
+        """Index of leaf's first entry not yet returned; uses up skipped copies of position"""
+        if self.position is None:
+            return 0 if self.low is None else bisect.bisect_left(leaf.keys, self.low)
+        end = bisect.bisect_right(leaf.keys, self.position)
+        if self._skip is None:
+            return end
+        start = bisect.bisect_left(leaf.keys, self.position)
+        skipped = min(end - start, self._skip)
+        self._skip -= skipped
+        return start + skipped
+
+    def _fill_forward(self):
+        tree = self.tree
+        if self.leaf is None:
+            if self.position is not None:
+                leaf, _ = tree._latch_leaf_shared(self.position)
+            elif self.low is not None:
+                # Copies of low can sit left of a separator equal to it
+                leaf, _ = tree._latch_leaf_shared(self.low, exclusive_bound=True)
+            else:
+                leaf = self._latch_leftmost_leaf()
+        else:
+            leaf = self.leaf
+            leaf.latch.acquire_read()
+
+        start = self._start_index(leaf)
+        while start == len(leaf.keys) and leaf.next is not None:
+            following = leaf.next
+            following.latch.acquire_read()
+            leaf.latch.release_read()
+            leaf = following
+            tree._read_node(leaf)
+            start = self._start_index(leaf)
+
+        end = len(leaf.keys) if self.high is None else bisect.bisect_right(leaf.keys, self.high)
+        # Stored reversed so __next__ can pop from the end
+        self.buffer = list(zip(leaf.keys[start:end], leaf.pointers[start:end]))[::-1]
+        if self.buffer:
+            # Every copy of the last key in this leaf will have been returned
+            self._skip = end - bisect.bisect_left(leaf.keys, leaf.keys[end - 1], 0, end)
+        self.exhausted = end < len(leaf.keys) or leaf.next is None
+        self.leaf = leaf
+        leaf.latch.release_read()
+
+    def _latch_leftmost_leaf(self):
+        tree = self.tree
+        tree._root_latch.acquire_read()
+        node = tree.root
+        node.latch.acquire_read()
+        tree._root_latch.release_read()
+        while not node.is_leaf:
+            tree._read_node(node)
+            child = node.pointers[0]
+            child.latch.acquire_read()
+            node.latch.release_read()
+            node = child
+        tree._read_node(node)
+        return node
+
+    def _fill_reverse(self):
+        tree = self.tree
+        bound = self._reverse_bound
+        if bound is None:
+            leaf, lower_fence = tree._latch_leaf_shared(self.high)
+            bound = self.high
+        else:
+            # The leftmost leaf that can hold bound; copies of it may continue to the right
+            leaf, lower_fence = tree._latch_leaf_shared(bound, exclusive_bound=True)
+        first = leaf
+        # Resuming skips every copy of resume_from; a revisited leaf's copies of bound were all returned
+        strictly_below = self._skip is None or leaf is self.leaf
+        start = 0 if self.low is None else bisect.bisect_left(leaf.keys, self.low)
+        if strictly_below:
+            end = bisect.bisect_left(leaf.keys, bound)
+        else:
+            end = len(leaf.keys) if bound is None else bisect.bisect_right(leaf.keys, bound)
+        entries = list(zip(leaf.keys[start:end], leaf.pointers[start:end]))
+
+        returned = 0 if strictly_below else self._skip
+        if not strictly_below and self.leaf is not None:
+            # Collect the copies of bound up to the last batch's leaf, which returned the rest
+            while end == len(leaf.keys) and leaf.next is not None:
+                if leaf.next is self.leaf:
+                    returned = 0
+                    break
+                following = leaf.next
+                following.latch.acquire_read()
+                leaf.latch.release_read()
+                leaf = following
+                tree._read_node(leaf)
+                end = bisect.bisect_right(leaf.keys, bound)
+                entries.extend(zip(leaf.keys[:end], leaf.pointers[:end]))
+        leaf.latch.release_read()
+        if returned:
+            # Reached past the last batch's leaf (it was merged away): its copies come last
+            del entries[max(0, len(entries) - returned):]
+
+        self.buffer = entries
+        self.exhausted = start > 0 or lower_fence is None
+        self.leaf = first
+        smallest = entries[0][0] if entries else None
+        if smallest is not None and smallest == lower_fence:
+            # More copies of smallest may sit in the leaves to the left
+            self._reverse_bound = smallest
+            self._skip = bisect.bisect_right([key for key, _ in entries], smallest)
+        else:
+            # Next refill looks at or below this leaf's lower fence
+            self._reverse_bound = lower_fence
+            self._skip = 0
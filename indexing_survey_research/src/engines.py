@@ -0,0 +1,52 @@
+"""Registry of the index engines the benchmark harness can build.
+
+Every engine offers insert(key, value), search(key) -> (value, reads) and
+range_query(low, high) -> (results, reads). Defaults are the sizes the
+benchmarks compare engines at; any of them can be overridden per run.
+Engines whose insert() keeps repeated keys register an update that
+overwrites instead, which workloads with updates go through.
+"""
+from b_plus_tree import BPlusTree
+from concurrent_b_plus_tree import ConcurrentBPlusTree
+from fractal_tree_sim import FractalTree
+from lsm_tree import LSMTree
+
+
+class EngineSpec:
+    """How to build an engine, count the writes it has made and overwrite a key"""
+    def __init__(self, factory, defaults=None, total_writes=None, update=None):
+        self.factory = factory
+        self.defaults = dict(defaults or {})
+        # Cumulative write count of an engine; None means insert() returns the writes of each insert
+        self.total_writes = total_writes
+        # update(engine, key, value) replaces key's value; None means insert() already does
+        self.update = update
+
+    def create(self, **params):
+        return self.factory(**{**self.defaults, **params})
+
+
+ENGINES = {}
+
+
+def register_engine(name, factory, defaults=None, total_writes=None, update=None):
+    if name in ENGINES:
+        raise ValueError(f"engine {name!r} is already registered")
+    ENGINES[name] = EngineSpec(factory, defaults, total_writes, update)
+
+
+def create_engine(name, **params):
+    if name not in ENGINES:
+        raise ValueError(f"unknown engine {name!r}, expected one of {sorted(ENGINES)}")
+    return ENGINES[name].create(**params)
+
+
+# B+Trees keep every inserted entry, so updates go through upsert
+register_engine("b_plus_tree", BPlusTree, {"order": 50},
+                update=lambda tree, key, value: tree.upsert(key, value))
+register_engine("concurrent_b_plus_tree", ConcurrentBPlusTree, {"order": 50},
+                update=lambda tree, key, value: tree.upsert(key, value))
+# LSM-Tree writes are counted in entries written by flushes and compactions
+register_engine("lsm_tree", LSMTree, {"memtable_size_threshold": 500},
+                total_writes=lambda tree: sum(tree.level_writes))
+register_engine("fractal_tree", FractalTree, {"order": 16, "buffer_size": 128, "leaf_size": 50})
@@ -1 +1,221 @@
-#
+import bisect
+
+# Message value that deletes its key once it reaches a leaf
+TOMBSTONE = None
+
+def _chunk_bounds(count, fill):
+    """Split count items into the fewest chunks of at most fill, evenly sized"""
+    num_chunks = -(-count // fill)
+    base, extra = divmod(count, num_chunks)
+    start = 0
+    for i in range(num_chunks):
+        end = start + base + (1 if i < extra else 0)
+        yield start, end
+        start = end
+
+class FractalLeafNode:
+    __slots__ = ("keys", "values")
+    is_leaf = True
+    
+    def __init__(self, keys=(), values=()):
+        self.keys = list(keys)
+        self.values = list(values)
+
+class FractalInternalNode:
+    """Pivot keys, children and a buffer of pending messages (key -> value or TOMBSTONE)"""
+    __slots__ = ("keys", "children", "buffer")
+    is_leaf = False
+    
+    def __init__(self, keys=(), children=(), buffer=None):
+        self.keys = list(keys)
+        self.children = list(children)
+        self.buffer = buffer if buffer is not None else {}
+
+class FractalTree:
+    """B-epsilon tree (fractal tree index).
+    
+    Internal nodes have at most order children plus a buffer of up to
+    buffer_size pending messages; leaves hold up to leaf_size entries.
+    An insert or delete only adds a message to the root's buffer. When a
+    buffer overflows, the messages bound for its busiest child are moved
+    down in one batch, so each node write carries many messages, and a
+    leaf applies them when they arrive. Point queries return the first
+    message for the key met on the way down, since messages higher in the
+    tree are newer than everything below them; range queries merge the
+    buffers of every node they visit over the leaf entries.
+    
+    The root stays in memory like an LSM memtable, so buffering a message
+    costs no I/O. Every other node a flush touches counts one write, and
+    every node a query visits counts one read, as in BPlusTree.
+    """
+    def __init__(self, order=16, buffer_size=128, leaf_size=64):
+        self.order = order
+        self.buffer_size = buffer_size
+        self.leaf_size = leaf_size
+        self.root = FractalInternalNode(children=[FractalLeafNode()])
+        self.num_read_ios = 0
+        self.num_write_ios = 0
+        self.num_messages_flushed = 0
+        
+    def _reset_counters(self):
+        self.num_read_ios = 0
+        self.num_write_ios = 0
+        
+    def _read_node(self, node):
+        """Simulate reading a node from disk"""
+        self.num_read_ios += 1
+        return node
+        
+    def _write_node(self, node):
+        """Simulate writing a node to disk"""
+        self.num_write_ios += 1
+        return node
+        
+    def insert(self, key, value):
+        self._reset_counters()
+        self._put(key, value)
+        return self.num_write_ios
+        
+    def delete(self, key):
+        """Delete key by sending a tombstone message down the tree"""
+        self._reset_counters()
+        self._put(key, TOMBSTONE)
+        return self.num_write_ios
+        
+    def _put(self, key, message):
+        # A newer message for the same key replaces the pending one
+        self.root.buffer[key] = message
+        if len(self.root.buffer) <= self.buffer_size:
+            return
+        self._flush(self.root)
+        if len(self.root.children) > self.order:
+            # Grow the tree: the old root becomes the only child of a new one
+            self.root = FractalInternalNode(children=[self.root])
+            self._split_child(self.root, 0)
+        while len(self.root.children) == 1 and not self.root.children[0].is_leaf and not self.root.buffer:
+            # Deletes emptied the level below the root
+            self.root = self.root.children[0]
+            
+    def _flush(self, node):
+        """Move messages from node's buffer to its children until it is within buffer_size"""
+        while len(node.buffer) > self.buffer_size:
+            keys = sorted(node.buffer)
+            # Child i receives the keys from pivot i - 1 up to, but excluding, pivot i
+            bounds = [0] + [bisect.bisect_left(keys, pivot) for pivot in node.keys] + [len(keys)]
+            idx = max(range(len(node.children)), key=lambda i: bounds[i + 1] - bounds[i])
+            batch = [(key, node.buffer.pop(key)) for key in keys[bounds[idx]:bounds[idx + 1]]]
+            self.num_messages_flushed += len(batch)
+            
+            child = self._read_node(node.children[idx])
+            if child.is_leaf:
+                self._apply_to_leaf(child, batch)
+            else:
+                # Messages already in the child are older, so the batch overrides them
+                child.buffer.update(batch)
+                self._flush(child)
+            self._write_child(node, idx)
+            
+    def _apply_to_leaf(self, leaf, batch):
+        """Apply a sorted batch of messages to a leaf's entries"""
+        pos = 0
+        for key, message in batch:
+            pos = bisect.bisect_left(leaf.keys, key, pos)
+            exists = pos < len(leaf.keys) and leaf.keys[pos] == key
+            if message is TOMBSTONE:
+                if exists:
+                    del leaf.keys[pos]
+                    del leaf.values[pos]
+            elif exists:
+                leaf.values[pos] = message
+            else:
+                leaf.keys.insert(pos, key)
+                leaf.values.insert(pos, message)
+                
+    def _write_child(self, node, idx):
+        """Write back node's child idx, split if it overflowed or dropped if deletes emptied it"""
+        child = node.children[idx]
+        if child.is_leaf:
+            overflowed = len(child.keys) > self.leaf_size
+        else:
+            overflowed = len(child.children) > self.order
+        if overflowed:
+            self._split_child(node, idx)
+        elif child.is_leaf and not child.keys and len(node.children) > 1:
+            # Its key range goes to a neighbour along with the pivot
+            del node.children[idx]
+            del node.keys[max(idx - 1, 0)]
+        else:
+            self._write_node(child)
+            
+    def _split_child(self, node, idx):
+        """Split node's child idx into the fewest nodes that fit, evenly filled"""
+        child = node.children[idx]
+        pieces = []
+        pivots = []
+        if child.is_leaf:
+            for start, end in _chunk_bounds(len(child.keys), self.leaf_size):
+                pieces.append(FractalLeafNode(child.keys[start:end], child.values[start:end]))
+                if start:
+                    pivots.append(child.keys[start])
+        else:
+            for start, end in _chunk_bounds(len(child.children), self.order):
+                if start:
+                    # The pivot between two pieces moves up into node
+                    pivots.append(child.keys[start - 1])
+                pieces.append(FractalInternalNode(child.keys[start:end - 1], child.children[start:end]))
+            # Hand each pending message to the piece whose key range holds it
+            for key, message in child.buffer.items():
+                pieces[bisect.bisect_right(pivots, key)].buffer[key] = message
+        for piece in pieces:
+            self._write_node(piece)
+        node.children[idx:idx + 1] = pieces
+        node.keys[idx:idx] = pivots
+        
+    def search(self, key):
+        self._reset_counters()
+        node = self.root
+        while not node.is_leaf:
+            self._read_node(node)
+            if key in node.buffer:
+                # The newest message for the key is the one highest up
+                return node.buffer[key], self.num_read_ios
+            node = node.children[bisect.bisect_right(node.keys, key)]
+            
+        self._read_node(node)
+        i = bisect.bisect_left(node.keys, key)
+        if i < len(node.keys) and node.keys[i] == key:
+            return node.values[i], self.num_read_ios
+        return None, self.num_read_ios
+        
+    def range_query(self, low, high):
+        self._reset_counters()
+        entries = self._collect(self.root, low, high)
+        results = [(key, value) for key, value in sorted(entries.items()) if value is not TOMBSTONE]
+        return results, self.num_read_ios
+        
+    def _collect(self, node, low, high):
+        """Newest value or tombstone of every key in [low, high] under node"""
+        self._read_node(node)
+        if node.is_leaf:
+            start = bisect.bisect_left(node.keys, low)
+            end = bisect.bisect_right(node.keys, high)
+            return dict(zip(node.keys[start:end], node.values[start:end]))
+            
+        entries = {}
+        first = bisect.bisect_right(node.keys, low)
+        last = bisect.bisect_right(node.keys, high)
+        for child in node.children[first:last + 1]:
+            entries.update(self._collect(child, low, high))
+        # Pending messages are newer than anything in the children
+        for key, message in node.buffer.items():
+            if low <= key <= high:
+                entries[key] = message
+        return entries
+        
+    def height(self):
+        height = 1
+        node = self.root
+        while not node.is_leaf:
+            node = node.children[0]
+            height += 1
+        return height
@@ -0,0 +1,705 @@
+"""Benchmark harness: runs registered engines on a workload and records the results.
+
+    python run_benchmarks.py run --engine b_plus_tree --engine lsm_tree:compaction=leveled \\
+        --workload random --size 100000 --repetitions 5 --output results/run.json --csv results/run.csv
+    python run_benchmarks.py plot results/run.json
+
+An engine argument is a registry name (see engines), optionally followed
+by :name=value,... parameter overrides; values are Python literals, or
+strings when they do not parse as one. Every repetition generates the
+workload from seed + repetition and runs each engine on it in turn. The
+JSON output holds environment metadata, the configuration, one row per
+engine and repetition, and per-engine summaries; the CSV output holds the
+rows. Plotting reads a JSON file back and is the only step that needs
+matplotlib.
+
+    python run_benchmarks.py run --engine lsm_tree:directory=/tmp/lsm,block_cache_blocks=64 --ycsb B \\
+        --distribution scrambled_zipfian --size 100000 --operations 100000
+
+With --ycsb the workload is a YCSB core workload (see workloads): --size
+records are loaded, then --operations operations of the chosen mix are
+streamed against each engine, which shows the effect of skew on caches
+and Bloom filters.
+
+Every operation is also timed with perf_counter_ns into a latency
+histogram per engine and operation type (see latency). Rows carry the
+p50, p90, p99, p99.9 and max of their run; the JSON output also holds the
+histograms merged over repetitions, and the latency command merges them
+across result files:
+
+    python run_benchmarks.py latency results/run-1.json results/run-2.json
+
+A sweep is made of independent cells, one per engine, size and
+repetition, each generating its own workload from its seed. --jobs fans
+them out to a process pool (optionally pinning each worker to a CPU with
+--pin-cpus), failed cells are retried --retries times, and the results
+file is rewritten after every cell so that --resume can finish an
+interrupted sweep. Each run of an engine with a directory parameter
+works in its own subdirectory of it, removed after the run unless
+--keep-data is given:
+
+    python run_benchmarks.py run --engine b_plus_tree --engine lsm_tree --size 10000 100000 1000000 \\
+        --repetitions 5 --jobs 0 --pin-cpus --output results/sweep.json --resume
+
+The memory command profiles engines instead (see memory_profile): bytes
+per key split into nodes, keys, values and auxiliary structures, sampled
+as the data set grows, and peak allocations of splits, flushes and
+compactions:
+
+    python run_benchmarks.py memory --engine b_plus_tree --engine lsm_tree --size 1000000 --samples 10
+"""
+import argparse
+import ast
+import contextlib
+import csv
+import datetime
+import functools
+import json
+import multiprocessing
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from engines import ENGINES
+from latency import PERCENTILES, LatencyRecorder, format_summary
+from memory_profile import CATEGORIES, profile_memory
+from workloads import KEY_DISTRIBUTIONS, WORKLOADS, YCSB_WORKLOADS, YCSBWorkload
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "results")
+METRICS = ("inserts_per_second", "write_ios_per_insert", "lookups_per_second",
+           "reads_per_lookup", "reads_per_range")
+YCSB_METRICS = ("load_inserts_per_second", "operations_per_second", "reads_per_operation",
+                "cache_hits_per_read", "bloom_false_positive_rate")
+
+
+def results_path(filename):
+    """Path of an output file in the results folder, creating the folder if needed"""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    return os.path.join(RESULTS_DIR, filename)
+
+
+def parse_engine(spec):
+    """Split "name:param=value,..." into the engine name and its parameter overrides"""
+    name, _, options = spec.partition(":")
+    if name not in ENGINES:
+        raise argparse.ArgumentTypeError(f"unknown engine {name!r}, expected one of {sorted(ENGINES)}")
+    params = {}
+    for option in filter(None, options.split(",")):
+        key, sep, value = option.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"expected name=value, got {option!r}")
+        try:
+            params[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            params[key] = value
+    return spec, name, params
+
+
+def run_engine(name, params, workload, num_lookups, num_ranges, range_size, rng, latencies=None):
+    """Load workload into a new engine, then time point lookups and range queries
+
+    The latency of every insert, lookup and range query is recorded in
+    latencies, a LatencyRecorder, when one is given.
+    """
+    spec = ENGINES[name]
+    engine = spec.create(**params)
+    if latencies is None:
+        latencies = LatencyRecorder()
+
+    writes = 0
+    start_time = time.perf_counter()
+    for key, value in workload:
+        op_start = time.perf_counter_ns()
+        result = engine.insert(key, value)
+        latencies.record("insert", time.perf_counter_ns() - op_start)
+        if spec.total_writes is None:
+            writes += result
+    insert_seconds = time.perf_counter() - start_time
+    if spec.total_writes is not None:
+        writes = spec.total_writes(engine)
+
+    keys = sorted({key for key, _ in workload})
+    lookup_keys = [rng.choice(keys) for _ in range(num_lookups)]
+    reads = 0
+    start_time = time.perf_counter()
+    for key in lookup_keys:
+        op_start = time.perf_counter_ns()
+        reads += engine.search(key)[1]
+        latencies.record("lookup", time.perf_counter_ns() - op_start)
+    lookup_seconds = time.perf_counter() - start_time
+
+    range_reads = 0
+    for _ in range(num_ranges):
+        i = rng.randrange(max(1, len(keys) - range_size + 1))
+        op_start = time.perf_counter_ns()
+        range_reads += engine.range_query(keys[i], keys[min(i + range_size, len(keys)) - 1])[1]
+        latencies.record("range", time.perf_counter_ns() - op_start)
+
+    close = getattr(engine, "close", None)
+    if close is not None:
+        close()
+    return {
+        "insert_seconds": insert_seconds,
+        "inserts_per_second": len(workload) / insert_seconds,
+        "write_ios": writes,
+        "write_ios_per_insert": writes / len(workload),
+        "lookup_seconds": lookup_seconds,
+        "lookups_per_second": num_lookups / lookup_seconds if lookup_seconds else 0.0,
+        "reads_per_lookup": reads / num_lookups if num_lookups else 0.0,
+        "reads_per_range": range_reads / num_ranges if num_ranges else 0.0,
+    }
+
+
+def run_ycsb_engine(name, params, workload, latencies=None):
+    """Load a YCSB workload into a new engine, then time its operation stream
+
+    Operations are generated as they are run, so the timing includes
+    generating them, as in the YCSB client. Reads and read-modify-writes
+    are searches, inserts are inserts, updates and the writes of
+    read-modify-writes go through the engine's registered update (insert
+    when it has none), and scans are range queries; cache hits are
+    summed over searches for engines that count them. Operation
+    latencies, not including generation, are recorded in latencies by
+    operation type when a LatencyRecorder is given.
+    """
+    spec = ENGINES[name]
+    engine = spec.create(**params)
+    if latencies is None:
+        latencies = LatencyRecorder()
+    update = engine.insert if spec.update is None else functools.partial(spec.update, engine)
+
+    start_time = time.perf_counter()
+    for key, value in workload.load():
+        engine.insert(key, value)
+    load_seconds = time.perf_counter() - start_time
+
+    counts = dict.fromkeys(("read", "update", "insert", "scan", "read_modify_write"), 0)
+    reads = 0
+    searches = 0
+    cache_hits = 0
+    start_time = time.perf_counter()
+    for operation, key, argument in workload.operations():
+        counts[operation] += 1
+        op_start = time.perf_counter_ns()
+        if operation == "scan":
+            reads += engine.range_query(key, argument)[1]
+        else:
+            if operation != "update" and operation != "insert":
+                reads += engine.search(key)[1]
+                searches += 1
+                cache_hits += getattr(engine, "num_cache_hits", 0)
+            if operation == "insert":
+                engine.insert(key, argument)
+            elif operation != "read":
+                update(key, argument)
+        latencies.record(operation, time.perf_counter_ns() - op_start)
+    run_seconds = time.perf_counter() - start_time
+
+    bloom_false_positive_rate = getattr(engine, "bloom_false_positive_rate", None)
+    close = getattr(engine, "close", None)
+    if close is not None:
+        close()
+    num_operations = sum(counts.values())
+    return {
+        "load_seconds": load_seconds,
+        "load_inserts_per_second": workload.record_count / load_seconds if load_seconds else 0.0,
+        "run_seconds": run_seconds,
+        "operations_per_second": num_operations / run_seconds if run_seconds else 0.0,
+        "reads_per_operation": reads / num_operations if num_operations else 0.0,
+        "cache_hits_per_read": cache_hits / searches if searches else 0.0,
+        # None for engines without Bloom filters
+        "bloom_false_positive_rate": bloom_false_positive_rate() if bloom_false_positive_rate else None,
+        **{f"{operation}_count": count for operation, count in counts.items()},
+    }
+
+
+def latency_columns(latencies):
+    """Row columns with each operation's latency percentiles and max in nanoseconds"""
+    columns = {}
+    for operation, summary in latencies.summary().items():
+        for name in [f"p{percentile:g}" for percentile in PERCENTILES] + ["max"]:
+            columns[f"{operation}_{name}_ns"] = summary[name]
+    return columns
+
+
+def latency_report(latencies):
+    """Summaries and histograms of LatencyRecorders merged over repetitions, by row group"""
+    return {
+        "latency": {label: recorder.summary() for label, recorder in latencies.items()},
+        "histograms": {label: recorder.to_dict() for label, recorder in latencies.items()},
+    }
+
+
+def print_latencies(latency):
+    for label, operations in latency.items():
+        for operation, summary in operations.items():
+            print(f"   {label} {operation}: {format_summary(summary)}")
+
+
+def summarize(rows, metrics=METRICS):
+    """Mean, standard deviation, min and max of every metric per row group"""
+    summary = {}
+    for label in dict.fromkeys(row["group"] for row in rows):
+        label_rows = [row for row in rows if row["group"] == label]
+        summary[label] = {}
+        for metric in metrics:
+            values = [row[metric] for row in label_rows if row[metric] is not None]
+            if not values:
+                continue
+            summary[label][metric] = {
+                "mean": statistics.mean(values),
+                "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+                "min": min(values),
+                "max": max(values),
+            }
+    return summary
+
+
+def _git(*args):
+    try:
+        result = subprocess.run(["git", *args], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=False)
+    except OSError:
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def environment_metadata():
+    """Where and with what the numbers were produced"""
+    status = _git("status", "--porcelain")
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "python_implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "git_commit": _git("rev-parse", "HEAD"),
+        "git_dirty": bool(status) if status is not None else None,
+        "argv": sys.argv,
+    }
+
+
+def write_json(path, report):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+
+
+def write_csv(path, report):
+    """One line per row; parameters as JSON and the commit and timestamp repeated on every line"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    rows = report["rows"]
+    fieldnames = [key for key in rows[0] if key != "latency_histograms"] + ["git_commit", "timestamp"] if rows else []
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({**row, "params": json.dumps(row["params"], default=str),
+                             "git_commit": report["metadata"]["git_commit"],
+                             "timestamp": report["metadata"]["timestamp"]})
+
+
+def make_config(args):
+    """Everything a sweep runs; all but the engines, sizes, repetitions and keep_data must match to resume it"""
+    config = {
+        "engines": [spec for spec, _, _ in args.engine],
+        "sizes": args.size,
+        "repetitions": args.repetitions,
+        "seed": args.seed,
+        "keep_data": args.keep_data,
+    }
+    if args.ycsb:
+        config.update({
+            "workload": f"ycsb-{args.ycsb}",
+            "ycsb": args.ycsb,
+            "distribution": args.distribution or YCSB_WORKLOADS[args.ycsb][1],
+            "operations": args.operations,
+            "value_size": args.value_size,
+            "insert_order": args.insert_order,
+            "metrics": list(YCSB_METRICS),
+        })
+    else:
+        config.update({
+            "workload": args.workload,
+            "lookups": args.lookups,
+            "ranges": args.ranges,
+            "range_size": args.range_size,
+            "metrics": list(METRICS),
+        })
+    return config
+
+
+def sweep_cells(config):
+    """The independent (engine, size, repetition) runs of a sweep, in report order"""
+    return [{"label": label, "engine_index": engine_index, "size": size, "repetition": repetition,
+             "seed": config["seed"] + repetition}
+            for size in config["sizes"]
+            for repetition in range(config["repetitions"])
+            for engine_index, label in enumerate(config["engines"])]
+
+
+def _cell_key(cell):
+    return cell["label"], cell["size"], cell["repetition"]
+
+
+@contextlib.contextmanager
+def _cell_params(config, cell, params):
+    """Engine parameters for one attempt at a cell
+
+    An engine with a directory parameter gets a new subdirectory of it, so
+    that runs neither share nor recover each other's files. The
+    subdirectory is removed when the attempt ends, failed or not, unless
+    the sweep keeps its data.
+    """
+    if params.get("directory") is None:
+        yield params
+        return
+    os.makedirs(params["directory"], exist_ok=True)
+    prefix = f"{cell['engine_index']}-n{cell['size']}-r{cell['repetition']}-"
+    if config.get("keep_data"):
+        yield {**params, "directory": tempfile.mkdtemp(prefix=prefix, dir=params["directory"])}
+        return
+    with tempfile.TemporaryDirectory(prefix=prefix, dir=params["directory"], ignore_cleanup_errors=True) as directory:
+        yield {**params, "directory": directory}
+
+
+def run_cell(config, cell):
+    """Run one cell of a sweep on a freshly generated workload and return its row
+
+    Runs in a worker process when the sweep is parallel. The row's params
+    name the cell's data directory only when the sweep keeps it.
+    """
+    label, name, params = parse_engine(cell["label"])
+    size, seed = cell["size"], cell["seed"]
+    recorder = LatencyRecorder()
+    with _cell_params(config, cell, params) as run_params:
+        if "ycsb" in config:
+            workload = YCSBWorkload(config["ycsb"], size, config["operations"], config["distribution"],
+                                    config["value_size"], insert_order=config["insert_order"], seed=seed)
+            metrics = run_ycsb_engine(name, run_params, workload, recorder)
+        else:
+            workload = WORKLOADS[config["workload"]](size, rng=random.Random(seed))
+            metrics = run_engine(name, run_params, workload, config["lookups"], config["ranges"],
+                                 config["range_size"], random.Random(seed), recorder)
+    if config.get("keep_data"):
+        params = run_params
+    # Rows are summarized per label, or per label and size when the sweep has several sizes
+    group = label if len(config["sizes"]) == 1 else f"{label} n={size}"
+    row = {"label": label, "group": group, "engine": name, "params": params, "workload": config["workload"]}
+    if "ycsb" in config:
+        row["distribution"] = config["distribution"]
+    row.update({"size": size, "repetition": cell["repetition"], "seed": seed, **metrics,
+                **latency_columns(recorder), "latency_histograms": recorder.to_dict()})
+    return row
+
+
+def _pin_worker(cpus):
+    """Pool initializer: pin this worker process to the next CPU in the queue"""
+    os.sched_setaffinity(0, {cpus.get()})
+
+
+def _run_cells(config, cells, jobs, pin_cpus):
+    """Yield (cell, row, error) for every cell as it finishes; exactly one of row and error is None"""
+    if jobs == 1 and not pin_cpus:
+        for cell in cells:
+            try:
+                yield cell, run_cell(config, cell), None
+            except Exception as error:
+                yield cell, None, repr(error)
+        return
+
+    initializer = None
+    initargs = ()
+    if pin_cpus:
+        # One CPU per worker, wrapping around when there are more workers than CPUs
+        available = sorted(os.sched_getaffinity(0))
+        cpus = multiprocessing.Queue()
+        for worker in range(jobs):
+            cpus.put(available[worker % len(available)])
+        initializer, initargs = _pin_worker, (cpus,)
+    with ProcessPoolExecutor(jobs, initializer=initializer, initargs=initargs) as pool:
+        futures = {pool.submit(run_cell, config, cell): cell for cell in cells}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as error:
+                # A worker that died breaks the pool and fails every unfinished cell with it
+                yield futures[future], None, repr(error)
+
+
+def execute_cells(config, cells, jobs=1, retries=0, pin_cpus=False, on_row=None):
+    """Run cells in-process (jobs=1) or across a pool of jobs worker processes
+
+    Failed cells are run again, in a new pool, up to retries more times.
+    on_row is called with every row as it arrives. Returns the cells that
+    failed every attempt, each with its last error.
+    """
+    pending = list(cells)
+    failed = []
+    for attempt in range(retries + 1):
+        if not pending:
+            break
+        if attempt:
+            print(f"   Retrying {len(pending)} failed runs (attempt {attempt + 1} of {retries + 1})")
+        failed = []
+        for cell, row, error in _run_cells(config, pending, jobs, pin_cpus):
+            if error is None:
+                if on_row is not None:
+                    on_row(row)
+            else:
+                print(f"   {cell['label']} n={cell['size']} #{cell['repetition']} failed: {error}")
+                failed.append({**cell, "error": error})
+        pending = [{key: value for key, value in cell.items() if key != "error"} for cell in failed]
+    return failed
+
+
+def print_row(row):
+    prefix = f"   {row['group']} #{row['repetition']}: "
+    if "operations_per_second" in row:
+        print(prefix + f"{row['load_inserts_per_second']:.0f} loads/s, "
+              f"{row['operations_per_second']:.0f} ops/s, "
+              f"{row['reads_per_operation']:.2f} reads/op, "
+              f"{row['cache_hits_per_read']:.2f} cache hits/read")
+    else:
+        print(prefix + f"{row['inserts_per_second']:.0f} inserts/s, "
+              f"{row['write_ios_per_insert']:.2f} writes/insert, "
+              f"{row['reads_per_lookup']:.2f} reads/lookup, {row['reads_per_range']:.2f} reads/range")
+
+
+def build_report(metadata, config, rows, failed):
+    latencies = {}
+    for row in rows:
+        latencies.setdefault(row["group"], LatencyRecorder()).merge(
+            LatencyRecorder.from_dict(row["latency_histograms"]))
+    return {"metadata": metadata, "config": config, "rows": rows,
+            "summary": summarize(rows, config["metrics"]), **latency_report(latencies), "failed": failed}
+
+
+def _resume_key(config):
+    return {key: value for key, value in config.items()
+            if key not in ("engines", "sizes", "repetitions", "keep_data")}
+
+
+def run(args):
+    """Run a sweep, checkpointing the results file after every run
+
+    With --resume, runs already in the results file are kept and only
+    the missing ones are run.
+    """
+    config = make_config(args)
+    cells = sweep_cells(config)
+    order = {_cell_key(cell): i for i, cell in enumerate(cells)}
+    metadata = environment_metadata()
+    rows = []
+    if args.resume and os.path.exists(args.output):
+        with open(args.output) as f:
+            previous = json.load(f)
+        if _resume_key(previous["config"]) != _resume_key(config):
+            raise SystemExit(f"{args.output} was produced by a different configuration; cannot resume it")
+        rows = [row for row in previous["rows"] if _cell_key(row) in order]
+        metadata["resumed_runs"] = len(rows)
+        done = {_cell_key(row) for row in rows}
+        cells = [cell for cell in cells if _cell_key(cell) not in done]
+        print(f"Resuming {args.output}: {len(rows)} runs done, {len(cells)} to go")
+
+    def add_row(row):
+        rows.append(row)
+        print_row(row)
+        write_json(args.output, build_report(metadata, config, rows, []))
+
+    failed = execute_cells(config, cells, args.jobs, args.retries, args.pin_cpus, add_row)
+    rows.sort(key=lambda row: order[_cell_key(row)])
+    report = build_report(metadata, config, rows, failed)
+    if failed:
+        print(f"{len(failed)} runs failed; run again with --resume to retry them")
+    return _write_report(args, report)
+
+
+def _write_report(args, report):
+    print_latencies(report["latency"])
+    write_json(args.output, report)
+    print(f"Results written to {args.output}")
+    if args.csv:
+        write_csv(args.csv, report)
+        print(f"Rows written to {args.csv}")
+    return report
+
+
+def plot(args):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    with open(args.results) as f:
+        report = json.load(f)
+    summary = report["summary"]
+    labels = list(summary)
+    metrics = report["config"].get("metrics", METRICS)
+    fig, axes = plt.subplots(1, len(metrics), figsize=(5 * len(metrics), 5))
+    for ax, metric in zip(axes, metrics):
+        stats = [summary[label].get(metric, {"mean": 0.0, "stdev": 0.0}) for label in labels]
+        ax.bar(labels, [stat["mean"] for stat in stats],
+               yerr=[stat["stdev"] for stat in stats], alpha=0.8, capsize=4)
+        ax.set_title(metric.replace("_", " ").title())
+        ax.tick_params(axis="x", labelrotation=30)
+        ax.grid(True, alpha=0.3)
+    config = report["config"]
+    fig.suptitle(f"{config['workload']} workload, {', '.join(map(str, config['sizes']))} keys, "
+                 f"{config['repetitions']} repetitions (mean and standard deviation)")
+    plt.tight_layout()
+    output = args.output or os.path.splitext(args.results)[0] + ".png"
+    plt.savefig(output, dpi=300, bbox_inches="tight")
+    plt.close()
+    print(f"Plot written to {output}")
+
+    latency = report.get("latency")
+    if latency:
+        # Latency percentiles per operation type, one bar group per engine
+        operations = list(dict.fromkeys(operation for label in labels for operation in latency.get(label, {})))
+        names = [f"p{percentile:g}" for percentile in PERCENTILES] + ["max"]
+        fig, axes = plt.subplots(1, len(operations), figsize=(5 * len(operations), 5), squeeze=False)
+        width = 0.8 / len(names)
+        for ax, operation in zip(axes[0], operations):
+            for i, name in enumerate(names):
+                ax.bar(np.arange(len(labels)) + i * width,
+                       [latency[label].get(operation, {}).get(name, 0) / 1000 for label in labels],
+                       width, label=name, alpha=0.8)
+            ax.set_xticks(np.arange(len(labels)) + width * (len(names) - 1) / 2)
+            ax.set_xticklabels(labels, rotation=30)
+            ax.set_yscale("log")
+            ax.set_ylabel("Latency (us)")
+            ax.set_title(f"{operation.replace('_', ' ').title()} Latency")
+            ax.legend()
+            ax.grid(True, alpha=0.3)
+        plt.tight_layout()
+        latency_output = os.path.splitext(output)[0] + "-latency.png"
+        plt.savefig(latency_output, dpi=300, bbox_inches="tight")
+        plt.close()
+        print(f"Plot written to {latency_output}")
+
+
+def merge_latencies(args):
+    """Merge the latency histograms of several results files by engine label"""
+    latencies = {}
+    for path in args.results:
+        with open(path) as f:
+            report = json.load(f)
+        for label, histograms in report.get("histograms", {}).items():
+            latencies.setdefault(label, LatencyRecorder()).merge(LatencyRecorder.from_dict(histograms))
+    latency = latency_report(latencies)["latency"]
+    print_latencies(latency)
+    return latency
+
+
+def memory(args):
+    """Profile the memory of every engine on one workload"""
+    config = {
+        "engines": [spec for spec, _, _ in args.engine],
+        "workload": args.workload,
+        "size": args.size,
+        "samples": args.samples,
+        "seed": args.seed,
+    }
+    workload = WORKLOADS[args.workload](args.size, rng=random.Random(args.seed))
+    engines = {}
+    for label, name, params in args.engine:
+        spec = ENGINES[name]
+        profile = profile_memory(lambda: spec.create(**params), workload, args.samples)
+        engines[label] = {"engine": name, "params": params, **profile}
+        last = profile["samples"][-1]
+        print(f"   {label}: {last['bytes_per_key']:.1f} bytes/key ("
+              + ", ".join(f"{category} {last[f'{category}_bytes_per_key']:.1f}" for category in CATEGORIES)
+              + f"), {last['traced_bytes_per_key']:.1f} traced bytes/key")
+        for method, peak in profile["peaks"].items():
+            print(f"      {method}: {peak['calls']} calls, peak {peak['max_bytes'] / 1024:.1f} KiB, "
+                  f"mean {peak['mean_bytes'] / 1024:.1f} KiB")
+
+    report = {"metadata": environment_metadata(), "config": config, "engines": engines}
+    write_json(args.output, report)
+    print(f"Results written to {args.output}")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Index engine benchmark harness")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run engines on a workload and record the results")
+    run_parser.add_argument("--engine", action="append", type=parse_engine, required=True,
+                            help=f"name[:param=value,...], repeatable; engines: {', '.join(sorted(ENGINES))}")
+    run_parser.add_argument("--workload", choices=sorted(WORKLOADS), default="random")
+    run_parser.add_argument("--ycsb", choices=sorted(YCSB_WORKLOADS), default=None,
+                            help="run a YCSB core workload instead of --workload")
+    run_parser.add_argument("--size", type=int, nargs="+", default=[10000],
+                            help="number of inserts (YCSB: records loaded); several sizes make a sweep")
+    run_parser.add_argument("--repetitions", type=int, default=3)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--lookups", type=int, default=1000, help="point lookups per run")
+    run_parser.add_argument("--ranges", type=int, default=100, help="range queries per run")
+    run_parser.add_argument("--range-size", type=int, default=100, help="keys per range query")
+    run_parser.add_argument("--operations", type=int, default=10000, help="YCSB operations per run")
+    run_parser.add_argument("--distribution", choices=KEY_DISTRIBUTIONS, default=None,
+                            help="YCSB request distribution (default: the workload's own)")
+    run_parser.add_argument("--value-size", type=int, default=100, help="YCSB value length in characters")
+    run_parser.add_argument("--insert-order", choices=("hashed", "ordered"), default="hashed",
+                            help="YCSB keys: hashed record ids or the ids themselves")
+    run_parser.add_argument("--output", default=None, help="JSON results file")
+    run_parser.add_argument("--csv", default=None, help="also write the rows to this CSV file")
+    run_parser.add_argument("--jobs", type=int, default=1,
+                            help="worker processes to run cells in; 0 for one per CPU, 1 runs in-process")
+    run_parser.add_argument("--pin-cpus", action="store_true", help="pin each worker process to its own CPU")
+    run_parser.add_argument("--retries", type=int, default=1, help="times to rerun a failed cell")
+    run_parser.add_argument("--resume", action="store_true",
+                            help="keep the runs already in --output and run only the missing ones")
+    run_parser.add_argument("--keep-data", action="store_true",
+                            help="keep each run's subdirectory of an engine's directory parameter")
+
+    plot_parser = commands.add_parser("plot", help="plot the summary of a JSON results file")
+    plot_parser.add_argument("results")
+    plot_parser.add_argument("--output", default=None, help="image file (default: next to the results)")
+
+    latency_parser = commands.add_parser("latency", help="merge and print the latency percentiles of results files")
+    latency_parser.add_argument("results", nargs="+")
+
+    memory_parser = commands.add_parser("memory", help="profile engine memory per key as a workload is loaded")
+    memory_parser.add_argument("--engine", action="append", type=parse_engine, required=True,
+                               help=f"name[:param=value,...], repeatable; engines: {', '.join(sorted(ENGINES))}")
+    memory_parser.add_argument("--workload", choices=sorted(WORKLOADS), default="random")
+    memory_parser.add_argument("--size", type=int, default=100000, help="number of inserts")
+    memory_parser.add_argument("--samples", type=int, default=10, help="memory samples as the data set grows")
+    memory_parser.add_argument("--seed", type=int, default=0)
+    memory_parser.add_argument("--output", default=None, help="JSON results file")
+
+    args = parser.parse_args(argv)
+    if args.command == "memory":
+        if args.output is None:
+            stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+            args.output = results_path(f"memory-{stamp}.json")
+        return memory(args)
+    if args.command == "run":
+        if args.jobs == 0:
+            args.jobs = os.cpu_count() or 1
+        if args.pin_cpus and not hasattr(os, "sched_setaffinity"):
+            parser.error("--pin-cpus needs os.sched_setaffinity, which this platform lacks")
+        if args.resume and args.output is None:
+            parser.error("--resume needs the --output file of the sweep to resume")
+        if args.output is None:
+            stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+            args.output = results_path(f"benchmark-{stamp}.json")
+        return run(args)
+    if args.command == "latency":
+        return merge_latencies(args)
+    return plot(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Per-operation latency recording in log-bucketed histograms.
+
+Latencies are integer nanoseconds from time.perf_counter_ns(). Like
+HdrHistogram, a LatencyHistogram keeps exact counts for values below
+2 ** precision_bits and above that splits every power of two into
+2 ** (precision_bits - 1) equal buckets, so a recorded value is known to
+within 2 ** (1 - precision_bits) of itself (under 1.6% at the default 7
+bits) however large it is, and recording is an index computation and an
+increment. Histograms with the same precision merge by adding counts,
+which is how the results of separate runs are combined.
+"""
+import time
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+class LatencyHistogram:
+    """Counts of nanosecond latencies in log-linear buckets"""
+
+    def __init__(self, precision_bits=7):
+        if precision_bits < 1:
+            raise ValueError("precision_bits must be at least 1")
+        self.precision_bits = precision_bits
+        self.counts = []
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _index(self, value):
+        shift = max(value.bit_length() - self.precision_bits, 0)
+        return (shift << (self.precision_bits - 1)) + (value >> shift)
+
+    def _highest_equivalent(self, index):
+        """Largest value that falls in bucket index"""
+        half = 1 << (self.precision_bits - 1)
+        if index < 2 * half:
+            return index
+        shift = (index >> (self.precision_bits - 1)) - 1
+        return ((index - (shift << (self.precision_bits - 1)) + 1) << shift) - 1
+
+    def record(self, value, count=1):
+        """Add count samples of value nanoseconds"""
+        if value < 0:
+            raise ValueError(f"latency must not be negative, got {value}")
+        index = self._index(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += count
+        self.count += count
+        self.total += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Add other's samples to this histogram"""
+        if other.precision_bits != self.precision_bits:
+            raise ValueError("cannot merge histograms with different precision_bits")
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    def percentile(self, percentile):
+        """Latency that percentile percent of samples do not exceed, rounded up to its bucket's top"""
+        if not self.count:
+            return 0
+        rank = max(1, -(-self.count * percentile // 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._highest_equivalent(index), self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self):
+        """Count, mean, p50, p90, p99, p99.9 and max in nanoseconds"""
+        summary = {"count": self.count, "mean": self.mean()}
+        for percentile in PERCENTILES:
+            summary[f"p{percentile:g}"] = self.percentile(percentile)
+        summary["max"] = self.max or 0
+        return summary
+
+    def to_dict(self):
+        """JSON-friendly form holding only the non-empty buckets"""
+        return {
+            "precision_bits": self.precision_bits,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+            "buckets": {str(index): count for index, count in enumerate(self.counts) if count},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data["precision_bits"])
+        buckets = {int(index): count for index, count in data["buckets"].items()}
+        histogram.counts = [0] * (max(buckets) + 1 if buckets else 0)
+        for index, count in buckets.items():
+            histogram.counts[index] = count
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
+
+
+class LatencyRecorder:
+    """One LatencyHistogram per operation type"""
+
+    def __init__(self, precision_bits=7):
+        self.precision_bits = precision_bits
+        self.histograms = {}
+
+    def record(self, operation, value):
+        histogram = self.histograms.get(operation)
+        if histogram is None:
+            histogram = self.histograms[operation] = LatencyHistogram(self.precision_bits)
+        histogram.record(value)
+
+    def time(self, operation, function, *args):
+        """Call function(*args), record how long it took under operation and return its result"""
+        start = time.perf_counter_ns()
+        result = function(*args)
+        self.record(operation, time.perf_counter_ns() - start)
+        return result
+
+    def merge(self, other):
+        for operation, histogram in other.histograms.items():
+            if operation in self.histograms:
+                self.histograms[operation].merge(histogram)
+            else:
+                self.histograms[operation] = LatencyHistogram(histogram.precision_bits).merge(histogram)
+        return self
+
+    def summary(self):
+        return {operation: histogram.summary() for operation, histogram in self.histograms.items()}
+
+    def to_dict(self):
+        return {operation: histogram.to_dict() for operation, histogram in self.histograms.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        recorder = cls()
+        for operation, histogram in data.items():
+            recorder.histograms[operation] = LatencyHistogram.from_dict(histogram)
+        if recorder.histograms:
+            recorder.precision_bits = next(iter(recorder.histograms.values())).precision_bits
+        return recorder
+
+
+def format_summary(summary):
+    """One line of percentiles in microseconds"""
+    columns = [f"{name} {summary[name] / 1000:.1f}" for name in
+               [f"p{percentile:g}" for percentile in PERCENTILES] + ["max"]]
+    return f"{summary['count']} ops, " + ", ".join(columns) + " us"
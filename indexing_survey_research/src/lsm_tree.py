@@ -1,119 +1,1026 @@
 import bisect
+import heapq
+import itertools
+import os
+import threading
+import time
+import numpy as np
+from bloom_filter import BloomFilter, bloom_hash
+from sstable_file import DiskSSTable, new_block_cache
+from compaction import COMPACTION_STRATEGIES, level_entries
+from memtable import SortedMemtable
+from wal import WriteAheadLog, RANGE_DELETE
+
+# How long a writer yields to the background threads once level 0 passes the slowdown trigger
+WRITE_SLOWDOWN_SECONDS = 0.001
+# Value stored for a deleted key until compaction reaches the bottom of the tree
+TOMBSTONE = None
+# Bounds of the keys a columnar SSTable can hold
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+# Entries converted back to Python objects at a time when a columnar SSTable is iterated
+ITER_CHUNK_ENTRIES = 1024
+
+class SSTable:
+    """Immutable sorted run of (key, value) pairs with an optional Bloom filter.
+    
+    When every key is an int that fits in 64 bits (and columnar is set)
+    the run is stored as columns: keys is a contiguous int64 NumPy array
+    and values a list holding the value of keys[i] at position i, so
+    lookups run in np.searchsorted. Otherwise entries holds the
+    (key, value) tuples and keys is None.
+    """
+    def __init__(self, entries, bloom_bits_per_key=None, range_tombstones=(), columnar=True):
+        self.entries = entries
+        self.keys = None
+        self.values = None
+        if columnar:
+            self.keys = int64_keys([key for key, _ in entries])
+            if self.keys is not None:
+                self.values = [value for _, value in entries]
+                self.entries = None
+        # (low, high) key ranges this table deletes from older tables
+        self.range_tombstones = list(range_tombstones)
+        self.num_reads = 0
+        self._build_bloom(bloom_bits_per_key)
+        
+    @classmethod
+    def from_columns(cls, keys, values, bloom_bits_per_key=None, range_tombstones=()):
+        """Build a columnar table from a sorted int64 key array and the matching values"""
+        table = cls([], None, range_tombstones)
+        table.keys = keys
+        table.values = values
+        table._build_bloom(bloom_bits_per_key)
+        return table
+        
+    def _build_bloom(self, bloom_bits_per_key):
+        self.bloom = None
+        if bloom_bits_per_key:
+            self.bloom = BloomFilter(len(self), bloom_bits_per_key)
+            # Filters hash Python ints, not NumPy scalars
+            keys = self.keys.tolist() if self.keys is not None else (key for key, _ in self.entries)
+            for key in keys:
+                self.bloom.add(key)
+                
+    def __len__(self):
+        return len(self.keys) if self.keys is not None else len(self.entries)
+        
+    def __iter__(self):
+        if self.keys is not None:
+            return self._iter_columns(0)
+        return iter(self.entries)
+        
+    def _iter_columns(self, start):
+        # Convert keys back to Python ints a chunk at a time, so an early stop stays cheap
+        for i in range(start, len(self.keys), ITER_CHUNK_ENTRIES):
+            yield from zip(self.keys[i:i + ITER_CHUNK_ENTRIES].tolist(), self.values[i:i + ITER_CHUNK_ENTRIES])
+            
+    def get(self, key):
+        """Return (found, value); the whole table counts as one read"""
+        self.num_reads += 1
+        return self._lookup(key)
+        
+    def _lookup(self, key):
+        if self.keys is not None:
+            idx = int(np.searchsorted(self.keys, key))
+            if idx < len(self.keys) and self.keys[idx] == key:
+                return True, self.values[idx]
+            return False, None
+        idx = bisect.bisect_left(self.entries, (key,))
+        if idx < len(self.entries) and self.entries[idx][0] == key:
+            return True, self.entries[idx][1]
+        return False, None
+        
+    def get_many(self, keys):
+        """Return {key: value} for the keys found here; the whole batch counts as one read"""
+        self.num_reads += 1
+        query = int64_keys(keys) if self.keys is not None else None
+        if query is None:
+            found = {}
+            for key in keys:
+                hit, value = self._lookup(key)
+                if hit:
+                    found[key] = value
+            return found
+            
+        # One vectorized search for the whole batch
+        positions = np.searchsorted(self.keys, query)
+        hits = positions < len(self.keys)
+        hits[hits] = self.keys[positions[hits]] == query[hits]
+        positions = positions.tolist()
+        return {keys[i]: self.values[positions[i]] for i in np.flatnonzero(hits).tolist()}
+        
+    def iter_from(self, low=None):
+        self.num_reads += 1
+        if self.keys is not None:
+            yield from self._iter_columns(0 if low is None else int(np.searchsorted(self.keys, low)))
+            return
+        start_idx = 0 if low is None else bisect.bisect_left(self.entries, (low,))
+        for i in range(start_idx, len(self.entries)):
+            yield self.entries[i]
+
+def int64_keys(keys):
+    """keys as an int64 NumPy array, or None unless every key is an int that fits"""
+    if not all(type(key) is int for key in keys):
+        return None
+    if keys and not (INT64_MIN <= min(keys) and max(keys) <= INT64_MAX):
+        return None
+    return np.array(keys, dtype=np.int64)
+
+def range_mask(keys, range_tombstones):
+    """Boolean mask of the int64 keys covered by one of the (low, high) range tombstones"""
+    ranges = coalesce_ranges(range_tombstones)
+    lows = np.array([low for low, _ in ranges])
+    highs = np.array([high for _, high in ranges])
+    # The ranges are disjoint and sorted, so only the first one ending at or after a key can cover it
+    idx = np.searchsorted(highs, keys)
+    covered = idx < len(ranges)
+    covered[covered] = lows[idx[covered]] <= keys[covered]
+    return covered
+
+def merge_runs(runs):
+    """Heap-based k-way merge of sorted (key, value) runs given newest first.
+    
+    Yields every key once, with the value from the newest run holding it,
+    and only pulls from a run when its current entry reaches the top of the
+    heap, so a caller that stops early leaves the rest of the runs unread.
+    """
+    heap = []
+    for rank, run in enumerate(runs):
+        it = iter(run)
+        entry = next(it, None)
+        if entry is not None:
+            # (key, rank) is unique, so values and iterators are never compared
+            heap.append((entry[0], rank, entry[1], it))
+    heapq.heapify(heap)
+    
+    last_key = None
+    emitted = False
+    while heap:
+        key, rank, value, it = heap[0]
+        # Equal keys pop newest (lowest rank) first; older versions are skipped
+        if not emitted or key != last_key:
+            yield key, value
+            last_key = key
+            emitted = True
+        entry = next(it, None)
+        if entry is None:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(heap, (entry[0], rank, entry[1], it))
+
+def coalesce_ranges(ranges):
+    """Sort (low, high) ranges and merge the ones that overlap"""
+    merged = []
+    for low, high in sorted(ranges):
+        if merged and low <= merged[-1][1]:
+            if high > merged[-1][1]:
+                merged[-1] = (merged[-1][0], high)
+        else:
+            merged.append((low, high))
+    return merged
+
+def range_deleted(range_tombstones, key):
+    """True if one of the (low, high) range tombstones covers key"""
+    return any(low <= key <= high for low, high in range_tombstones)
+
+def drop_range_deleted(entries, range_tombstones):
+    """Leave out the sorted (key, value) entries covered by a range tombstone"""
+    if not range_tombstones:
+        return entries
+    return _skip_ranges(entries, coalesce_ranges(range_tombstones))
+
+def _skip_ranges(entries, ranges):
+    i = 0
+    for entry in entries:
+        # Keys only grow, so the ranges are swept once
+        while i < len(ranges) and ranges[i][1] < entry[0]:
+            i += 1
+        if i < len(ranges) and ranges[i][0] <= entry[0]:
+            continue
+        yield entry
+
+class LSMTreeCursor:
+    """Lazy, ordered iterator over an LSMTree key range.
+    
+    Merges the memtables and every SSTable with merge_runs, so each key is
+    returned once with its newest value and SSTable blocks are only read as
+    the scan reaches them. Deleted keys are skipped: an entry is dropped if
+    its newest value is a tombstone or a newer source's range tombstone
+    covers it. position is the last key returned; passing it back to
+    LSMTree.scan as resume_from continues right after it.
+    num_random_reads counts the SSTable reads made so far.
+    
+    The cursor works on the set of tables current when it was created. In
+    background mode those tables are kept alive until the cursor is
+    exhausted or closed.
+    """
+    def __init__(self, tree, low=None, high=None, limit=None, resume_from=None):
+        self.tree = tree
+        self.low = low
+        self.high = high
+        self.limit = limit
+        self.position = resume_from
+        self.returned = 0
+        
+        start = resume_from if resume_from is not None else low
+        self.num_random_reads = 0
+        with tree._lock:
+            active = tree.memtable.iter_from(start)
+            if tree.background:
+                # Writers keep changing the active memtable, so copy the range now
+                active = list(itertools.takewhile(lambda entry: high is None or entry[0] <= high, active))
+            active_tombstones = list(tree.memtable.range_tombstones)
+            immutables, self.runs = tree._pin_snapshot()
+        sources = [(active, active_tombstones)]
+        sources += [(memtable.iter_from(start), memtable.range_tombstones) for memtable in reversed(immutables)]
+        sources += [(self._counted(run, start), run.range_tombstones) for run in reversed(self.runs)]
+        
+        # A range tombstone hides entries of the older sources only
+        ranges = []
+        filtered = []
+        for entries, tombstones in sources:
+            filtered.append(drop_range_deleted(entries, ranges))
+            ranges = ranges + tombstones
+        self._entries = merge_runs(filtered)
+        
+    def _counted(self, run, start):
+        """Iterate run from start, charging its reads to this cursor"""
+        entries = run.iter_from(start)
+        while True:
+            reads = run.num_reads
+            entry = next(entries, None)
+            self.num_random_reads += run.num_reads - reads
+            if entry is None:
+                return
+            yield entry
+            
+    def __iter__(self):
+        return self
+        
+    def __next__(self):
+        if self.limit is not None and self.returned >= self.limit:
+            self.close()
+            raise StopIteration
+        for key, value in self._entries:
+            if self.high is not None and key > self.high:
+                break
+            if self.position is not None and key <= self.position:
+                continue
+            if value is TOMBSTONE:
+                continue
+            self.position = key
+            self.returned += 1
+            return key, value
+        self.close()
+        raise StopIteration
+        
+    def close(self):
+        """Stop the scan and release its tables"""
+        # Drop the merge so no further runs are read
+        self._entries = iter(())
+        if self.runs is not None:
+            self.tree._release(self.runs)
+            self.runs = None
 
 class LSMTree:
-    def __init__(self, memtable_size_threshold=100):
-        self.memtable = {}
-        self.sstables = []  # List of sorted key-value pairs
+    """Log-structured merge tree.
+    
+    By default SSTables are sorted lists in memory and every table probed
+    counts as one random read. Given a directory, SSTables are written as
+    files (see sstable_file) and num_random_reads counts the data blocks
+    actually read; with block_cache_blocks those reads go through a shared
+    LRU block cache and hits are counted in num_cache_hits instead.
+    The MANIFEST file records which tables make up each level, so the tree
+    can be reopened from its directory.
+    
+    SSTables are organised in levels (see compaction); the compaction
+    strategy and its options are chosen with compaction and
+    compaction_options.
+    
+    The memtable is flushed once it holds memtable_size_threshold entries
+    or memtable_bytes_threshold bytes of keys and values, whichever comes
+    first; either limit can be None.
+    
+    With background=True a full memtable is frozen onto a queue of
+    immutable memtables and inserts carry on in a fresh one, while a flush
+    thread writes the queue out and a compaction thread runs the
+    compaction strategy. The table set is replaced, never modified in
+    place, so every read sees one consistent version, and tables a reader
+    still uses are deleted only after it is done. Writers are slowed once
+    level 0 holds l0_slowdown_trigger runs and stalled while it holds
+    l0_stop_trigger runs or max_immutable_memtables memtables are queued.
+    
+    With wal_sync set (file-backed trees only) every write is first
+    appended to a write-ahead log (see wal) using that sync mode, and
+    reopening the directory replays unflushed writes into the memtable.
+    
+    delete() writes a tombstone (the value None, so inserting None also
+    deletes) and delete_range() a single range tombstone covering every
+    key in [low, high]. A range tombstone hides older data in the tables
+    below it but not newer writes. Both kinds are carried down by
+    compaction and dropped, together with the data they shadow, once a
+    merge writes the oldest run of the tree.
+    
+    In-memory SSTables of integer keys are columnar (see SSTable) unless
+    columnar is False; merges of columnar runs and search_many are then
+    vectorized with NumPy.
+    """
+    def __init__(self, memtable_size_threshold=100, bloom_bits_per_key=10, directory=None,
+                 block_size=4096, block_cache_blocks=None, compression=None,
+                 compaction="simple", compaction_options=None, memtable_bytes_threshold=None,
+                 background=False, max_immutable_memtables=2, l0_slowdown_trigger=8,
+                 l0_stop_trigger=12, wal_sync=None, wal_group_commit_bytes=1 << 20,
+                 wal_group_commit_interval=0.005, columnar=True):
+        if compaction not in COMPACTION_STRATEGIES:
+            raise ValueError(f"unknown compaction strategy {compaction!r}, expected one of {sorted(COMPACTION_STRATEGIES)}")
+        if memtable_size_threshold is None and memtable_bytes_threshold is None:
+            raise ValueError("need a memtable entry or byte threshold")
+        if wal_sync is not None and directory is None:
+            raise ValueError("a write-ahead log needs a directory")
+        self.memtable = SortedMemtable()
+        # levels[0] receives flushes; each level lists its runs oldest first.
+        # The list is replaced rather than modified, so readers can hold a version.
+        self.levels = [[]]
         self.memtable_size_threshold = memtable_size_threshold
+        self.memtable_bytes_threshold = memtable_bytes_threshold
+        self.num_flushes = 0
+        self.compaction_strategy = COMPACTION_STRATEGIES[compaction](
+            memtable_size_threshold, **(compaction_options or {}))
+        # 0 or None builds SSTables without Bloom filters
+        self.bloom_bits_per_key = bloom_bits_per_key
+        self.columnar = columnar
         self.num_sequential_writes = 0
         self.num_random_reads = 0
+        self.num_cache_hits = 0
+        
+        # Cumulative totals for amplification: entries inserted, and entries
+        # written into each level by flushes and compactions
+        self.num_entries_inserted = 0
+        self.level_writes = [0]
+        
+        # Cumulative filter outcomes over all searches
+        self.bloom_negatives = 0
+        self.bloom_true_positives = 0
+        self.bloom_false_positives = 0
+        
+        # Guards the memtables, the table set and the counters shared with
+        # the background threads; _changed is notified whenever they move on
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self.background = background
+        self.immutable_memtables = []  # Frozen memtables waiting to be flushed, oldest first
+        self.max_immutable_memtables = max_immutable_memtables
+        self.l0_slowdown_trigger = l0_slowdown_trigger
+        self.l0_stop_trigger = l0_stop_trigger
+        self.num_write_slowdowns = 0
+        self.num_write_stalls = 0
+        self.write_stall_seconds = 0.0
+        self._pins = {}  # Readers per SSTable, background mode only
+        self._obsolete = set()  # Compacted-away tables still pinned by readers
+        self._compaction_pending = False
+        self._compacting = False
+        self._stopping = False
+        self._background_error = None
+        self._workers = []
+        
+        self.directory = directory
+        self.block_size = block_size
+        self.compression = compression
+        self.block_cache = None
+        self._next_table_id = 0
+        if directory is not None:
+            if block_cache_blocks is not None:
+                self.block_cache = new_block_cache(block_cache_blocks)
+            os.makedirs(directory, exist_ok=True)
+            self._load_manifest()
+            
+        self.wal = None
+        if wal_sync is not None:
+            self.wal = WriteAheadLog(directory, wal_sync, wal_group_commit_bytes, wal_group_commit_interval)
+            # Crash recovery: writes that never reached an SSTable
+            for key, value in self.wal.replay():
+                if key is RANGE_DELETE:
+                    self.memtable.delete_range(*value)
+                else:
+                    self.memtable.put(key, value)
+                
+        if background:
+            for target in (self._flush_worker, self._compaction_worker):
+                worker = threading.Thread(target=target, daemon=True)
+                worker.start()
+                self._workers.append(worker)
+                
+    @property
+    def sstables(self):
+        """Every SSTable, oldest first: deepest level first, then oldest run first"""
+        return [run for level in reversed(self.levels) for run in level]
+        
+    def _manifest_path(self):
+        return os.path.join(self.directory, "MANIFEST")
+        
+    def _load_manifest(self):
+        if not os.path.exists(self._manifest_path()):
+            return
+        with open(self._manifest_path()) as f:
+            # One line per level, listing that level's table files oldest first
+            self.levels = [[DiskSSTable(os.path.join(self.directory, name), self.block_cache)
+                            for name in line.split()] for line in f.read().splitlines()]
+        self.level_writes = [0] * len(self.levels)
+        for run in self.sstables:
+            self._next_table_id = max(self._next_table_id, int(os.path.basename(run.path)[:-4]) + 1)
+            
+    def _save_manifest(self):
+        if self.directory is None:
+            return
+        tmp_path = self._manifest_path() + ".tmp"
+        with open(tmp_path, "w") as f:
+            for level in self.levels:
+                f.write(" ".join(os.path.basename(run.path) for run in level) + "\n")
+        # Atomic switch to the new table set
+        os.replace(tmp_path, self._manifest_path())
         
     def _reset_counters(self):
         self.num_sequential_writes = 0
         self.num_random_reads = 0
+        self.num_cache_hits = 0
+        
+    def _new_sstable(self, entries, num_keys, range_tombstones=()):
+        """Build an SSTable from sorted entries, in memory or as a new file.
+        
+        Returns None when there are neither entries nor range tombstones.
+        """
+        entries = iter(entries)
+        first = next(entries, None)
+        if first is None and not range_tombstones:
+            return None
+        if first is not None:
+            entries = itertools.chain([first], entries)
+        if self.directory is None:
+            return SSTable(list(entries), self.bloom_bits_per_key, range_tombstones, self.columnar)
+        with self._lock:
+            table_id = self._next_table_id
+            self._next_table_id += 1
+        path = os.path.join(self.directory, f"{table_id:08d}.sst")
+        return DiskSSTable.write(path, entries, num_keys, self.block_size, self.compression,
+                                 self.bloom_bits_per_key, self.block_cache, range_tombstones)
+        
+    def _drop_sstable(self, sstable):
+        if not isinstance(sstable, DiskSSTable):
+            return
+        with self._lock:
+            if self._pins.get(sstable):
+                # A reader still has it; _release deletes it afterwards
+                self._obsolete.add(sstable)
+                return
+        sstable.delete()
+        
+    def _pin_snapshot(self):
+        """Return the immutable memtables and SSTables a read should see.
         
+        Must be called with the lock held. In background mode the tables
+        are pinned until _release.
+        """
+        runs = self.sstables
+        if self.background:
+            for run in runs:
+                self._pins[run] = self._pins.get(run, 0) + 1
+        return list(self.immutable_memtables), runs
+        
+    def _release(self, runs):
+        if not self.background:
+            return
+        dropped = []
+        with self._lock:
+            for run in runs:
+                self._pins[run] -= 1
+                if not self._pins[run]:
+                    del self._pins[run]
+                    if run in self._obsolete:
+                        self._obsolete.discard(run)
+                        dropped.append(run)
+        for run in dropped:
+            run.delete()
+            
     def insert(self, key, value):
-        self.memtable[key] = value
+        if self.background:
+            with self._lock:
+                self._throttle_writes()
+                # Logged in memtable order; synced once the lock is released
+                ticket = self.wal.write([(key, value)]) if self.wal is not None else None
+                self.memtable.put(key, value)
+                self.num_entries_inserted += 1
+                if self._memtable_full():
+                    self._freeze_memtable()
+            self._commit_log(ticket)
+            return
+            
+        if self.wal is not None:
+            self.wal.append([(key, value)])
+        self.memtable.put(key, value)
+        self.num_entries_inserted += 1
         
-        if len(self.memtable) >= self.memtable_size_threshold:
+        if self._memtable_full():
+            self._flush_memtable()
+            
+    def insert_many(self, pairs):
+        """Insert a batch of (key, value) pairs with a single write-ahead log append"""
+        pairs = list(pairs)
+        # The whole batch lands in one memtable (and one log segment), so
+        # fullness is only checked once it is in
+        if self.background:
+            with self._lock:
+                self._throttle_writes()
+                ticket = self._apply_batch(pairs)
+                if self._memtable_full():
+                    self._freeze_memtable()
+            self._commit_log(ticket)
+            return
+            
+        self._commit_log(self._apply_batch(pairs))
+        if self._memtable_full():
             self._flush_memtable()
             
+    def delete(self, key):
+        """Delete key by writing a tombstone for it"""
+        self.insert(key, TOMBSTONE)
+        
+    def delete_range(self, low, high):
+        """Delete every key with low <= key <= high using one range tombstone"""
+        if self.background:
+            with self._lock:
+                self._throttle_writes()
+                ticket = self._apply_range_delete(low, high)
+                if self._memtable_full():
+                    self._freeze_memtable()
+            self._commit_log(ticket)
+            return
+            
+        self._commit_log(self._apply_range_delete(low, high))
+        if self._memtable_full():
+            self._flush_memtable()
+            
+    def _apply_range_delete(self, low, high):
+        """Log and apply a range delete, returning the log's commit ticket (lock held in background mode)"""
+        ticket = self.wal.write_range_delete(low, high) if self.wal is not None else None
+        self.memtable.delete_range(low, high)
+        self.num_entries_inserted += 1
+        return ticket
+        
+    def _apply_batch(self, pairs):
+        """Log and apply a batch, returning the log's commit ticket (lock held in background mode)"""
+        ticket = self.wal.write(pairs) if self.wal is not None else None
+        for key, value in pairs:
+            self.memtable.put(key, value)
+        self.num_entries_inserted += len(pairs)
+        return ticket
+        
+    def _commit_log(self, ticket):
+        """Sync the log up to ticket; called without the lock so fsyncs do not block readers"""
+        if ticket is not None:
+            self.wal.commit(ticket)
+        
+    def _memtable_full(self):
+        if self.memtable_size_threshold is not None and len(self.memtable) >= self.memtable_size_threshold:
+            return True
+        return self.memtable_bytes_threshold is not None and self.memtable.size_bytes >= self.memtable_bytes_threshold
+        
+    def _throttle_writes(self):
+        """Slow down or stall a writer while the background threads fall behind (lock held)"""
+        self._check_background_error()
+        if self.l0_slowdown_trigger <= len(self.levels[0]) < self.l0_stop_trigger:
+            # Soft limit: yield to the compactor for a moment on every write
+            self.num_write_slowdowns += 1
+            self._changed.wait(WRITE_SLOWDOWN_SECONDS)
+        if self._must_stall():
+            self.num_write_stalls += 1
+            start_time = time.perf_counter()
+            while self._must_stall():
+                self._changed.wait()
+                self._check_background_error()
+            self.write_stall_seconds += time.perf_counter() - start_time
+            
+    def _must_stall(self):
+        return (len(self.levels[0]) >= self.l0_stop_trigger
+                or len(self.immutable_memtables) >= self.max_immutable_memtables)
+                
+    def _check_background_error(self):
+        if self._background_error is not None:
+            raise RuntimeError("LSMTree background flush or compaction failed") from self._background_error
+            
+    def _seal_memtable(self):
+        """Stop logging into the active memtable's WAL segment"""
+        if self.wal is not None:
+            self.memtable.wal_segment = self.wal.rotate()
+            
+    def _freeze_memtable(self):
+        """Queue the active memtable for the flush thread (lock held)"""
+        self._seal_memtable()
+        self.immutable_memtables = self.immutable_memtables + [self.memtable]
+        self.memtable = SortedMemtable()
+        self._changed.notify_all()
+        
     def _flush_memtable(self):
+        if self.background:
+            with self._lock:
+                if self.memtable:
+                    self._freeze_memtable()
+            return
         if not self.memtable:
             return
             
-        # Create sorted SSTable from memtable
-        sorted_entries = sorted(self.memtable.items())
-        self.sstables.append(sorted_entries)
-        
-        # Simulate sequential write (size of data written)
-        self.num_sequential_writes += len(sorted_entries)
+        self._seal_memtable()
+        self._flush(self.memtable)
+        self.memtable = SortedMemtable()
+        self._compact()
         
-        self.memtable = {}
+    def _flush(self, memtable):
+        """Write a memtable out as a new level-0 SSTable"""
+        # The memtable is already sorted, so building the SSTable is a linear dump
+        sorted_entries = list(memtable.items())
+        sstable = self._new_sstable(sorted_entries, len(sorted_entries), memtable.range_tombstones)
         
-        # Simple compaction: merge if too many SSTables
-        if len(self.sstables) > 3:
-            self._compact()
+        with self._lock:
+            # The table and the memtable it replaces swap in one step
+            self.levels = [self.levels[0] + [sstable]] + self.levels[1:]
+            self.immutable_memtables = [frozen for frozen in self.immutable_memtables
+                                        if frozen is not memtable]
+            
+            # Simulate sequential write (size of data written)
+            self.num_sequential_writes += len(sorted_entries)
+            self.level_writes[0] += len(sorted_entries)
+            
+            self.num_flushes += 1
+            if self.memtable_size_threshold is None:
+                # Byte-triggered flushes vary in entries; size levels by the average flush
+                self.compaction_strategy.base_entries = self.level_writes[0] / self.num_flushes
+            self._save_manifest()
+            self._compaction_pending = True
+            self._changed.notify_all()
+            
+        # The memtable is now safely in an SSTable, so its log can go
+        if self.wal is not None:
+            self.wal.delete_segments(memtable.wal_segment)
             
     def _compact(self):
-        if len(self.sstables) < 2:
-            return
+        """Run the merges chosen by the compaction strategy until it is satisfied"""
+        while self._compact_once():
+            pass
+            
+    def _compact_once(self):
+        with self._lock:
+            task = self.compaction_strategy.pick(self.levels)
+            if task is None:
+                return False
+            source_level, source_runs, target_level, target_runs = task
+            inputs = target_runs + source_runs  # oldest first
+            bottom = self._is_bottom_merge(target_level, inputs)
+            
+        # The merge reads immutable tables, so it runs without the lock
+        if len(inputs) > 1:
+            # At the bottom there is nothing older left to delete from
+            range_tombstones = [] if bottom else coalesce_ranges(
+                [tombstone for run in inputs for tombstone in run.range_tombstones])
+            if all(isinstance(run, SSTable) and run.keys is not None for run in inputs):
+                keys, values = self._merge_columnar(inputs, drop_tombstones=bottom)
+                merged = None
+                if len(keys) or range_tombstones:
+                    merged = SSTable.from_columns(keys, values, self.bloom_bits_per_key, range_tombstones)
+            else:
+                merged = self._new_sstable(self._merge_runs(inputs, drop_tombstones=bottom),
+                                           sum(len(run) for run in inputs), range_tombstones)
+        else:
+            # Nothing to merge with: move the run down without rewriting it
+            merged = inputs[0] if inputs else None
             
-        # Merge the two oldest SSTables
-        merged = self._merge_sstables(self.sstables[0], self.sstables[1])
-        self.sstables = self.sstables[2:] + [merged]
+        with self._lock:
+            levels = [list(level) for level in self.levels]
+            while len(levels) <= target_level:
+                levels.append([])
+                self.level_writes.append(0)
+            if inputs:
+                # The merged run takes the place of the rewritten runs of the target
+                # level, or becomes its newest run if none of them are rewritten.
+                # A merge that deleted everything leaves no run at all.
+                target = levels[target_level]
+                positions = [i for i, run in enumerate(target) if any(run is old for old in inputs)]
+                position = positions[0] if positions else len(target)
+                for level in (source_level, target_level):
+                    levels[level] = [run for run in levels[level] if not any(run is old for old in inputs)]
+                if merged is not None:
+                    levels[target_level].insert(position, merged)
+            self.levels = levels
+            
+            if len(inputs) > 1 and merged is not None:
+                # Count the write of merged data
+                self.num_sequential_writes += len(merged)
+                self.level_writes[target_level] += len(merged)
+            self._save_manifest()
+            self._changed.notify_all()
+            
+        if len(inputs) > 1:
+            for run in inputs:
+                self._drop_sstable(run)
+        return True
+        
+    def _is_bottom_merge(self, target_level, inputs):
+        """True if no run older than the merge output will remain (lock held)"""
+        if any(self.levels[target_level + 1:]):
+            return False
+        # Runs are oldest first, so only the oldest target run needs checking
+        target = self.levels[target_level] if target_level < len(self.levels) else []
+        return not target or any(target[0] is run for run in inputs)
+        
+    def _flush_worker(self):
+        self._run_worker(self._flush_next)
+        
+    def _flush_next(self):
+        with self._lock:
+            while not self.immutable_memtables and not self._stopping:
+                self._changed.wait()
+            if not self.immutable_memtables:
+                return False
+            memtable = self.immutable_memtables[0]
+        self._flush(memtable)
+        return True
+        
+    def _compaction_worker(self):
+        self._run_worker(self._compact_next)
+        
+    def _compact_next(self):
+        with self._lock:
+            while not self._compaction_pending and not self._stopping:
+                self._changed.wait()
+            if not self._compaction_pending:
+                return False
+            self._compaction_pending = False
+            self._compacting = True
+        try:
+            self._compact()
+        finally:
+            with self._lock:
+                self._compacting = False
+                self._changed.notify_all()
+        return True
+        
+    def _run_worker(self, step):
+        try:
+            while step():
+                pass
+        except BaseException as error:
+            with self._lock:
+                self._background_error = error
+                self._changed.notify_all()
+                
+    def wait_for_background_work(self):
+        """Block until every queued flush and the compactions it triggered are done"""
+        with self._lock:
+            while self.immutable_memtables or self._compaction_pending or self._compacting:
+                self._check_background_error()
+                self._changed.wait()
+            self._check_background_error()
+            
+    def _merge_runs(self, runs, drop_tombstones=False):
+        """Merge sorted runs given oldest first; later runs win on equal keys.
+        
+        Entries covered by a newer run's range tombstone are left out, and
+        with drop_tombstones so are tombstones themselves.
+        """
+        newest_first = []
+        ranges = []
+        for run in reversed(runs):
+            newest_first.append(drop_range_deleted(run, ranges))
+            ranges = ranges + run.range_tombstones
+        if len(runs) == 2:
+            # A plain two-way merge avoids the heap overhead
+            merged = self._merge_sstables(newest_first[1], newest_first[0])
+        else:
+            merged = merge_runs(newest_first)
+        if drop_tombstones:
+            return (entry for entry in merged if entry[1] is not TOMBSTONE)
+        return merged
+        
+    def _merge_columnar(self, runs, drop_tombstones=False):
+        """Vectorized _merge_runs for columnar SSTables; returns the (keys, values) columns"""
+        columns = []
+        ranges = []
+        for run in reversed(runs):
+            keys, values = run.keys, run.values
+            if ranges:
+                # Drop what a newer run's range tombstones delete
+                keep = ~range_mask(keys, ranges)
+                keys = keys[keep]
+                values = list(itertools.compress(values, keep.tolist()))
+            columns.append((keys, values))
+            ranges = ranges + run.range_tombstones
+        columns.reverse()
+        
+        # Concatenated oldest first, a stable sort leaves the newest version
+        # of every key last among its equals
+        keys = np.concatenate([keys for keys, _ in columns])
+        values = [value for _, run_values in columns for value in run_values]
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        newest = np.ones(len(keys), dtype=bool)
+        newest[:-1] = keys[1:] != keys[:-1]
+        keys = keys[newest]
+        values = [values[i] for i in order[newest].tolist()]
         
-        # Count the write of merged data
-        self.num_sequential_writes += len(merged)
+        if drop_tombstones:
+            live = [value is not TOMBSTONE for value in values]
+            keys = keys[np.array(live, dtype=bool)]
+            values = list(itertools.compress(values, live))
+        return keys, values
         
     def _merge_sstables(self, sstable1, sstable2):
-        """Merge two sorted SSTables, removing duplicates (newer values win)"""
-        merged = []
-        i, j = 0, 0
-        
-        while i < len(sstable1) and j < len(sstable2):
-            if sstable1[i][0] < sstable2[j][0]:
-                merged.append(sstable1[i])
-                i += 1
-            elif sstable1[i][0] > sstable2[j][0]:
-                merged.append(sstable2[j])
-                j += 1
+        """Merge two sorted SSTables, removing duplicates (newer values win).
+        
+        Works on any sorted iterables of (key, value) and yields the merged
+        entries, so file-backed tables are streamed rather than loaded.
+        """
+        it1, it2 = iter(sstable1), iter(sstable2)
+        entry1, entry2 = next(it1, None), next(it2, None)
+        
+        while entry1 is not None and entry2 is not None:
+            if entry1[0] < entry2[0]:
+                yield entry1
+                entry1 = next(it1, None)
+            elif entry1[0] > entry2[0]:
+                yield entry2
+                entry2 = next(it2, None)
             else:
                 # Keys are equal, take the newer one (from sstable2)
-                merged.append(sstable2[j])
-                i += 1
-                j += 1
+                yield entry2
+                entry1, entry2 = next(it1, None), next(it2, None)
                 
         # Add remaining entries
-        merged.extend(sstable1[i:])
-        merged.extend(sstable2[j:])
-        
-        return merged
-        
+        if entry1 is not None:
+            yield entry1
+            yield from it1
+        if entry2 is not None:
+            yield entry2
+            yield from it2
+            
     def search(self, key):
         self._reset_counters()
         
-        # Check memtable first
-        if key in self.memtable:
-            return self.memtable[key], self.num_random_reads
-            
-        # Check SSTables from newest to oldest
-        for sstable in reversed(self.sstables):
-            self.num_random_reads += 1  # Simulate random I/O to access SSTable
+        # Check memtables first, newest to oldest
+        with self._lock:
+            found, value = self.memtable.get(key)
+            if found or range_deleted(self.memtable.range_tombstones, key):
+                return value, self.num_random_reads
+            immutables, runs = self._pin_snapshot()
+        try:
+            for memtable in reversed(immutables):
+                found, value = memtable.get(key)
+                if found or range_deleted(memtable.range_tombstones, key):
+                    return value, self.num_random_reads
+            return self._search_sstables(key, runs), self.num_random_reads
+        finally:
+            self._release(runs)
             
-            # Binary search in the sorted SSTable
-            idx = bisect.bisect_left(sstable, (key,))
-            if idx < len(sstable) and sstable[idx][0] == key:
-                return sstable[idx][1], self.num_random_reads
-                
-        return None, self.num_random_reads
+    def search_many(self, keys):
+        """Look up a batch of keys, probing every table once for the whole batch.
         
-    def range_query(self, low, high):
+        In-memory tables answer the batch with one (for columnar tables
+        vectorized) search and count one read each; their filters are
+        skipped, as hashing every key would cost more than the search.
+        File-backed tables filter the batch first and read each data block
+        they need once. Returns the values in input order (None for missing
+        or deleted keys) and the read count for the batch.
+        """
         self._reset_counters()
-        results = []
+        keys = list(keys)
+        resolved = {}
+        pending = set(keys)
+        with self._lock:
+            self._resolve_in_memtable(self.memtable, pending, resolved)
+            immutables, runs = self._pin_snapshot()
+        try:
+            for memtable in reversed(immutables):
+                self._resolve_in_memtable(memtable, pending, resolved)
+            key_hashes = {}
+            for sstable in reversed(runs):
+                if not pending:
+                    break
+                probe = list(pending)
+                if isinstance(sstable, DiskSSTable) and sstable.bloom is not None:
+                    for key in probe:
+                        if key not in key_hashes:
+                            key_hashes[key] = bloom_hash(key)
+                    probe = [key for key in probe if sstable.bloom.might_contain(key, key_hashes[key])]
+                    self.bloom_negatives += len(pending) - len(probe)
+                    
+                reads = sstable.num_reads
+                found = sstable.get_many(probe) if probe else {}
+                self.num_random_reads += sstable.num_reads - reads
+                if isinstance(sstable, DiskSSTable) and sstable.bloom is not None:
+                    self.bloom_true_positives += len(found)
+                    self.bloom_false_positives += len(probe) - len(found)
+                resolved.update(found)
+                pending.difference_update(found)
+                
+                # The table's own entries are newer than its range tombstones
+                if sstable.range_tombstones:
+                    pending = {key for key in pending if not range_deleted(sstable.range_tombstones, key)}
+        finally:
+            self._release(runs)
+        return [resolved.get(key) for key in keys], self.num_random_reads
         
-        # Check memtable
-        for key, value in self.memtable.items():
-            if low <= key <= high:
-                results.append((key, value))
+    def _resolve_in_memtable(self, memtable, pending, resolved):
+        for key in list(pending):
+            found, value = memtable.get(key)
+            if found or range_deleted(memtable.range_tombstones, key):
+                resolved[key] = value
+                pending.discard(key)
                 
-        # Check all SSTables
-        for sstable in self.sstables:
-            self.num_random_reads += 1
-            
-            # Find start position
-            start_idx = bisect.bisect_left(sstable, (low,))
-            for i in range(start_idx, len(sstable)):
-                key, value = sstable[i]
-                if key <= high:
-                    results.append((key, value))
-                else:
+    def _search_sstables(self, key, runs):
+        # Hash once and reuse it for every table's filter
+        key_hash = bloom_hash(key) if self.bloom_bits_per_key else None
+        cache_hits = self.block_cache.hits if self.block_cache is not None else 0
+        
+        # Check SSTables from newest to oldest
+        found, value = False, None
+        for sstable in reversed(runs):
+            if sstable.bloom is not None and not sstable.bloom.might_contain(key, key_hash):
+                # Filter rules the table out without touching it
+                self.bloom_negatives += 1
+            else:
+                # In memory: one simulated random I/O; on disk: data blocks read
+                reads = sstable.num_reads
+                found, value = sstable.get(key)
+                self.num_random_reads += sstable.num_reads - reads
+                
+                if sstable.bloom is not None:
+                    if found:
+                        self.bloom_true_positives += 1
+                    else:
+                        self.bloom_false_positives += 1
+                if found:
                     break
                     
-        # Sort results by key (since they come from multiple sources)
-        results.sort(key=lambda x: x[0])
+            # The table's own entries are newer than its range tombstones
+            if range_deleted(sstable.range_tombstones, key):
+                break
+                
+        if self.block_cache is not None:
+            self.num_cache_hits = self.block_cache.hits - cache_hits
+        return value
+        
+    def bloom_false_positive_rate(self):
+        """Fraction of probes for absent keys that the filters let through"""
+        absent = self.bloom_negatives + self.bloom_false_positives
+        return self.bloom_false_positives / absent if absent else 0.0
+        
+    def range_query(self, low, high):
+        self._reset_counters()
+        cursor = self.scan(low, high)
+        results = list(cursor)
+        self.num_random_reads = cursor.num_random_reads
         return results, self.num_random_reads
         
+    def scan(self, low=None, high=None, limit=None, resume_from=None):
+        """Return a lazy cursor over keys in [low, high], newest value per key"""
+        return LSMTreeCursor(self, low, high, limit, resume_from)
+        
+    def level_sizes(self):
+        """Number of entries stored in each level"""
+        return [level_entries(level) for level in self.levels]
+        
+    def write_amplification(self):
+        """Entries written by flushes and compactions per entry inserted"""
+        return sum(self.level_writes) / self.num_entries_inserted if self.num_entries_inserted else 0.0
+        
+    def read_amplification(self):
+        """Runs a point lookup for an absent key may have to probe, ignoring filters"""
+        return len(self.sstables)
+        
+    def space_amplification(self):
+        """Entries and tombstones stored across all runs and the memtables per live key"""
+        stored = 0
+        for table in [self.memtable] + self.immutable_memtables + self.sstables:
+            stored += len(table) + len(table.range_tombstones)
+        live = sum(1 for _ in self.scan())
+        return stored / live if live else 0.0
+        
     def force_flush(self):
         """Force flush memtable to SSTable for benchmarking"""
         self._flush_memtable()
+        if self.background:
+            self.wait_for_background_work()
+            
+    def close(self):
+        """Flush the memtable so a file-backed tree can be reopened from its directory"""
+        if self.directory is not None:
+            self.force_flush()
+        if self.background:
+            with self._lock:
+                self._stopping = True
+                self._changed.notify_all()
+            for worker in self._workers:
+                worker.join()
+        if self.wal is not None:
+            self.wal.close()
+        for sstable in self.sstables:
+            if isinstance(sstable, DiskSSTable):
+                sstable.close()
@@ -0,0 +1,249 @@
+"""Memory footprint profiling for the index engines.
+
+memory_breakdown() walks everything an engine references and splits the
+bytes into nodes (the tree or table structure), keys, values and
+auxiliary structures (Bloom filters, sparse indexes, caches, logs and
+whatever else the engine holds). Each object is counted once, in the
+first category that reaches it, in the order values, keys, auxiliary,
+nodes. Only memory the engine holds is counted: for on-disk SSTables that
+is their indexes and filters, not the mapped file.
+
+profile_memory() builds an engine from a workload under tracemalloc,
+sampling the breakdown and the traced allocations as the data set grows,
+and records the peak extra allocation of every call to the engine's
+split, flush and compaction methods. Profile engines in foreground mode:
+tracemalloc's peak is process-wide, so the peaks of methods running on
+background threads would mix.
+"""
+import array
+import io
+import sys
+import threading
+import tracemalloc
+import types
+import numpy as np
+from b_plus_tree import BPlusTree
+from fractal_tree_sim import FractalTree
+from lsm_tree import LSMTree
+
+CATEGORIES = ("nodes", "keys", "values", "auxiliary")
+# Methods whose peak allocations are recorded, where an engine has them
+PROFILED_METHODS = ("_split_leaf", "_split_internal", "_flush_memtable", "_flush", "_compact", "_split_child")
+
+_ATOMS = (str, bytes, bytearray, int, float, complex, range, array.array, memoryview)
+# Shared or external objects that an engine refers to but does not own
+_OPAQUE = (type(None), bool, type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+           types.MethodType, threading.Thread, io.IOBase)
+
+
+def _slots(cls):
+    slots = cls.__dict__.get("__slots__", ())
+    return (slots,) if isinstance(slots, str) else slots
+
+
+def deep_sizeof_all(objects, seen):
+    """Bytes of objects and everything they reference that is not in seen, which is updated"""
+    total = 0
+    stack = list(objects)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _OPAQUE):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, _ATOMS):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif isinstance(obj, np.ndarray):
+            # An array that owns its data already counted it; a view counts its base
+            if obj.base is not None:
+                stack.append(obj.base)
+        else:
+            attributes = getattr(obj, "__dict__", None)
+            if attributes is not None:
+                stack.append(attributes)
+            for cls in type(obj).__mro__:
+                for slot in _slots(cls):
+                    if slot not in ("__dict__", "__weakref__") and hasattr(obj, slot):
+                        stack.append(getattr(obj, slot))
+    return total
+
+
+def deep_sizeof(obj, seen=None):
+    """Bytes of obj and everything it references, each object counted once"""
+    return deep_sizeof_all([obj], set() if seen is None else seen)
+
+
+def _b_plus_tree_parts(tree):
+    nodes = []
+    stack = [tree.root]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        if not node.is_leaf:
+            stack.extend(node.pointers)
+    return {
+        "values": [value for node in nodes if node.is_leaf for value in node.pointers],
+        "keys": [node.keys for node in nodes],
+        "auxiliary": [tree.buffer_pool],
+        "nodes": [tree.root],
+    }
+
+
+def _lsm_tree_parts(tree):
+    memtables = [tree.memtable] + list(tree.immutable_memtables)
+    runs = [run for level in tree.levels for run in level]
+    values = [value for memtable in memtables for block in memtable.block_values for value in block]
+    keys = [block for memtable in memtables for block in memtable.block_keys]
+    auxiliary = [memtable.maxes for memtable in memtables] + [tree.block_cache]
+    for run in runs:
+        auxiliary.append(run.bloom)
+        if getattr(run, "keys", None) is not None:
+            keys.append(run.keys)
+            values.extend(run.values)
+        elif getattr(run, "entries", None) is not None:
+            keys.extend(key for key, _ in run.entries)
+            values.extend(value for _, value in run.entries)
+        else:
+            # On disk: only the sparse index stays in memory
+            auxiliary.extend([run.first_keys, run.block_pointers])
+    return {"values": values, "keys": keys, "auxiliary": auxiliary,
+            "nodes": [tree.memtable, tree.immutable_memtables, tree.levels]}
+
+
+def _fractal_tree_parts(tree):
+    nodes = []
+    stack = [tree.root]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        if not node.is_leaf:
+            stack.extend(node.children)
+    values = []
+    keys = []
+    for node in nodes:
+        keys.append(node.keys)
+        if node.is_leaf:
+            values.extend(node.values)
+        else:
+            # Buffered messages are keys and values on their way down
+            keys.extend(node.buffer.keys())
+            values.extend(node.buffer.values())
+    return {"values": values, "keys": keys, "auxiliary": [], "nodes": [tree.root]}
+
+
+def memory_breakdown(engine):
+    """Bytes engine holds in nodes, keys, values and auxiliary structures"""
+    if isinstance(engine, BPlusTree):
+        parts = _b_plus_tree_parts(engine)
+    elif isinstance(engine, LSMTree):
+        parts = _lsm_tree_parts(engine)
+    elif isinstance(engine, FractalTree):
+        parts = _fractal_tree_parts(engine)
+    else:
+        # Unknown engines are reported as a whole
+        parts = {"nodes": [engine]}
+    seen = set()
+    breakdown = dict.fromkeys(CATEGORIES, 0)
+    for category in ("values", "keys", "auxiliary", "nodes"):
+        breakdown[category] = deep_sizeof_all(parts.get(category, ()), seen)
+    # Whatever else the engine references (configuration, counters, logs) is auxiliary
+    breakdown["auxiliary"] += deep_sizeof_all([engine], seen)
+    return breakdown
+
+
+class AllocationPeaks:
+    """Peak traced allocation during calls to chosen methods of an engine
+
+    attach() replaces the methods on the instance with wrappers that note
+    how far tracemalloc's traced memory rose above its level at the call.
+    Nested calls (a flush that compacts) are handled: the outer call's
+    peak includes the inner one's.
+    """
+
+    def __init__(self):
+        self.peaks = {}
+        self._stack = []
+        self._attached = []
+
+    def attach(self, engine, method_names=PROFILED_METHODS):
+        for name in method_names:
+            if hasattr(engine, name) and name not in vars(engine):
+                setattr(engine, name, self._wrap(name, getattr(engine, name)))
+                self._attached.append((engine, name))
+
+    def detach(self):
+        for engine, name in self._attached:
+            delattr(engine, name)
+        self._attached = []
+
+    def _wrap(self, name, method):
+        def traced(*args, **kwargs):
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # The enclosing call's peak so far, before the counter is reset
+                self._stack[-1][1] = max(self._stack[-1][1], peak)
+            tracemalloc.reset_peak()
+            self._stack.append([current, current])
+            try:
+                return method(*args, **kwargs)
+            finally:
+                start, peak = self._stack.pop()
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                self.peaks.setdefault(name, []).append(peak - start)
+                if self._stack:
+                    self._stack[-1][1] = max(self._stack[-1][1], peak)
+        return traced
+
+    def summary(self):
+        return {name: {"calls": len(peaks), "max_bytes": max(peaks), "mean_bytes": sum(peaks) / len(peaks)}
+                for name, peaks in self.peaks.items()}
+
+
+def profile_memory(create_engine, workload, num_samples=10, method_names=PROFILED_METHODS):
+    """Build an engine from workload under tracemalloc and sample its memory as it grows
+
+    create_engine is called with no arguments once tracing has started.
+    Returns {"samples": [...], "peaks": {...}}: one sample at each of
+    num_samples evenly spaced insert counts, with the engine's traced
+    allocations and its breakdown in bytes and bytes per key, and the
+    AllocationPeaks summary of method_names. Traced bytes only include
+    what was allocated after tracing started, so they leave out objects
+    the workload already held, such as its values, which the breakdown
+    counts.
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    engine = create_engine()
+    peaks = AllocationPeaks()
+    peaks.attach(engine, method_names)
+    checkpoints = {max(1, round(len(workload) * (i + 1) / num_samples)) for i in range(num_samples)}
+    samples = []
+    try:
+        for count, (key, value) in enumerate(workload, 1):
+            engine.insert(key, value)
+            if count in checkpoints:
+                # Read before walking, which allocates its own bookkeeping
+                traced = tracemalloc.get_traced_memory()[0] - baseline
+                breakdown = memory_breakdown(engine)
+                total = sum(breakdown.values())
+                sample = {"keys": count, "traced_bytes": traced, "traced_bytes_per_key": traced / count,
+                          "bytes": total, "bytes_per_key": total / count}
+                for category in CATEGORIES:
+                    sample[f"{category}_bytes"] = breakdown[category]
+                    sample[f"{category}_bytes_per_key"] = breakdown[category] / count
+                samples.append(sample)
+    finally:
+        peaks.detach()
+        close = getattr(engine, "close", None)
+        if close is not None:
+            close()
+        if not was_tracing:
+            tracemalloc.stop()
+    return {"samples": samples, "peaks": peaks.summary()}
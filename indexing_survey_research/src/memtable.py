@@ -0,0 +1,143 @@
+import bisect
+import sys
+
+# Two list slots (key and value) per entry, on top of the objects themselves
+ENTRY_OVERHEAD_BYTES = 16
+
+
+def entry_bytes(key, value):
+    """Approximate memory held by one memtable entry"""
+    return sys.getsizeof(key) + sys.getsizeof(value) + ENTRY_OVERHEAD_BYTES
+
+
+class SortedMemtable:
+    """Sorted in-memory write buffer for LSMTree.
+
+    Entries live in a list of sorted blocks of at most max_block keys, with
+    the last key of every block kept in maxes. An insert bisects maxes and
+    then one block, so it shifts at most max_block entries rather than the
+    whole table, and iteration is already in key order. size_bytes tracks
+    the memory held by keys and values so flushes can be triggered by size.
+
+    A deleted key is stored with the value None. delete_range() removes the
+    keys it covers from the table and records the range in
+    range_tombstones, where it hides older versions in other tables.
+    """
+    def __init__(self, max_block=256):
+        self.max_block = max_block
+        self.block_keys = []
+        self.block_values = []
+        self.maxes = []
+        self.num_entries = 0
+        self.size_bytes = 0
+        self.range_tombstones = []  # (low, high) pairs, both bounds inclusive
+        # Newest write-ahead log segment holding this memtable's writes, set when it is sealed
+        self.wal_segment = None
+
+    def __len__(self):
+        return self.num_entries
+
+    def __bool__(self):
+        # A table holding only range tombstones still has to be flushed
+        return bool(self.num_entries or self.range_tombstones)
+
+    def _block_for(self, key):
+        """Index of the block that holds or should hold key"""
+        b = bisect.bisect_left(self.maxes, key)
+        return b if b < len(self.maxes) else len(self.maxes) - 1
+
+    def put(self, key, value):
+        if not self.maxes:
+            self.block_keys.append([key])
+            self.block_values.append([value])
+            self.maxes.append(key)
+            # Keep the bytes of any range tombstones already recorded
+            self.num_entries += 1
+            self.size_bytes += entry_bytes(key, value)
+            return
+
+        b = self._block_for(key)
+        keys = self.block_keys[b]
+        values = self.block_values[b]
+        i = bisect.bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            # Overwrite: only the value's size changes
+            self.size_bytes += sys.getsizeof(value) - sys.getsizeof(values[i])
+            values[i] = value
+            return
+
+        keys.insert(i, key)
+        values.insert(i, value)
+        self.maxes[b] = keys[-1]
+        self.num_entries += 1
+        self.size_bytes += entry_bytes(key, value)
+
+        if len(keys) > self.max_block:
+            # Split the block in half to keep inserts cheap
+            mid = len(keys) // 2
+            self.block_keys.insert(b + 1, keys[mid:])
+            self.block_values.insert(b + 1, values[mid:])
+            del keys[mid:]
+            del values[mid:]
+            self.maxes.insert(b, keys[-1])
+
+    def delete_range(self, low, high):
+        """Drop every entry with low <= key <= high and record the range tombstone"""
+        self.range_tombstones.append((low, high))
+        self.size_bytes += entry_bytes(low, high)
+        b = bisect.bisect_left(self.maxes, low)
+        while b < len(self.maxes):
+            keys = self.block_keys[b]
+            values = self.block_values[b]
+            start = bisect.bisect_left(keys, low)
+            end = bisect.bisect_right(keys, high)
+            for i in range(start, end):
+                self.size_bytes -= entry_bytes(keys[i], values[i])
+            self.num_entries -= end - start
+            del keys[start:end]
+            del values[start:end]
+            if not keys:
+                del self.block_keys[b]
+                del self.block_values[b]
+                del self.maxes[b]
+                continue
+            self.maxes[b] = keys[-1]
+            if end < len(keys) + (end - start):
+                # The range ends inside this block
+                break
+            b += 1
+
+    def get(self, key):
+        """Return (found, value)"""
+        if not self.maxes:
+            return False, None
+        b = self._block_for(key)
+        keys = self.block_keys[b]
+        i = bisect.bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            return True, self.block_values[b][i]
+        return False, None
+
+    def __contains__(self, key):
+        return self.get(key)[0]
+
+    def iter_from(self, low=None):
+        """Yield (key, value) pairs with key >= low in key order"""
+        if not self.maxes:
+            return
+        b, i = 0, 0
+        if low is not None:
+            b = bisect.bisect_left(self.maxes, low)
+            if b == len(self.maxes):
+                return
+            i = bisect.bisect_left(self.block_keys[b], low)
+        for b in range(b, len(self.block_keys)):
+            yield from zip(self.block_keys[b][i:], self.block_values[b][i:])
+            i = 0
+
+    def items(self):
+        return self.iter_from(None)
+
+    def keys(self):
+        for keys in self.block_keys:
+            yield from keys
@@ -0,0 +1,387 @@
+import bisect
+import itertools
+import mmap
+import os
+import struct
+from buffer_pool import BufferPool
+
+# Page 0 holds the file header; every other page holds exactly one node.
+HEADER_FORMAT = "<8sIIqq"
+HEADER_MAGIC = b"BPTREE01"
+NODE_HEADER_FORMAT = "<BHq"  # is_leaf, number of keys, next leaf page
+NODE_HEADER_SIZE = struct.calcsize(NODE_HEADER_FORMAT)
+VALUE_LENGTH_FORMAT = "<H"
+VALUE_LENGTH_SIZE = struct.calcsize(VALUE_LENGTH_FORMAT)
+NO_PAGE = -1
+
+
+class PagedNode:
+    """Decoded copy of one node page. Child and sibling pointers are page numbers."""
+    __slots__ = ("page_id", "is_leaf", "keys", "pointers", "next")
+
+    def __init__(self, page_id, is_leaf=False):
+        self.page_id = page_id
+        self.is_leaf = is_leaf
+        self.keys = []
+        self.pointers = []
+        self.next = NO_PAGE
+
+
+class Pager:
+    """Fixed-size pages stored in a single memory-mapped file"""
+    def __init__(self, path, page_size=4096):
+        self.path = path
+        self.page_size = page_size
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self.file = open(path, "r+b" if exists else "w+b")
+        if not exists:
+            self.file.truncate(2 * page_size)
+        self.mm = mmap.mmap(self.file.fileno(), 0)
+        self.capacity = len(self.mm) // page_size
+        self.num_page_reads = 0
+        self.num_page_writes = 0
+
+    def read_page(self, page_id):
+        self.num_page_reads += 1
+        offset = page_id * self.page_size
+        return self.mm[offset:offset + self.page_size]
+
+    def write_page(self, page_id, data):
+        if len(data) > self.page_size:
+            raise ValueError(f"page {page_id} overflows: {len(data)} > {self.page_size} bytes")
+        if page_id >= self.capacity:
+            self._grow(page_id + 1)
+        self.num_page_writes += 1
+        offset = page_id * self.page_size
+        self.mm[offset:offset + len(data)] = data
+
+    def _grow(self, min_pages):
+        # Double the file so appends stay amortised O(1)
+        new_capacity = max(min_pages, 2 * self.capacity)
+        self.mm.close()
+        self.file.truncate(new_capacity * self.page_size)
+        self.mm = mmap.mmap(self.file.fileno(), 0)
+        self.capacity = new_capacity
+
+    def flush(self):
+        self.mm.flush()
+
+    def close(self):
+        self.mm.flush()
+        self.mm.close()
+        self.file.close()
+
+
+class PagedBPlusTree:
+    """B+Tree whose nodes live in fixed-size pages of a memory-mapped file.
+
+    Keys are signed 64-bit integers and values are strings, both encoded
+    with struct. Opening an existing file reuses its root and page count,
+    so the tree is available again without a rebuild. The header is
+    rewritten whenever a page is allocated, so a file that was not closed
+    still never hands out a page twice; with a buffer pool, dirty pages
+    only reach the file on eviction, flush() or close(). A leaf that
+    outgrows its page is split where both halves fit, or into three
+    pieces if no two do. num_read_ios and num_write_ios count real page
+    reads and writes; with a buffer pool those are the misses and
+    write-backs, and num_cache_hits the hits.
+    """
+    def __init__(self, path, order=None, page_size=4096, buffer_pool_pages=None,
+                 eviction_policy="lru"):
+        self.pager = Pager(path, page_size)
+        self.num_read_ios = 0
+        self.num_write_ios = 0
+        self.num_cache_hits = 0
+
+        # Pages pinned by the running operation, released by _unpin_all()
+        self.buffer_pool = None
+        self._pinned = []
+        if buffer_pool_pages is not None:
+            self.buffer_pool = BufferPool(buffer_pool_pages, eviction_policy,
+                                          load_page=self._load_page,
+                                          write_page=self._store_page)
+
+        magic, stored_page_size, stored_order, root_page, num_pages = struct.unpack_from(
+            HEADER_FORMAT, self.pager.mm, 0)
+        if magic == HEADER_MAGIC:
+            if stored_page_size != page_size:
+                raise ValueError(f"{path} uses {stored_page_size}-byte pages, not {page_size}")
+            self.order = stored_order
+            self.root_page = root_page
+            self.num_pages = num_pages
+            self.height = 1
+            node = self._decode_node(root_page, self.pager.read_page(root_page))
+            while not node.is_leaf:
+                node = self._decode_node(node.pointers[0], self.pager.read_page(node.pointers[0]))
+                self.height += 1
+        else:
+            # Largest fan-out whose internal node still fits in one page
+            max_order = (page_size - NODE_HEADER_SIZE - 8) // 16 + 1
+            self.order = order if order is not None else max_order
+            if not 3 <= self.order <= max_order:
+                raise ValueError(f"order must be between 3 and {max_order} for {page_size}-byte pages")
+            self.num_pages = 1
+            self.root_page = NO_PAGE
+            root = self._allocate_node(is_leaf=True)
+            self.root_page = root.page_id
+            self.height = 1
+            self._write_node(root)
+            self._write_header()
+        self._check_buffer_pool()
+
+    def _reset_counters(self):
+        self.num_read_ios = 0
+        self.num_write_ios = 0
+        self.num_cache_hits = 0
+
+    def _check_buffer_pool(self):
+        """An insert pins the root-to-leaf path and needs one more frame for a new page"""
+        if self.buffer_pool is not None and self.buffer_pool.capacity < self.height + 1:
+            raise ValueError(f"a buffer pool of {self.buffer_pool.capacity} pages cannot hold the "
+                             f"{self.height}-page root-to-leaf path plus a new page; "
+                             f"use at least {self.height + 1}")
+
+    def _write_header(self):
+        header = struct.pack(HEADER_FORMAT, HEADER_MAGIC, self.pager.page_size,
+                             self.order, self.root_page, self.num_pages)
+        self.pager.write_page(0, header)
+
+    def _allocate_node(self, is_leaf=False):
+        node = PagedNode(self.num_pages, is_leaf)
+        self.num_pages += 1
+        # Persist the page count at once so a reopened file never reuses the page
+        self._write_header()
+        return node
+
+    def _encode_node(self, node):
+        n = len(node.keys)
+        parts = [struct.pack(NODE_HEADER_FORMAT, node.is_leaf, n, node.next),
+                 struct.pack(f"<{n}q", *node.keys)]
+        if node.is_leaf:
+            for value in node.pointers:
+                data = value.encode("utf-8")
+                parts.append(struct.pack(VALUE_LENGTH_FORMAT, len(data)))
+                parts.append(data)
+        else:
+            parts.append(struct.pack(f"<{n + 1}q", *node.pointers))
+        return b"".join(parts)
+
+    def _decode_node(self, page_id, page):
+        is_leaf, n, next_page = struct.unpack_from(NODE_HEADER_FORMAT, page, 0)
+        node = PagedNode(page_id, bool(is_leaf))
+        node.next = next_page
+        offset = NODE_HEADER_SIZE
+        node.keys = list(struct.unpack_from(f"<{n}q", page, offset))
+        offset += 8 * n
+        if node.is_leaf:
+            for _ in range(n):
+                (length,) = struct.unpack_from(VALUE_LENGTH_FORMAT, page, offset)
+                offset += VALUE_LENGTH_SIZE
+                node.pointers.append(page[offset:offset + length].decode("utf-8"))
+                offset += length
+        else:
+            node.pointers = list(struct.unpack_from(f"<{n + 1}q", page, offset))
+        return node
+
+    def _load_page(self, page_id):
+        self.num_read_ios += 1
+        return self._decode_node(page_id, self.pager.read_page(page_id))
+
+    def _store_page(self, page_id, node):
+        self.num_write_ios += 1
+        self.pager.write_page(page_id, self._encode_node(node))
+
+    def _read_node(self, page_id):
+        """Read and decode a node page, pinning it if it is buffered"""
+        if self.buffer_pool is None:
+            return self._load_page(page_id)
+        hits = self.buffer_pool.hits
+        node = self.buffer_pool.fetch_page(page_id)
+        self._pinned.append(page_id)
+        self.num_cache_hits += self.buffer_pool.hits - hits
+        return node
+
+    def _write_node(self, node):
+        """Encode a node into its page, or mark its buffered copy dirty"""
+        if self.buffer_pool is None:
+            self._store_page(node.page_id, node)
+        else:
+            self.buffer_pool.put_page(node.page_id, node)
+        return node
+
+    def _unpin_all(self):
+        for page_id in self._pinned:
+            self.buffer_pool.unpin_page(page_id)
+        self._pinned = []
+
+    @staticmethod
+    def _record_size(value):
+        """Encoded bytes of one leaf entry"""
+        return 8 + VALUE_LENGTH_SIZE + len(value.encode("utf-8"))
+
+    def _is_overfull(self, node):
+        if len(node.keys) > self.order - 1:
+            return True
+        return node.is_leaf and len(self._encode_node(node)) > self.pager.page_size
+
+    def search(self, key):
+        self._reset_counters()
+        node = self._read_node(self.root_page)
+
+        while not node.is_leaf:
+            idx = bisect.bisect_right(node.keys, key)
+            node = self._read_node(node.pointers[idx])
+
+        self._unpin_all()
+        i = bisect.bisect_left(node.keys, key)
+        if i < len(node.keys) and node.keys[i] == key:
+            return node.pointers[i], self.num_read_ios
+        return None, self.num_read_ios
+
+    def insert(self, key, value):
+        self._reset_counters()
+        if NODE_HEADER_SIZE + self._record_size(value) > self.pager.page_size:
+            raise ValueError(f"record for key {key} needs {NODE_HEADER_SIZE + self._record_size(value)} "
+                             f"bytes, more than a {self.pager.page_size}-byte page")
+        self._check_buffer_pool()
+        path = self._find_path(key)
+        leaf = path.pop()
+        pos = bisect.bisect_left(leaf.keys, key)
+        leaf.keys.insert(pos, key)
+        leaf.pointers.insert(pos, value)
+
+        if self._is_overfull(leaf):
+            self._split(leaf, path)
+        else:
+            self._write_node(leaf)
+        self._unpin_all()
+        return self.num_write_ios
+
+    def _find_path(self, key):
+        """Return the nodes from the root down to the leaf for key"""
+        node = self._read_node(self.root_page)
+        path = [node]
+        while not node.is_leaf:
+            idx = bisect.bisect_right(node.keys, key)
+            node = self._read_node(node.pointers[idx])
+            path.append(node)
+        return path
+
+    def _split(self, node, path):
+        # Parent pointers are not stored on disk, so splits walk back up the
+        # root-to-leaf path collected during the descent
+        while True:
+            if node.is_leaf:
+                split_keys, new_nodes = self._split_leaf(node)
+            else:
+                mid = len(node.keys) // 2
+                new_node = self._allocate_node()
+                split_keys = [node.keys[mid]]
+                new_nodes = [new_node]
+                new_node.keys = node.keys[mid + 1:]
+                new_node.pointers = node.pointers[mid + 1:]
+                node.keys = node.keys[:mid]
+                node.pointers = node.pointers[:mid + 1]
+            for new_node in new_nodes:
+                self._write_node(new_node)
+            self._write_node(node)
+
+            if not path:
+                new_root = self._allocate_node()
+                new_root.keys = split_keys
+                new_root.pointers = [node.page_id] + [new_node.page_id for new_node in new_nodes]
+                self._write_node(new_root)
+                self.root_page = new_root.page_id
+                self.height += 1
+                self._write_header()
+                return
+
+            parent = path.pop()
+            # The new nodes follow node; with repeated separators the key alone can name another child
+            pos = parent.pointers.index(node.page_id)
+            parent.keys[pos:pos] = split_keys
+            parent.pointers[pos + 1:pos + 1] = [new_node.page_id for new_node in new_nodes]
+            if not self._is_overfull(parent):
+                self._write_node(parent)
+                return
+            node = parent
+
+    def _split_leaf(self, leaf):
+        """Move the upper part of an overfull leaf into new leaves; return their first keys and them"""
+        cuts = self._leaf_cuts(leaf)
+        bounds = cuts + [len(leaf.keys)]
+        new_leaves = []
+        for start, end in zip(bounds, bounds[1:]):
+            new_leaf = self._allocate_node(is_leaf=True)
+            new_leaf.keys = leaf.keys[start:end]
+            new_leaf.pointers = leaf.pointers[start:end]
+            new_leaves.append(new_leaf)
+        next_page = leaf.next
+        for new_leaf in reversed(new_leaves):
+            new_leaf.next = next_page
+            next_page = new_leaf.page_id
+        leaf.next = next_page
+        split_keys = [leaf.keys[cut] for cut in cuts]
+        leaf.keys = leaf.keys[:cuts[0]]
+        leaf.pointers = leaf.pointers[:cuts[0]]
+        return split_keys, new_leaves
+
+    def _leaf_cuts(self, leaf):
+        """Indexes to split an overfull leaf at so that every piece fits in a page"""
+        n = len(leaf.keys)
+        offsets = list(itertools.accumulate((self._record_size(value) for value in leaf.pointers), initial=0))
+        capacity = self.pager.page_size - NODE_HEADER_SIZE
+
+        def fits(start, end):
+            return end - start <= self.order - 1 and offsets[end] - offsets[start] <= capacity
+
+        mid = n // 2
+        if fits(0, mid) and fits(mid, n):
+            return [mid]
+        # Large values: split where the bigger half is smallest in bytes
+        cuts = [cut for cut in range(1, n) if fits(0, cut) and fits(cut, n)]
+        if cuts:
+            return [min(cuts, key=lambda cut: max(offsets[cut], offsets[n] - offsets[cut]))]
+        # No two pieces fit (a large value landed between two full halves): pack greedily
+        cuts = []
+        start = 0
+        for end in range(1, n + 1):
+            if not fits(start, end):
+                cuts.append(end - 1)
+                start = end - 1
+        return cuts
+
+    def range_query(self, low, high):
+        self._reset_counters()
+        leaf = self._find_path(low)[-1]
+        results = []
+
+        while leaf is not None:
+            start = bisect.bisect_left(leaf.keys, low)
+            end = bisect.bisect_right(leaf.keys, high)
+            results.extend(zip(leaf.keys[start:end], leaf.pointers[start:end]))
+            # Only move on while the whole leaf fell inside the range
+            next_page = leaf.next if end == len(leaf.keys) else NO_PAGE
+            self._unpin_all()
+            leaf = self._read_node(next_page) if next_page != NO_PAGE else None
+
+        return results, self.num_read_ios
+
+    def flush(self):
+        """Persist the header and push dirty pages to the file"""
+        if self.buffer_pool is not None:
+            self.buffer_pool.flush_all()
+        self._write_header()
+        self.pager.flush()
+
+    def close(self):
+        if self.buffer_pool is not None:
+            self.buffer_pool.flush_all()
+        self._write_header()
+        self.pager.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
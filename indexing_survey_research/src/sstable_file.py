@@ -0,0 +1,267 @@
+import bisect
+import mmap
+import operator
+import os
+import struct
+import zlib
+from bloom_filter import BloomFilter
+from buffer_pool import BufferPool
+
+try:
+    import lz4.frame
+except ImportError:  # optional, only needed for compression="lz4"
+    lz4 = None
+
+# File layout: data blocks, index block, filter block, range tombstone
+# block, fixed-size footer. The index holds every block's first key, offset
+# and stored length, then the table's last key, so a lookup can pick its
+# one candidate block. The range tombstone block lists (low, high) pairs.
+FOOTER_FORMAT = "<qqqqqqqqB8s"  # index, filter and range tombstone offset/length, entries, blocks, compression, magic
+FOOTER_SIZE = struct.calcsize(FOOTER_FORMAT)
+SSTABLE_MAGIC = b"SSTBL003"  # 003: filters hash bloom_key_bytes(key), not repr(key)
+BLOCK_POINTER_FORMAT = "<qI"  # offset, stored length
+BLOCK_POINTER_SIZE = struct.calcsize(BLOCK_POINTER_FORMAT)
+COMPRESSION_CODES = {None: 0, "zlib": 1, "lz4": 2}
+COMPRESSION_NAMES = {code: name for name, code in COMPRESSION_CODES.items()}
+
+
+def encode_item(item):
+    """Tagged encoding for keys and values: int64, UTF-8 string or None"""
+    if item is None:
+        return b"n"
+    if not isinstance(item, str):
+        # bool and NumPy integers are stored as the int they equal
+        return b"i" + struct.pack("<q", operator.index(item))
+    data = item.encode("utf-8")
+    return b"s" + struct.pack("<I", len(data)) + data
+
+
+def decode_item(buf, offset):
+    tag = buf[offset:offset + 1]
+    offset += 1
+    if tag == b"n":
+        return None, offset
+    if tag == b"i":
+        return struct.unpack_from("<q", buf, offset)[0], offset + 8
+    (length,) = struct.unpack_from("<I", buf, offset)
+    offset += 4
+    return bytes(buf[offset:offset + length]).decode("utf-8"), offset + length
+
+
+def _compress(compression, data):
+    if compression == "zlib":
+        return zlib.compress(data)
+    if compression == "lz4":
+        return lz4.frame.compress(data)
+    return data
+
+
+def _decompress(compression, data):
+    if compression == "zlib":
+        return zlib.decompress(data)
+    if compression == "lz4":
+        return lz4.frame.decompress(data)
+    return data
+
+
+def new_block_cache(capacity_blocks):
+    """LRU cache of decoded data blocks that any number of tables can share.
+
+    Pages are keyed by (table, block number), so a miss is loaded straight
+    from the owning table's file.
+    """
+    return BufferPool(capacity_blocks, "lru",
+                      load_page=lambda page_id: page_id[0].read_block(page_id[1]))
+
+
+class DiskSSTable:
+    """Immutable sorted run stored in one file and read through mmap.
+
+    Only the sparse index (one key per block) and the Bloom filter are kept
+    in memory, so a point lookup reads at most one data block. num_reads
+    counts data blocks actually read from the file; reads served by the
+    block cache are not counted. range_tombstones, also kept in memory,
+    lists the key ranges this table deletes from older tables.
+    """
+    def __init__(self, path, block_cache=None):
+        self.path = path
+        self.block_cache = block_cache
+        self.num_reads = 0
+        self.file = open(path, "rb")
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (index_offset, index_length, filter_offset, filter_length, tombstone_offset, tombstone_length,
+         self.num_entries, num_blocks, compression, magic) = struct.unpack_from(FOOTER_FORMAT, self.mm, len(self.mm) - FOOTER_SIZE)
+        if magic != SSTABLE_MAGIC:
+            raise ValueError(f"{path} is not an SSTable file")
+        self.compression = COMPRESSION_NAMES[compression]
+
+        # Sparse index: first key of every block plus where the block lives
+        self.first_keys = []
+        self.block_pointers = []
+        offset = index_offset
+        for _ in range(num_blocks):
+            key, offset = decode_item(self.mm, offset)
+            self.first_keys.append(key)
+            self.block_pointers.append(struct.unpack_from(BLOCK_POINTER_FORMAT, self.mm, offset))
+            offset += BLOCK_POINTER_SIZE
+        self.last_key, offset = decode_item(self.mm, offset)
+        assert offset == index_offset + index_length
+
+        self.bloom = None
+        if filter_length:
+            self.bloom = BloomFilter.from_bytes(self.mm[filter_offset:filter_offset + filter_length])
+
+        self.range_tombstones = []
+        offset = tombstone_offset
+        while offset < tombstone_offset + tombstone_length:
+            low, offset = decode_item(self.mm, offset)
+            high, offset = decode_item(self.mm, offset)
+            self.range_tombstones.append((low, high))
+
+    @classmethod
+    def write(cls, path, entries, num_keys, block_size=4096, compression=None,
+              bloom_bits_per_key=None, block_cache=None, range_tombstones=()):
+        """Stream sorted (key, value) pairs into a new file and open it.
+
+        num_keys is an upper bound on the number of entries, used to size
+        the Bloom filter before the entries have been seen. A table may
+        hold range tombstones and no entries.
+        """
+        if compression not in COMPRESSION_CODES:
+            raise ValueError(f"unknown compression {compression!r}, expected one of {sorted(COMPRESSION_CODES, key=str)}")
+        if compression == "lz4" and lz4 is None:
+            raise ValueError("lz4 compression needs the lz4 package")
+        bloom = BloomFilter(num_keys, bloom_bits_per_key) if bloom_bits_per_key else None
+
+        index = []
+        block = []
+        block_bytes = 0
+        num_entries = 0
+        last_key = None
+        with open(path, "wb") as f:
+            def write_block():
+                data = _compress(compression, b"".join(block))
+                index.append(encode_item(first_key) + struct.pack(BLOCK_POINTER_FORMAT, f.tell(), len(data)))
+                f.write(data)
+
+            for key, value in entries:
+                if not block:
+                    first_key = key
+                record = encode_item(key) + encode_item(value)
+                block.append(record)
+                block_bytes += len(record)
+                num_entries += 1
+                last_key = key
+                if bloom is not None:
+                    bloom.add(key)
+                if block_bytes >= block_size:
+                    write_block()
+                    block = []
+                    block_bytes = 0
+            if block:
+                write_block()
+            if not num_entries and not range_tombstones:
+                raise ValueError("an SSTable needs at least one entry or range tombstone")
+
+            index_offset = f.tell()
+            f.write(b"".join(index) + encode_item(last_key))
+            filter_offset = f.tell()
+            if bloom is not None:
+                f.write(bloom.to_bytes())
+            tombstone_offset = f.tell()
+            f.write(b"".join(encode_item(low) + encode_item(high) for low, high in range_tombstones))
+            footer_offset = f.tell()
+            f.write(struct.pack(FOOTER_FORMAT, index_offset, filter_offset - index_offset,
+                                filter_offset, tombstone_offset - filter_offset,
+                                tombstone_offset, footer_offset - tombstone_offset, num_entries,
+                                len(index), COMPRESSION_CODES[compression], SSTABLE_MAGIC))
+        return cls(path, block_cache)
+
+    def __len__(self):
+        return self.num_entries
+
+    def read_block(self, block_no):
+        """Read and decode one data block from the file into (keys, values)"""
+        self.num_reads += 1
+        offset, length = self.block_pointers[block_no]
+        data = _decompress(self.compression, self.mm[offset:offset + length])
+        keys = []
+        values = []
+        pos = 0
+        while pos < len(data):
+            key, pos = decode_item(data, pos)
+            value, pos = decode_item(data, pos)
+            keys.append(key)
+            values.append(value)
+        return keys, values
+
+    def _block(self, block_no, use_cache=True):
+        if self.block_cache is None or not use_cache:
+            return self.read_block(block_no)
+        page_id = (self, block_no)
+        block = self.block_cache.fetch_page(page_id)
+        self.block_cache.unpin_page(page_id)
+        return block
+
+    def _block_for(self, key):
+        """Index of the only block that can hold key, or -1"""
+        if not self.block_pointers or key > self.last_key:
+            return -1
+        return bisect.bisect_right(self.first_keys, key) - 1
+
+    def get(self, key):
+        """Return (found, value), reading at most one data block"""
+        block_no = self._block_for(key)
+        if block_no < 0:
+            return False, None
+        keys, values = self._block(block_no)
+        i = bisect.bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            return True, values[i]
+        return False, None
+
+    def get_many(self, keys):
+        """Return {key: value} for the keys found here, reading each data block at most once"""
+        by_block = {}
+        for key in keys:
+            block_no = self._block_for(key)
+            if block_no >= 0:
+                by_block.setdefault(block_no, []).append(key)
+        found = {}
+        for block_no in sorted(by_block):
+            block_keys, values = self._block(block_no)
+            for key in by_block[block_no]:
+                i = bisect.bisect_left(block_keys, key)
+                if i < len(block_keys) and block_keys[i] == key:
+                    found[key] = values[i]
+        return found
+
+    def iter_from(self, low=None, use_cache=True):
+        """Yield (key, value) pairs with key >= low in order, one block at a time"""
+        if low is None:
+            block_no, start_key = 0, None
+        elif not self.block_pointers or low > self.last_key:
+            return
+        else:
+            block_no, start_key = max(0, bisect.bisect_right(self.first_keys, low) - 1), low
+        for block_no in range(block_no, len(self.block_pointers)):
+            keys, values = self._block(block_no, use_cache)
+            start = 0 if start_key is None else bisect.bisect_left(keys, start_key)
+            start_key = None
+            yield from zip(keys[start:], values[start:])
+
+    def __iter__(self):
+        # Full scans (compaction) bypass the cache so they cannot flush it
+        return self.iter_from(None, use_cache=False)
+
+    def size_bytes(self):
+        return len(self.mm)
+
+    def close(self):
+        self.mm.close()
+        self.file.close()
+
+    def delete(self):
+        self.close()
+        os.remove(self.path)
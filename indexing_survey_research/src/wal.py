@@ -0,0 +1,214 @@
+import os
+import struct
+import threading
+import time
+import zlib
+from sstable_file import encode_item, decode_item
+
+# Every record is framed as payload length, CRC32 of the payload, payload
+RECORD_HEADER_FORMAT = "<II"
+RECORD_HEADER_SIZE = struct.calcsize(RECORD_HEADER_FORMAT)
+WAL_SYNC_MODES = ("none", "batch", "group")
+# Payload tag of a range delete; a put's payload starts with its key's item tag
+RANGE_DELETE_TAG = b"r"
+# replay() yields (RANGE_DELETE, (low, high)) for a logged range delete
+RANGE_DELETE = object()
+
+
+def encode_record(key, value):
+    return _frame(encode_item(key) + encode_item(value))
+
+
+def encode_range_delete_record(low, high):
+    return _frame(RANGE_DELETE_TAG + encode_item(low) + encode_item(high))
+
+
+def _frame(payload):
+    return struct.pack(RECORD_HEADER_FORMAT, len(payload), zlib.crc32(payload)) + payload
+
+
+class WriteAheadLog:
+    """Append-only log of (key, value) writes split into numbered segment files.
+
+    Each memtable writes to its own segment: rotate() closes the current
+    segment and starts the next, and once the memtable has been flushed to
+    an SSTable, delete_segments() removes its segments. replay() returns
+    the records of every segment still on disk, stopping at the first torn
+    or corrupt record; a range delete comes back as (RANGE_DELETE, (low, high)).
+
+    Sync modes:
+      none   leave records to the OS page cache, never fsync
+      batch  fsync before every append() returns (one fsync per batch)
+      group  fsync once group_commit_bytes are pending or the oldest
+             pending record is group_commit_interval seconds old, so a
+             crash loses at most one window of writes
+
+    append() writes and syncs in one call. A caller that must order its
+    records with other state under its own lock can instead write() there,
+    which only buffers the records and returns a ticket, and commit() the
+    ticket once that lock is released: fsyncs run under a separate lock on
+    a duplicate of the file descriptor, so they never hold up write(), and
+    one fsync commits every ticket written before it.
+    """
+    def __init__(self, directory, sync="batch", group_commit_bytes=1 << 20, group_commit_interval=0.005):
+        if sync not in WAL_SYNC_MODES:
+            raise ValueError(f"unknown WAL sync mode {sync!r}, expected one of {list(WAL_SYNC_MODES)}")
+        self.directory = directory
+        self.sync = sync
+        self.group_commit_bytes = group_commit_bytes
+        self.group_commit_interval = group_commit_interval
+        self.num_syncs = 0
+        self.bytes_written = 0
+
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._synced_bytes = 0
+        self._pending_bytes = 0
+        self._pending_since = None
+        self._closed = False
+        existing = self.segment_ids()
+        self.segment_id = existing[-1] + 1 if existing else 0
+        self.file = open(self._segment_path(self.segment_id), "ab")
+
+        self._syncer = None
+        if sync == "group":
+            # Syncs an idle log once its window has passed
+            self._syncer = threading.Thread(target=self._group_commit_worker, daemon=True)
+            self._syncer.start()
+
+    def _segment_path(self, segment_id):
+        return os.path.join(self.directory, f"{segment_id:08d}.wal")
+
+    def segment_ids(self):
+        return sorted(int(name[:-4]) for name in os.listdir(self.directory) if name.endswith(".wal"))
+
+    def append(self, pairs):
+        """Log a batch of (key, value) writes"""
+        self.commit(self.write(pairs))
+
+    def append_range_delete(self, low, high):
+        """Log the deletion of every key in [low, high]"""
+        self.commit(self.write_range_delete(low, high))
+
+    def write(self, pairs):
+        """Buffer a batch of (key, value) writes without syncing and return its commit() ticket"""
+        return self._write(b"".join(encode_record(key, value) for key, value in pairs))
+
+    def write_range_delete(self, low, high):
+        """Buffer a range delete without syncing and return its commit() ticket"""
+        return self._write(encode_range_delete_record(low, high))
+
+    def _write(self, data):
+        with self._lock:
+            self.file.write(data)
+            self.bytes_written += len(data)
+            if self.sync == "group":
+                self._pending_bytes += len(data)
+                if self._pending_since is None:
+                    self._pending_since = time.perf_counter()
+            return self.bytes_written
+
+    def commit(self, ticket):
+        """Make the records written up to ticket as durable as the sync mode promises"""
+        if self.sync == "batch":
+            self._sync(ticket)
+        elif self.sync == "group":
+            with self._lock:
+                due = self._pending_since is not None and (
+                    self._pending_bytes >= self.group_commit_bytes
+                    or time.perf_counter() - self._pending_since >= self.group_commit_interval)
+            if due:
+                self._sync(ticket)
+
+    def _sync(self, ticket):
+        """fsync everything written so far, unless an fsync already covered ticket"""
+        with self._sync_lock:
+            if self._synced_bytes >= ticket:
+                return
+            with self._lock:
+                if self._closed:
+                    # close() synced everything
+                    return
+                self.file.flush()
+                target = self.bytes_written
+                # A duplicate stays valid if rotate() closes the file meanwhile
+                fd = os.dup(self.file.fileno())
+                self._pending_bytes = 0
+                self._pending_since = None
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            with self._lock:
+                # rotate() may have synced further meanwhile
+                self._synced_bytes = max(self._synced_bytes, target)
+                self.num_syncs += 1
+
+    def _sync_locked(self):
+        """fsync the current file (log lock held)"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.num_syncs += 1
+        self._synced_bytes = self.bytes_written
+        self._pending_bytes = 0
+        self._pending_since = None
+
+    def _group_commit_worker(self):
+        while True:
+            time.sleep(self.group_commit_interval)
+            with self._lock:
+                if self._closed:
+                    return
+                due = self._pending_since is not None
+            if due:
+                self._sync(self.bytes_written)
+
+    def rotate(self):
+        """Close the current segment, start a new one and return the closed segment's id"""
+        with self._lock:
+            self.file.flush()
+            if self.sync != "none":
+                self._sync_locked()
+            self.file.close()
+            closed = self.segment_id
+            self.segment_id += 1
+            self.file = open(self._segment_path(self.segment_id), "ab")
+        return closed
+
+    def delete_segments(self, up_to):
+        """Remove every closed segment with an id up to and including up_to"""
+        for segment_id in self.segment_ids():
+            if segment_id <= up_to and segment_id != self.segment_id:
+                os.remove(self._segment_path(segment_id))
+
+    def replay(self):
+        """Yield the logged (key, value) writes of all segments, oldest first"""
+        for segment_id in self.segment_ids():
+            with open(self._segment_path(segment_id), "rb") as f:
+                data = f.read()
+            offset = 0
+            while offset + RECORD_HEADER_SIZE <= len(data):
+                length, crc = struct.unpack_from(RECORD_HEADER_FORMAT, data, offset)
+                payload = data[offset + RECORD_HEADER_SIZE:offset + RECORD_HEADER_SIZE + length]
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    # Torn write at the tail of the log: nothing after it was acknowledged
+                    break
+                if payload[:1] == RANGE_DELETE_TAG:
+                    low, pos = decode_item(payload, 1)
+                    high, _ = decode_item(payload, pos)
+                    yield RANGE_DELETE, (low, high)
+                else:
+                    key, pos = decode_item(payload, 0)
+                    value, _ = decode_item(payload, pos)
+                    yield key, value
+                offset += RECORD_HEADER_SIZE + length
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self.file.flush()
+            if self.sync != "none":
+                self._sync_locked()
+            self.file.close()
+        if self._syncer is not None:
+            self._syncer.join()
@@ -0,0 +1,193 @@
+import random
+import numpy as np
+
+def generate_workload_sequential(size, rng=random):
+    """Generate sequential keys"""
+    return [(i, f"value_{i}") for i in range(size)]
+
+def generate_workload_random(size, rng=random):
+    """Generate random keys"""
+    keys = list(range(size))
+    rng.shuffle(keys)
+    return [(key, f"value_{key}") for key in keys]
+
+def generate_workload_strings(size, num_tenants=50, rng=random):
+    """Generate long string keys with shared tenant/path prefixes"""
+    keys = [f"tenant-{rng.randrange(num_tenants):05d}/accounts/{rng.randrange(10**6):07d}/"
+            f"events/{i:09d}" for i in range(size)]
+    rng.shuffle(keys)
+    return [(key, f"value_{i}") for i, key in enumerate(keys)]
+
+# Workloads selectable by name; each takes (size, rng=random) and returns (key, value) pairs
+WORKLOADS = {
+    "sequential": generate_workload_sequential,
+    "random": generate_workload_random,
+    "strings": generate_workload_strings,
+}
+
+# YCSB core workloads: operation mix and request distribution. Scans read
+# up to max_scan_length keys; read_modify_write reads a key, then updates it.
+YCSB_WORKLOADS = {
+    "A": ({"read": 0.5, "update": 0.5}, "zipfian"),
+    "B": ({"read": 0.95, "update": 0.05}, "zipfian"),
+    "C": ({"read": 1.0}, "zipfian"),
+    "D": ({"read": 0.95, "insert": 0.05}, "latest"),
+    "E": ({"scan": 0.95, "insert": 0.05}, "zipfian"),
+    "F": ({"read": 0.5, "read_modify_write": 0.5}, "zipfian"),
+}
+KEY_DISTRIBUTIONS = ("uniform", "zipfian", "scrambled_zipfian", "latest", "hotspot")
+KEY_SPACE = 2 ** 63  # hashed keys stay below this so they fit in int64
+FNV_OFFSET_BASIS = 0xCBF29CE484222325
+FNV_PRIME = 0x100000001B3
+
+def fnv_hash(n):
+    """64-bit FNV-1a hash of an integer's eight bytes"""
+    h = FNV_OFFSET_BASIS
+    for _ in range(8):
+        h = ((h ^ (n & 0xFF)) * FNV_PRIME) & 0xFFFFFFFFFFFFFFFF
+        n >>= 8
+    return h
+
+class ZipfianGenerator:
+    """Zipfian-distributed integers in [0, items), 0 being the most popular.
+
+    Gray et al.'s rejection-free method as used by YCSB. The item count
+    may grow between calls (for latest-biased requests); the zeta sum is
+    then extended rather than recomputed.
+    """
+    def __init__(self, items, theta=0.99, rng=random):
+        self.theta = theta
+        self.rng = rng
+        self.alpha = 1 / (1 - theta)
+        self.zeta2 = self._zeta(0, 2)
+        self.items = 0
+        self.zetan = 0.0
+        self._grow(max(items, 1))
+
+    def _zeta(self, start, end):
+        return float(np.sum(1.0 / np.arange(start + 1, end + 1, dtype=np.float64) ** self.theta))
+
+    def _grow(self, items):
+        self.zetan += self._zeta(self.items, items)
+        self.items = items
+        self.eta = (1 - (2 / items) ** (1 - self.theta)) / (1 - self.zeta2 / self.zetan)
+
+    def next(self, items=None):
+        if items is not None and items > self.items:
+            self._grow(items)
+        u = self.rng.random()
+        uz = u * self.zetan
+        if uz < 1:
+            return 0
+        if uz < 1 + 0.5 ** self.theta:
+            return 1
+        return min(int(self.items * (self.eta * u - self.eta + 1) ** self.alpha), self.items - 1)
+
+class KeyChooser:
+    """Picks the id of an existing record, 0 <= id < num_records, by distribution.
+
+      uniform            every record equally likely
+      zipfian            low ids are hot
+      scrambled_zipfian  Zipfian popularity with the hot ids hashed across the id space
+      latest             the most recently inserted records are hot
+      hotspot            hot_op_fraction of requests go to the first hot_fraction of ids
+    """
+    def __init__(self, distribution, num_records, rng=random, hot_fraction=0.2, hot_op_fraction=0.8):
+        if distribution not in KEY_DISTRIBUTIONS:
+            raise ValueError(f"unknown key distribution {distribution!r}, expected one of {list(KEY_DISTRIBUTIONS)}")
+        self.distribution = distribution
+        self.rng = rng
+        self.hot_fraction = hot_fraction
+        self.hot_op_fraction = hot_op_fraction
+        self.zipfian = None
+        if distribution in ("zipfian", "scrambled_zipfian", "latest"):
+            self.zipfian = ZipfianGenerator(num_records, rng=rng)
+
+    def next(self, num_records):
+        if self.distribution == "uniform":
+            return self.rng.randrange(num_records)
+        if self.distribution == "zipfian":
+            return self.zipfian.next(num_records)
+        if self.distribution == "scrambled_zipfian":
+            return fnv_hash(self.zipfian.next(num_records)) % num_records
+        if self.distribution == "latest":
+            return num_records - 1 - self.zipfian.next(num_records)
+        hot = max(1, int(num_records * self.hot_fraction))
+        if self.rng.random() < self.hot_op_fraction or hot == num_records:
+            return self.rng.randrange(hot)
+        return self.rng.randrange(hot, num_records)
+
+class YCSBWorkload:
+    """YCSB-style workload: a load phase, then a lazy stream of mixed operations.
+
+    mix is one of YCSB_WORKLOADS ("A" to "F") or a dict of operation
+    ratios; distribution overrides the mix's request distribution.
+    Record ids become integer keys, hashed across [0, 2**63) by default
+    (insert_order="hashed", as YCSB does) or used as they are
+    ("ordered"). value_size is a length in characters or a (min, max)
+    range. load() yields (key, value) pairs; operations() yields
+    ("read", key, None), ("update", key, value), ("insert", key, value),
+    ("read_modify_write", key, value) and ("scan", low, high) tuples.
+    Both are generated as they are consumed, from seeded generators.
+    """
+    def __init__(self, mix="A", record_count=10000, operation_count=10000, distribution=None,
+                 value_size=100, max_scan_length=100, insert_order="hashed", seed=0):
+        if isinstance(mix, str):
+            if mix not in YCSB_WORKLOADS:
+                raise ValueError(f"unknown YCSB workload {mix!r}, expected one of {sorted(YCSB_WORKLOADS)}")
+            mix, default_distribution = YCSB_WORKLOADS[mix]
+        else:
+            default_distribution = "zipfian"
+        if insert_order not in ("hashed", "ordered"):
+            raise ValueError(f"unknown insert order {insert_order!r}, expected 'hashed' or 'ordered'")
+        self.mix = dict(mix)
+        self.distribution = distribution or default_distribution
+        self.record_count = record_count
+        self.operation_count = operation_count
+        self.value_size = value_size
+        self.max_scan_length = max_scan_length
+        self.insert_order = insert_order
+        self.seed = seed
+
+    def key(self, record_id):
+        if self.insert_order == "ordered":
+            return record_id
+        return fnv_hash(record_id) % KEY_SPACE
+
+    def _value(self, rng):
+        size = self.value_size
+        if not isinstance(size, int):
+            size = rng.randint(*size)
+        return rng.randbytes((size + 1) // 2).hex()[:size]
+
+    def load(self):
+        rng = random.Random(f"{self.seed}:load")
+        for record_id in range(self.record_count):
+            yield self.key(record_id), self._value(rng)
+
+    def operations(self):
+        rng = random.Random(f"{self.seed}:run")
+        chooser = KeyChooser(self.distribution, self.record_count, rng)
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        num_records = self.record_count
+        for _ in range(self.operation_count):
+            operation = rng.choices(names, weights)[0]
+            if operation == "insert":
+                yield "insert", self.key(num_records), self._value(rng)
+                num_records += 1
+                continue
+            key = self.key(chooser.next(num_records))
+            if operation == "read":
+                yield "read", key, None
+            elif operation == "scan":
+                yield "scan", key, key + self._scan_span(rng.randint(1, self.max_scan_length), num_records)
+            else:
+                yield operation, key, self._value(rng)
+
+    def _scan_span(self, length, num_records):
+        """Key distance that holds about length records"""
+        if self.insert_order == "ordered":
+            return length - 1
+        # Hashed keys are spread evenly over the key space
+        return length * KEY_SPACE // num_records